@@ -1,17 +1,36 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
+import os
 import re
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import json
-from io import BytesIO
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib import colors
+from functools import wraps
+from types import MappingProxyType
+
+from mediaplanner import (
+    PRODUCT_RULES, REGION_CURRENCY, CPM_RECOMMENDATIONS,
+    get_currency_symbol, get_compatible_formats, get_compatible_devices,
+    get_product_config, generate_o_o_taxonomy, generate_li_name,
+    is_video_product, get_default_cpm, is_cpd_product,
+    resolve_inventory_type, resolve_inventory_targeting_mode,
+    validate_deal_format, get_allowed_banner_sizes, get_freq_cap_numeric,
+    calc_avg_daily_uniques, calc_avg_frequency_daily, calc_lifetime_uniques,
+    calculate_delivery_pressure, forecast_audience_array,
+    delivery_frame, simulate_delivery, simulate_reach,
+)
+from mediaplanner.flights import FlightStore
+from mediaplanner.fx import convert_flights, flight_currencies, load_fx_rates, market_currency
+from mediaplanner.plan_store import DEFAULT_DB_PATH, PlanStore
+from mediaplanner.capacity import read_deals
+from mediaplanner.takeovers import TakeoverIndex
+from mediaplanner.reach_curves import curve_reach
+from mediaplanner.optimizer import optimize_budget
+from mediaplanner.scenarios import SWEEP_METRICS, heatmap_frame, product_scenarios, scenario_frame, sweep_axes
+from mediaplanner.exporters import build_export_files, export_fingerprint
+from mediaplanner.timing import DEFAULT_LOG_PATH, RerunTimer, append_jsonl
 
 # ================================================================================
 # PAGE CONFIG & STYLING
@@ -23,6 +42,49 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ================================================================================
+# RERUN TIMING (opt-in: ?timing=1 or MEDIAPLANNER_TIMING=1)
+# ================================================================================
+_timing_on = (os.environ.get("MEDIAPLANNER_TIMING", "") not in ("", "0")
+              or st.query_params.get("timing") == "1")
+if _timing_on:
+    st.session_state.setdefault("timing_session", uuid.uuid4().hex[:12])
+    st.session_state.timing_reruns = st.session_state.get("timing_reruns", 0) + 1
+_timer = RerunTimer(enabled=_timing_on, session_id=st.session_state.get("timing_session"),
+                    rerun=st.session_state.get("timing_reruns"))
+if _timer.enabled:
+    for _helper in ("get_currency_symbol", "get_compatible_formats", "get_compatible_devices",
+                    "get_product_config", "generate_o_o_taxonomy", "generate_li_name",
+                    "is_video_product", "get_default_cpm", "is_cpd_product",
+                    "resolve_inventory_type", "resolve_inventory_targeting_mode",
+                    "validate_deal_format", "get_allowed_banner_sizes", "get_freq_cap_numeric",
+                    "calc_avg_daily_uniques", "calc_avg_frequency_daily", "calc_lifetime_uniques",
+                    "calculate_delivery_pressure", "simulate_delivery", "simulate_reach", "curve_reach",
+                    "optimize_budget", "product_scenarios", "forecast_audience_array",
+                    "export_fingerprint"):
+        globals()[_helper] = _timer.wrap(globals()[_helper])
+_timing_log = os.environ.get("MEDIAPLANNER_TIMING_LOG", DEFAULT_LOG_PATH)
+
+
+def _timed_fragment(fn):
+    """Log a fragment that reruns on its own as its own record (``scope="fragment"``).
+
+    During a full rerun the fragment is timed by the page's timer as usual.
+    """
+    @wraps(fn)
+    def run(*args, **kwargs):
+        if not _timer.finished:
+            return fn(*args, **kwargs)
+        fragment_timer = _timer.fragment(fn.__name__)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            append_jsonl(fragment_timer.finish(), _timing_log)
+    return run
+
+
+_timer.mark("Styling & Header")
+
 st.markdown("""
 <style>
     .main { padding: 2rem 1.5rem; }
@@ -132,974 +194,43 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ================================================================================
-# INITIALIZE SESSION STATE
+# SHARED RESOURCES (built once per server process, read-only in every session)
 # ================================================================================
-if "flights" not in st.session_state:
-    st.session_state.flights = []
-if "campaign_details" not in st.session_state:
-    st.session_state.campaign_details = {}
+@st.cache_resource(show_spinner=False)
+def _option_lists():
+    """Selectbox options derived from the rule tables, shared by every session."""
+    return MappingProxyType({
+        "markets": tuple(REGION_CURRENCY),
+        "publishers": ("MSN", "Outlook", "MCG"),
+        "products": tuple(PRODUCT_RULES),
+        "cpm_products": tuple(p for p in PRODUCT_RULES if not is_cpd_product(p)),
+    })
 
-# ================================================================================
-# PRODUCT RULES - MONETIZE GUARANTEED ONLY (SEAT 280)
-# Full matrix: publisher × format × device — no PMPs
-# ================================================================================
-PRODUCT_RULES = {
-    # ── PG FIRST IMPRESSION ──────────────────────────────────────────────────
-    "PG - First Impression": {
-        "seat": "280 - Monetize",
-        "line_item_type": "PG",
-        "revenue_type": "CPM",
-        "delivery_type": "N/A",
-        "allow_rtb": False,
-        "underspend_catchup": "N/A",
-        "impression_pacing": "100%",
-        "creative_rotation": "N/A",
-        "landing_page": "None",
-        "publishers": ["MSN"],
-        "formats": ["Banner"],
-        "priority": 7,
-        "frequency_cap": "1 imp/day",
-        "pacing": "ASAP",
-        "inventory_type": "Banner",
-        "geo_targeting": "Country Targeting",
-        "publisher_targeting": "KV pub = msn",
-        "supply_targeting": "App & Web",
-        "device_config": {
-            "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet",
-                            "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50",
-                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
-            "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",
-                            "ad_sizes": "728x90, 970x250, 300x250, 300x600",
-                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
-            "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",
-                            "ad_sizes": "320x50",
-                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
-        },
-    },
-    # ── PG STANDARD ──────────────────────────────────────────────────────────
-    "PG - Standard": {
-        "seat": "280 - Monetize",
-        "line_item_type": "PG",
-        "revenue_type": "CPM",
-        "delivery_type": "N/A",
-        "allow_rtb": False,
-        "underspend_catchup": "N/A",
-        "impression_pacing": "100%",
-        "creative_rotation": "N/A",
-        "landing_page": "None",
-        "publishers": ["MSN", "Outlook", "MCG"],
-        "formats": ["Banner", "Native", "Video"],
-        "priority": 5,
-        "frequency_cap": "6 imps/day",
-        "pacing": "Even",
-        "inventory_type": "Banner",
-        "geo_targeting": "Country Targeting",
-        "publisher_targeting": "KV pub = msn / outlook / microsoftcasualgames",
-        "supply_targeting": "App & Web",
-        "publisher_format_config": {
-            ("MSN", "Banner"): {
-                "inventory_targeting": "KV pub = msn",
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "728x90, 970x250, 300x250, 300x600"},
-                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
-                },
-            },
-            ("MSN", "Video"): {
-                "inventory_targeting": "KV pub = msn",
-                "creative_specs": "15 seconds OR 30 seconds",
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A"},
-                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A"},
-                },
-            },
-            ("Outlook", "Banner"): {
-                "inventory_targeting": "KV pub = outlook",
-                "device_config": {
-                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "160x600, 728x90, 300x250, 300x600"},
-                },
-            },
-            ("Outlook", "Native"): {
-                "inventory_targeting": "Publisher = Outlook Native (1000230)",
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A", "min_creatives": 2},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A", "min_creatives": 2},
-                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A", "min_creatives": 1},
-                },
-            },
-            ("MCG", "Banner"): {
-                "inventory_targeting": "KV pub = microsoftcasualgames",
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 320x50"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "300x250, 300x600, 728x90"},
-                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
-                },
-            },
-            ("MCG", "Video"): {
-                "inventory_targeting": "KV pub = microsoftcasualgames",
-                "device_config": {
-                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "N/A"},
-                },
-            },
-        },
-    },
-    # ── GDALI IMPRESSIONS ────────────────────────────────────────────────────
-    "GDALI - Impressions": {
-        "seat": "280 - Monetize",
-        "line_item_type": "Guaranteed (GDALI)",
-        "revenue_type": "CPM",
-        "delivery_type": "Impressions",
-        "allow_rtb": True,
-        "underspend_catchup": "Evenly",
-        "impression_pacing": "100%",
-        "creative_rotation": "Evenly",
-        "landing_page": "None",
-        "publishers": ["MSN", "Outlook", "MCG"],
-        "formats": ["Banner", "Native", "Video"],
-        "priority": 5,
-        "frequency_cap": "6 imps/day",
-        "pacing": "Even",
-        "inventory_type": "Banner",
-        "geo_targeting": "Country Targeting",
-        "publisher_targeting": "KV pub = msn (MSN) | KV pub = outlook (Outlook) | KV pub = microsoftcasualgames (MCG)",
-        "supply_targeting": "App & Web",
-        "publisher_format_config": {
-            ("MSN", "Banner"): {
-                "inventory_targeting": "KV pub = msn",
-                "creative_specs": "300x250 OR 300x600 OR 728x90 OR 970x250 OR 320x50",
-                "min_creatives": 1,
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "728x90, 970x250, 300x250, 300x600"},
-                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
-                },
-            },
-            ("MSN", "Video"): {
-                "inventory_targeting": "KV pub = msn",
-                "creative_specs": "15 seconds OR 30 seconds",
-                "min_creatives": 1,
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A"},
-                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A"},
-                },
-            },
-            ("Outlook", "Banner"): {
-                "inventory_targeting": "KV pub = outlook",
-                "creative_specs": "160x600, 728x90, 300x250 OR 300x600",
-                "min_creatives": 3,
-                "device_config": {
-                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "728x90, 300x250, 300x600"},
-                },
-            },
-            ("Outlook", "Native"): {
-                "inventory_targeting": "Publisher = Outlook Native (1000230)",
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A", "min_creatives": 2},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A", "min_creatives": 2},
-                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A", "min_creatives": 1},
-                },
-            },
-            ("MCG", "Banner"): {
-                "inventory_targeting": "KV pub = microsoftcasualgames",
-                "creative_specs": "300x250, 300x600, 728x90, 320x50",
-                "min_creatives": 1,
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 320x50"},
-                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "300x250, 300x600, 728x90"},
-                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
-                },
-            },
-            ("MCG", "Video"): {
-                "inventory_targeting": "KV pub = microsoftcasualgames",
-                "creative_specs": "15 seconds OR 30 seconds",
-                "min_creatives": 1,
-                "device_config": {
-                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "N/A"},
-                },
-            },
-        },
-    },
-    # ── GDALI MSN TAKEOVER ───────────────────────────────────────────────────
-    "GDALI - MSN Takeover": {
-        "seat": "280 - Monetize",
-        "line_item_type": "Guaranteed (GDALI)",
-        "revenue_type": "Fixed Fee (Cost Per Day)",
-        "delivery_type": "Exclusive",
-        "allow_rtb": True,
-        "underspend_catchup": "Evenly",
-        "impression_pacing": "100%",
-        "creative_rotation": "Evenly",
-        "landing_page": "None",
-        "publishers": ["MSN"],
-        "formats": ["Banner"],
-        "priority": 15,
-        "frequency_cap": "Off",
-        "pacing": "Even",
-        "inventory_type": "Banner",
-        "geo_targeting": "Placement Targeting",
-        "publisher_targeting": "Placement Targeting",
-        "supply_targeting": "Web Only",
-        "device_config": {
-            "Desktop": {
-                "supply": "Web Only", "device_targeting": "Desktop, Tablet",
-                "ad_sizes": "728x90, 970x250, 300x250",
-                "creative_specs": "728x90 OR 970x250 | 300x250 | 728x90",
-                "min_creatives": 1, "inventory_targeting": "Placement Targeting",
-            },
-        },
-    },
-    # ── GDALI OUTLOOK TAKEOVER ───────────────────────────────────────────────
-    "GDALI - Outlook Takeover": {
-        "seat": "280 - Monetize",
-        "line_item_type": "Guaranteed (GDALI)",
-        "revenue_type": "Fixed Fee (Cost Per Day)",
-        "delivery_type": "Exclusive",
-        "allow_rtb": True,
-        "underspend_catchup": "Evenly",
-        "impression_pacing": "100%",
-        "creative_rotation": "Evenly",
-        "landing_page": "None",
-        "publishers": ["Outlook"],
-        "formats": ["Banner", "Native"],
-        "priority": 15,
-        "frequency_cap": "Off",
-        "pacing": "Even",
-        "inventory_type": "Native",
-        "geo_targeting": "Country Targeting",
-        "publisher_targeting": "Publisher Targeting",
-        "supply_targeting": "Web Only",
-        "publisher_format_config": {
-            ("Outlook", "Banner"): {
-                "inventory_targeting": "Publisher Targeting (Country Specific)",
-                "creative_specs": "160x600, 728x90, 300x250 OR 300x600",
-                "min_creatives": 3,
-                "device_config": {
-                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "160x600, 728x90, 300x250, 300x600"},
-                },
-            },
-            ("Outlook", "Native"): {
-                "inventory_targeting": "Publisher = Outlook Native (1000230)",
-                "min_creatives": 2,
-                "device_config": {
-                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
-                },
-            },
-        },
-    },
-    # ── HIGH IMPACT PG ───────────────────────────────────────────────────────
-    "High Impact": {
-        "seat": "280 - Monetize",
-        "line_item_type": "PG",
-        "revenue_type": "CPM",
-        "delivery_type": "N/A",
-        "allow_rtb": False,
-        "underspend_catchup": "N/A",
-        "impression_pacing": "100%",
-        "creative_rotation": "N/A",
-        "landing_page": "None",
-        "publishers": ["MSN"],
-        "formats": ["Banner"],
-        "priority": 15,
-        "frequency_cap": "Off",
-        "pacing": "Even",
-        "inventory_type": "Banner",
-        "geo_targeting": "Placement Targeting",
-        "publisher_targeting": "Placement Targeting",
-        "supply_targeting": "App & Web",
-        "device_config": {
-            "Desktop": {
-                "supply": "App & Web", "device_targeting": "Desktop, Tablet",
-                "ad_sizes": "ATF: 970x250, 728x90, 300x250 | BTF: 300x250, 300x600",
-                "creative_specs": "ATF: 970x250 OR 728x90 OR 300x250 | BTF: 300x250 OR 300x600",
-                "min_creatives": 1, "inventory_targeting": "Placement Targeting",
-            },
-        },
-    },
-}
-
-REGION_CURRENCY = {
-    "US": ("USD", "$"),
-    "CA": ("CAD", "$"),
-    "UK": ("GBP", "£"),
-    "DE": ("EUR", "€"),
-    "FR": ("EUR", "€"),
-    "NL": ("EUR", "€"),
-    "ES": ("EUR", "€"),
-    "IT": ("EUR", "€"),
-    "BE": ("EUR", "€"),
-    "AT": ("EUR", "€"),
-    "SE": ("EUR", "€"),
-    "AU": ("AUD", "$"),
-    "NZ": ("AUD", "$"),
-    "SG": ("SGD", "$"),
-    "IN": ("INR", "₹"),
-    "JP": ("JPY", "¥"),
-    "BR": ("BRL", "R$"),
-    "MX": ("MXN", "$"),
-}
 
-# CPM reference ranges by product + format (align with DNV Rate Card)
-CPM_RECOMMENDATIONS = {
-    "PG - First Impression":        {"min": 15,   "default": 20,    "max": 40,    "note": "Premium first-in-page · MSN Banner"},
-    "PG - Standard":                {"min": 8,    "default": 12,    "max": 25,    "note": "Banner/Native · MSN, Outlook, MCG"},
-    "PG - Standard (Video)":        {"min": 25,   "default": 35,    "max": 65,    "note": "Video · MSN, MCG"},
-    "GDALI - Impressions":          {"min": 8,    "default": 12,    "max": 25,    "note": "GDALI Guaranteed · Banner/Native"},
-    "GDALI - Impressions (Video)":  {"min": 25,   "default": 35,    "max": 65,    "note": "GDALI Guaranteed · Video · MSN"},
-    "GDALI - MSN Takeover":         {"min": 5000, "default": 15000, "max": 50000, "note": "Fixed Fee per day (not a CPM product)"},
-    "GDALI - Outlook Takeover":     {"min": 3000, "default": 10000, "max": 30000, "note": "Fixed Fee per day (not a CPM product)"},
-    "High Impact":                  {"min": 20,   "default": 30,    "max": 60,    "note": "High-impact placement · MSN Banner"},
-}
+_options = _option_lists()
 
 # ================================================================================
-# HELPER FUNCTIONS
+# INITIALIZE SESSION STATE
 # ================================================================================
-def get_currency_symbol(market):
-    """Get currency symbol based on market code."""
-    return REGION_CURRENCY.get(market.upper(), ("USD", "$"))[1]
-
-def get_compatible_formats(product, publisher):
-    """Get compatible ad formats for a product + publisher combination, from the matrix."""
-    product_info = PRODUCT_RULES.get(product, {})
-    all_formats = product_info.get("formats", ["Banner"])
-
-    # If product has publisher_format_config, derive available formats for this publisher
-    pfc = product_info.get("publisher_format_config", {})
-    if pfc:
-        pub_formats = [fmt for (pub, fmt) in pfc.keys() if pub == publisher]
-        if pub_formats:
-            return sorted(set(pub_formats), key=["Banner", "Native", "Video"].index
-                          if all(f in ["Banner", "Native", "Video"] for f in pub_formats) else str)
-    return all_formats
-
-
-def get_compatible_devices(product, publisher, ad_format):
-    """Return valid device options constrained by the product × publisher × format device_config."""
-    _order = ["All Devices", "Desktop", "Mobile", "Tablet"]
-    product_info = PRODUCT_RULES.get(product, {})
-    pfc = product_info.get("publisher_format_config", {})
-    key = (publisher, ad_format)
-
-    if key in pfc:
-        dev_cfg = pfc[key].get("device_config", {})
-    else:
-        dev_cfg = product_info.get("device_config", {})
-
-    if dev_cfg:
-        devices = [d for d in _order if d in dev_cfg]
-        return devices if devices else list(dev_cfg.keys())
-    return ["All Devices", "Desktop", "Mobile"]
-
-
-def get_product_config(product, publisher, ad_format, device="All Devices"):
-    """Return a flat targeting dict for the given product / publisher / format / device."""
-    base = dict(PRODUCT_RULES.get(product, {}))
-
-    pfc = base.get("publisher_format_config", {})
-    key = (publisher, ad_format)
-
-    if key in pfc:
-        fmt_cfg = dict(pfc[key])
-        dev_cfg = fmt_cfg.pop("device_config", {})
-        fallback = dev_cfg.get("All Devices", next(iter(dev_cfg.values()), {}) if dev_cfg else {})
-        dev_specific = dict(dev_cfg.get(device, fallback))
-        result = {**base, **fmt_cfg, **dev_specific}
-    else:
-        dev_cfg = base.get("device_config", {})
-        fallback = dev_cfg.get("All Devices", next(iter(dev_cfg.values()), {}) if dev_cfg else {})
-        dev_specific = dict(dev_cfg.get(device, fallback))
-        result = {**base, **dev_specific}
-
-    for k in ("publisher_format_config", "device_config"):
-        result.pop(k, None)
-    return result
-
-def generate_o_o_taxonomy(market, publisher, product, ad_format, device):
-    """Generate O&O Naming Taxonomy — uses Views suffix for video, Imps for display."""
-    device_code = {"All Devices": "AllDevices", "Desktop": "Desktop", "Mobile": "Mobile", "Tablet": "Tablet"}.get(device, "AllDevices")
-    metric = "Views" if ad_format == "Video" else "Imps"
-    li_code = PRODUCT_RULES.get(product, {}).get("line_item_type", "PG").replace("Guaranteed (", "").replace(")", "")
-    return f"{market}_{publisher}_{product}_{ad_format}_{device_code}_{li_code}_{metric}"
-
-def generate_li_name(advertiser, market, publisher, product):
-    """Generate Line Item Name."""
-    return f"{advertiser}_{market}_{publisher}_{product}"
-
-def is_video_product(product_name, ad_format=None):
-    """Return True if the current format is Video."""
-    if ad_format is not None:
-        return ad_format == "Video"
-    return PRODUCT_RULES.get(product_name, {}).get("inventory_type") == "Video"
-
-def get_default_cpm(product_name, ad_format=None):
-    """Return the suggested default CPM for a product, adjusted for video."""
-    if ad_format == "Video":
-        video_key = f"{product_name} (Video)"
-        if video_key in CPM_RECOMMENDATIONS:
-            return float(CPM_RECOMMENDATIONS[video_key]["default"])
-    return float(CPM_RECOMMENDATIONS.get(product_name, {"default": 10.0})["default"])
-
-# ── DEAL-TYPE / FORMAT RESOLUTION ────────────────────────────────────────────
-
-# Spec §4.3 — allowed formats per deal type
-_FORMAT_ALLOWLIST = {
-    "GDALI - Impressions":      ["Banner", "Video", "Native"],
-    "GDALI - MSN Takeover":     ["Banner"],
-    "GDALI - Outlook Takeover": ["Banner", "Native"],
-    "PG - Standard":            ["Banner", "Video", "Native"],
-    "PG - First Impression":    ["Banner"],
-    "High Impact":              ["Banner"],
-}
-
-def is_cpd_product(product: str) -> bool:
-    """True for Fixed Fee (Cost Per Day) products — Takeovers."""
-    return PRODUCT_RULES.get(product, {}).get("revenue_type", "") == "Fixed Fee (Cost Per Day)"
-
-def resolve_inventory_type(ad_format: str) -> str:
-    """Spec §4.1: Video/Native must be App & Web; Banner is Web Only."""
-    return "App & Web" if ad_format in ("Video", "Native") else "Web Only"
-
-def resolve_inventory_targeting_mode(publisher: str, ad_format: str) -> str:
-    """Spec §4.2: KV targeting for MSN/MCG; Publisher ID for Outlook Native."""
-    if publisher == "Outlook" and ad_format == "Native":
-        return "Publisher ID — Outlook Native (1000230)"
-    mapping = {
-        "MSN":     "Key/Value — pub = msn",
-        "Outlook": "Key/Value — pub = outlook",
-        "MCG":     "Key/Value — pub = microsoftcasualgames",
-    }
-    return mapping.get(publisher, f"Key/Value — pub = {publisher.lower()}")
-
-def validate_deal_format(product: str, ad_format: str) -> tuple[bool, str]:
-    """Spec §4.3: Return (valid, reason). One format per line item; format must be allowed."""
-    allowed = _FORMAT_ALLOWLIST.get(product, ["Banner", "Video", "Native"])
-    if ad_format not in allowed:
-        return False, f"{ad_format} is not allowed for {product} (allowed: {', '.join(allowed)})"
-    return True, ""
-
-# Spec §4.4 — canonical banner sizes per publisher × device
-_BANNER_SIZES = {
-    ("MSN",     "All Devices"): ["300x250", "300x600", "728x90", "970x250", "320x50"],
-    ("MSN",     "Desktop"):     ["970x250", "728x90", "300x250", "300x600"],
-    ("MSN",     "Mobile"):      ["320x50"],
-    ("Outlook", "Desktop"):     ["160x600", "728x90", "300x250", "300x600"],
-    ("MCG",     "All Devices"): ["300x250", "300x600", "728x90", "320x50"],
-    ("MCG",     "Desktop"):     ["300x250", "300x600", "728x90"],
-    ("MCG",     "Mobile"):      ["320x50"],
-}
-
-def get_allowed_banner_sizes(publisher: str, device: str) -> list:
-    """Spec §4.4: Canonical sizes for publisher × device. Returns list of size strings."""
-    return _BANNER_SIZES.get((publisher, device), _BANNER_SIZES.get((publisher, "All Devices"), []))
-
-def get_freq_cap_numeric(product: str) -> int:
-    """Extract numeric frequency cap from product rules. Returns 0 if uncapped/CPD."""
-    cap_text = PRODUCT_RULES.get(product, {}).get("frequency_cap", "")
-    if cap_text in ("Off", "N/A", "") or is_cpd_product(product):
-        return 0
-    if "1 imp" in cap_text:
-        return 1
-    if "6 imp" in cap_text:
-        return 6
-    return 6  # safe default
-
-
-# ── FORECASTING FORMULAS (Spec §6) ───────────────────────────────────────────
-
-def calc_avg_daily_uniques(total_impressions: float, flight_days: int,
-                           freq_cap_num: int) -> float:
-    """
-    Spec §6.3: Avg Uniques (Daily) at product level.
-    Estimate = daily_impressions / freq_cap  (users × exposures/user = impressions).
-    When freq_cap is 0 (uncapped/CPD) returns 0 (not applicable).
-    """
-    if flight_days <= 0 or freq_cap_num <= 0:
-        return 0.0
-    daily_imps = total_impressions / flight_days
-    return daily_imps / freq_cap_num
-
-def calc_avg_frequency_daily(total_impressions: float, avg_daily_uniques: float,
-                             flight_days: int) -> float:
-    """
-    Spec §6.1: Avg Frequency (Daily) = daily_impressions / daily_uniques.
-    Returns 0 when not applicable (CPD / uncapped / no uniques).
-    """
-    if flight_days <= 0 or avg_daily_uniques <= 0:
-        return 0.0
-    return (total_impressions / flight_days) / avg_daily_uniques
-
-def calc_lifetime_uniques(avg_daily_uniques: float, turnover_per_day: float,
-                          days_lifetime: int) -> float:
-    """
-    Spec §6.4: Lifetime Uniques = avg_daily_uniques × (1 + turnover × (days - 1)).
-    Not applicable for CPD products (caller must guard).
-    """
-    if avg_daily_uniques <= 0 or days_lifetime <= 0:
-        return 0.0
-    return avg_daily_uniques * (1 + turnover_per_day * (days_lifetime - 1))
-
-
-def calculate_delivery_pressure(flights_list, product_name, frequency_cap_text=""):
-    """
-    Calculate delivery success pressure: Low / Medium / High.
-    
-    Logic:
-    - LOW: Duration ≥ 30 days AND Daily Volume ≤ Freq Cap
-    - MEDIUM: Duration 14-29 days OR Daily Volume manageable
-    - HIGH: Duration < 14 days AND High daily volume, or very constrained
-    """
-    if not flights_list:
-        return "Low", "No flights configured."
-    
-    total_volume = sum(f.get("volume", 0) for f in flights_list)
-    # Get flight duration from first flight (assume all same product)
-    first_flight = flights_list[0]
-    start = first_flight.get("start_date")
-    end = first_flight.get("end_date")
-    
-    if isinstance(start, str):
-        from datetime import datetime
-        start = datetime.strptime(start, "%Y-%m-%d").date()
-    if isinstance(end, str):
-        from datetime import datetime
-        end = datetime.strptime(end, "%Y-%m-%d").date()
-    
-    flight_days = max(1, (end - start).days + 1)
-    daily_volume = total_volume / flight_days if flight_days > 0 else total_volume
-    
-    # Frequency cap extraction (rough: "6 impressions per user per day" -> 6)
-    freq_cap = 6  # default
-    if "1 impression" in frequency_cap_text.lower():
-        freq_cap = 1
-    elif "2 impression" in frequency_cap_text.lower():
-        freq_cap = 2
-    
-    # Pressure index
-    pressure_ratio = (daily_volume / freq_cap) if freq_cap > 0 else 0
-    
-    if flight_days >= 30 and pressure_ratio <= 1.0:
-        return "Low", f"Flight duration {flight_days} days. Daily volume manageable. Low activation risk."
-    elif flight_days >= 14 and pressure_ratio <= 1.5:
-        return "Medium", f"Flight duration {flight_days} days. Moderate delivery pressure. Confirm frequency caps and date windows."
-    else:
-        return "High", f"Flight duration {flight_days} days. High daily volume vs. frequency cap. Escalate to ops team."
-
-def create_internal_excel_export(flights_list, campaign_info, delivery_pressure_label,
-                                 product_config, unified_checklist):
-    """Create internal-facing Excel with targeting setup and QC checklist,
-    fully aligned with the on-screen Risk & Quality Control section."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Internal Setup"
-
-    section_font = Font(bold=True, size=11, color="0078D4")
-    header_fill  = PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid")
-    header_font  = Font(bold=True)
-
-    # ── Title ────────────────────────────────────────────────────────────────
-    ws.merge_cells("A1:B1")
-    title = ws["A1"]
-    title.value = "Media Plan - Internal Setup & QC"
-    title.font = Font(bold=True, size=14, color="0078D4")
-
-    # ── Campaign details ─────────────────────────────────────────────────────
-    row = 3
-    for label, key in [("Campaign Name:", "campaign"), ("Advertiser:", "advertiser"),
-                        ("Market:", "market"), ("Publisher:", "publisher"),
-                        ("Product:", "product")]:
-        ws[f"A{row}"] = label
-        ws[f"A{row}"].font = Font(bold=True)
-        ws[f"B{row}"] = campaign_info.get(key, "")
-        row += 1
-
-    # ── INTERNAL SETUP & TARGETING (product-specific) ────────────────────────
-    row += 1
-    ws[f"A{row}"] = "INTERNAL SETUP & TARGETING"
-    ws[f"A{row}"].font = section_font
-    row += 2
-
-    for col, header in enumerate(["Field", "Value"], 1):
-        cell = ws.cell(row=row, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-    row += 1
-
-    setup_fields = [
-        ("Seat ID",              product_config.get("seat", "280 - Monetize")),
-        ("Line Item Type",       product_config.get("line_item_type", "N/A")),
-        ("Revenue Type",         product_config.get("revenue_type", "CPM")),
-        ("Priority",             product_config.get("priority", "N/A")),
-        ("Frequency Cap",        product_config.get("frequency_cap", "N/A")),
-        ("Pacing",               product_config.get("pacing", "N/A")),
-        ("Inventory Type",       product_config.get("inventory_type",
-                                    resolve_inventory_type(campaign_info.get("format", "Banner")))),
-        ("Inventory Targeting",  product_config.get("inventory_targeting",
-                                    product_config.get("publisher_targeting", "N/A"))),
-        ("Supply",               product_config.get("supply",
-                                    product_config.get("supply_targeting", "N/A"))),
-        ("Ad Sizes",             product_config.get("ad_sizes", "N/A")),
-        ("Device Targeting",     product_config.get("device_targeting", "N/A")),
-        ("Creative Specs",       product_config.get("creative_specs", "N/A")),
-        ("Allow RTB",            str(product_config.get("allow_rtb", "N/A"))),
-        ("Underspend Catchup",   product_config.get("underspend_catchup", "N/A")),
-        ("Geo Targeting",        product_config.get("geo_targeting", "Country Targeting")),
-    ]
-
-    for field_name, field_value in setup_fields:
-        ws.cell(row=row, column=1).value = field_name
-        ws.cell(row=row, column=2).value = str(field_value)
-        row += 1
-
-    # ── QC CHECKLIST (mirrors unified_checklist from the UI) ─────────────────
-    row += 2
-    ws[f"A{row}"] = "QC CHECKLIST"
-    ws[f"A{row}"].font = section_font
-    row += 2
-
-    for col, header in enumerate(["Checklist Item", "Status / Value"], 1):
-        cell = ws.cell(row=row, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-    row += 1
-
-    for item_name, item_value in unified_checklist:
-        ws.cell(row=row, column=1).value = str(item_name)
-        ws.cell(row=row, column=2).value = str(item_value)
-        row += 1
-
-    # ── Column widths ────────────────────────────────────────────────────────
-    ws.column_dimensions['A'].width = 30
-    ws.column_dimensions['B'].width = 45
-
-    return wb
+if not isinstance(st.session_state.get("flights"), FlightStore):
+    st.session_state.flights = FlightStore(st.session_state.get("flights", []))
+if "campaign_details" not in st.session_state:
+    st.session_state.campaign_details = {}
 
-def create_excel_export(flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate, currency_sym, vcr_target=None, completed_views=None):
-    """Create IO Excel file with Microsoft-style formatting and forecasting table."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Media Plan"
-    
-    # Colors
-    header_fill = PatternFill(start_color="0078D4", end_color="0078D4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    subheader_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    subheader_font = Font(bold=True, size=10, color="0078D4")
-    border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                   top=Side(style='thin'), bottom=Side(style='thin'))
-    
-    # Title
-    ws.merge_cells("A1:F1")
-    title = ws["A1"]
-    title.value = "MEDIA PLAN - MONETIZE GUARANTEED"
-    title.font = Font(bold=True, size=14, color="FFFFFF")
-    title.fill = PatternFill(start_color="0078D4", end_color="0078D4", fill_type="solid")
-    title.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 25
-    
-    # Campaign Details Header
-    row = 3
-    ws[f"A{row}"] = "Advertiser:"
-    ws[f"A{row}"].font = Font(bold=True, size=11)
-    ws[f"B{row}"] = campaign_info.get("advertiser", "")
-    ws[f"B{row}"].font = Font(size=11)
-    
-    ws[f"D{row}"] = "Market:"
-    ws[f"D{row}"].font = Font(bold=True, size=11)
-    ws[f"E{row}"] = campaign_info.get("market", "")
-    ws[f"E{row}"].font = Font(size=11)
-    
-    row = 4
-    ws[f"A{row}"] = "Campaign:"
-    ws[f"A{row}"].font = Font(bold=True, size=11)
-    ws[f"B{row}"] = campaign_info.get("campaign", "")
-    ws[f"B{row}"].font = Font(size=11)
-    
-    ws[f"D{row}"] = "Publisher:"
-    ws[f"D{row}"].font = Font(bold=True, size=11)
-    ws[f"E{row}"] = campaign_info.get("publisher", "")
-    ws[f"E{row}"].font = Font(size=11)
-    
-    row = 5
-    ws[f"A{row}"] = "Order Type:"
-    ws[f"A{row}"].font = Font(bold=True, size=11)
-    ws[f"B{row}"] = "Insertion Order"
-    ws[f"B{row}"].font = Font(size=11)
-    
-    ws[f"D{row}"] = "Request Date:"
-    ws[f"D{row}"].font = Font(bold=True, size=11)
-    ws[f"E{row}"] = datetime.now().strftime("%m/%d/%Y")
-    ws[f"E{row}"].font = Font(size=11)
-    
-    # Campaign Overview
-    row = 7
-    ws[f"A{row}"] = "CAMPAIGN OVERVIEW"
-    ws[f"A{row}"].font = Font(bold=True, size=11, color="0078D4")
-
-    row = 8
-    overview_headers = ["#", "Product", "Publisher", "Format", "Start Date", "End Date", "Budget"]
-    for col, header in enumerate(overview_headers, 1):
-        cell = ws.cell(row=row, column=col)
-        cell.value = header
-        cell.fill = subheader_fill
-        cell.font = subheader_font
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    total_budget = 0
-    for row_idx, flight in enumerate(flights_list, 9):
-        flight_budget = flight.get('budget', 0)
-        total_budget += flight_budget
-
-        ws.cell(row=row_idx, column=1).value = flight.get("flight_num", 1)
-        ws.cell(row=row_idx, column=2).value = flight.get("product", "")
-        ws.cell(row=row_idx, column=3).value = flight.get("publisher", "")
-        ws.cell(row=row_idx, column=4).value = flight.get("format", "")
-
-        start_date = flight.get("start_date")
-        ws.cell(row=row_idx, column=5).value = start_date.strftime("%m/%d/%Y") if hasattr(start_date, "strftime") else str(start_date)
-        end_date = flight.get("end_date")
-        ws.cell(row=row_idx, column=6).value = end_date.strftime("%m/%d/%Y") if hasattr(end_date, "strftime") else str(end_date)
-        ws.cell(row=row_idx, column=7).value = f"{flight_budget:,.2f}"
-    
-    # Per-product Forecasting Table
-    forecast_row = len(flights_list) + 11
-    ws[f"A{forecast_row}"] = "FORECASTING BY PRODUCT"
-    ws[f"A{forecast_row}"].font = Font(bold=True, size=11, color="0078D4")
-
-    forecast_row += 1
-    f_headers = ["Product", "Publisher", "Format", "CPM", "Budget", "Total Imps", "Est. Daily Avg"]
-    for col, header in enumerate(f_headers, 1):
-        cell = ws.cell(row=forecast_row, column=col)
-        cell.value = header
-        cell.fill = subheader_fill
-        cell.font = subheader_font
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    forecast_row += 1
-    # Group flights by product/publisher/format
-    fgroups = {}
-    for fl in flights_list:
-        fkey = (fl.get("product", ""), fl.get("publisher", ""), fl.get("format", ""))
-        if fkey not in fgroups:
-            fgroups[fkey] = {"budget": 0, "imps": 0, "cpm": fl.get("cpm", cpm_rate), "days": 0}
-        fgroups[fkey]["budget"] += fl.get("budget", 0)
-        fgroups[fkey]["imps"] += fl.get("volume", 0)
-        sd, ed = fl.get("start_date"), fl.get("end_date")
-        if hasattr(sd, "__sub__") and hasattr(ed, "__sub__"):
-            fgroups[fkey]["days"] += (ed - sd).days + 1
-
-    grand_budget = grand_imps = 0
-    for (fprod, fpub, ffmt), fd in fgroups.items():
-        _is_cpd_fl = is_cpd_product(fprod)
-        if _is_cpd_fl:
-            row_data = [fprod, fpub, ffmt,
-                        f"Fixed Fee (CPD)",
-                        f"{fd['budget']:,.2f} {currency_sym}",
-                        f"{fd['days']} day(s)",
-                        f"{fd['budget']/max(1,fd['days']):,.2f} {currency_sym}/day"]
-        else:
-            daily = fd["imps"] / max(1, fd["days"])
-            row_data = [fprod, fpub, ffmt,
-                        f"{fd['cpm']:,.2f} {currency_sym}",
-                        f"{fd['budget']:,.2f} {currency_sym}",
-                        f"{fd['imps']:,.0f}",
-                        f"{daily:,.0f}"]
-        for col, val in enumerate(row_data, 1):
-            ws.cell(row=forecast_row, column=col).value = val
-        grand_budget += fd["budget"]
-        grand_imps += fd["imps"]
-        forecast_row += 1
-
-    if len(fgroups) > 1:
-        total_row = ["TOTAL", "", "", "—", f"{grand_budget:,.2f} {currency_sym}", f"{grand_imps:,.0f}", "—"]
-        for col, val in enumerate(total_row, 1):
-            c = ws.cell(row=forecast_row, column=col)
-            c.value = val
-            c.font = Font(bold=True)
-        forecast_row += 1
-
-    # Video metrics
-    if vcr_target is not None:
-        ws.cell(row=forecast_row, column=1).value = "Target VCR (%)"
-        ws.cell(row=forecast_row, column=1).font = Font(bold=True)
-        ws.cell(row=forecast_row, column=2).value = f"{vcr_target}%"
-        forecast_row += 1
-        ws.cell(row=forecast_row, column=1).value = "Est. Completed Views"
-        ws.cell(row=forecast_row, column=1).font = Font(bold=True)
-        ws.cell(row=forecast_row, column=2).value = f"{completed_views:,.0f}" if completed_views else "—"
-        forecast_row += 1
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 22
-    ws.column_dimensions['B'].width = 18
-    ws.column_dimensions['C'].width = 14
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 14
-    ws.column_dimensions['F'].width = 14
-    ws.column_dimensions['G'].width = 16
-    
-    return wb
-
-def create_pdf_export(flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate, currency_sym, vcr_target=None, completed_views=None):
-    """Create IO PDF file with same information as Excel."""
-    pdf_buffer = BytesIO()
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#0078D4'),
-        spaceAfter=20,
-        alignment=1  # center
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#0078D4'),
-        spaceAfter=10,
-        spaceBefore=10
-    )
-    
-    # Title
-    elements.append(Paragraph("MEDIA PLAN - MONETIZE GUARANTEED", title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Campaign Details
-    campaign_data = [
-        ["Advertiser:", campaign_info.get("advertiser", ""), "Market:", campaign_info.get("market", "")],
-        ["Campaign:", campaign_info.get("campaign", ""), "Publisher:", campaign_info.get("publisher", "")],
-        ["Order Type:", "Insertion Order", "Request Date:", datetime.now().strftime("%m/%d/%Y")],
-    ]
-    
-    campaign_table = Table(campaign_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
-    campaign_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#D9E1F2')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#D9E1F2')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
-    elements.append(campaign_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Campaign Overview
-    elements.append(Paragraph("CAMPAIGN OVERVIEW", heading_style))
-
-    overview_data = [["#", "Product", "Publisher", "Format", "Start Date", "End Date", "Budget"]]
-    total_budget = 0
-
-    for flight in flights_list:
-        flight_budget = flight.get('budget', 0)
-        total_budget += flight_budget
-        start_date = flight.get("start_date")
-        start_str = start_date.strftime("%m/%d/%Y") if hasattr(start_date, "strftime") else str(start_date)
-        end_date = flight.get("end_date")
-        end_str = end_date.strftime("%m/%d/%Y") if hasattr(end_date, "strftime") else str(end_date)
-        overview_data.append([
-            str(flight.get("flight_num", 1)),
-            flight.get("product", ""),
-            flight.get("publisher", ""),
-            flight.get("format", ""),
-            start_str, end_str,
-            f"{flight_budget:,.2f}"
-        ])
-
-    overview_data.append(["", "", "", "", "", "TOTAL:", f"{total_budget:,.2f} {currency_sym}"])
-
-    overview_table = Table(overview_data, colWidths=[0.4*inch, 1.2*inch, 0.8*inch, 0.7*inch, 1.1*inch, 1.1*inch, 1.0*inch])
-    overview_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0078D4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D9E1F2')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-
-    elements.append(overview_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Per-product Forecasting
-    elements.append(Paragraph("FORECASTING BY PRODUCT", heading_style))
-
-    fgroups = {}
-    for fl in flights_list:
-        fkey = (fl.get("product", ""), fl.get("publisher", ""), fl.get("format", ""))
-        if fkey not in fgroups:
-            fgroups[fkey] = {"budget": 0, "imps": 0, "cpm": fl.get("cpm", cpm_rate), "days": 0}
-        fgroups[fkey]["budget"] += fl.get("budget", 0)
-        fgroups[fkey]["imps"] += fl.get("volume", 0)
-        sd, ed = fl.get("start_date"), fl.get("end_date")
-        if hasattr(sd, "__sub__") and hasattr(ed, "__sub__"):
-            fgroups[fkey]["days"] += (ed - sd).days + 1
-
-    forecast_data = [["Product", "Publisher", "Format", "CPM", "Budget", "Total Imps", "Daily Avg"]]
-    grand_budget = grand_imps = 0
-    for (fprod, fpub, ffmt), fd in fgroups.items():
-        _is_cpd_fl = is_cpd_product(fprod)
-        if _is_cpd_fl:
-            forecast_data.append([fprod, fpub, ffmt,
-                                   "Fixed Fee (CPD)",
-                                   f"{fd['budget']:,.2f} {currency_sym}",
-                                   f"{fd['days']} day(s)",
-                                   f"{fd['budget']/max(1,fd['days']):,.2f} {currency_sym}/day"])
-        else:
-            daily = fd["imps"] / max(1, fd["days"])
-            forecast_data.append([fprod, fpub, ffmt,
-                                   f"{fd['cpm']:,.2f} {currency_sym}",
-                                   f"{fd['budget']:,.2f} {currency_sym}",
-                                   f"{fd['imps']:,.0f}",
-                                   f"{daily:,.0f}"])
-        grand_budget += fd["budget"]
-        grand_imps += fd["imps"]
-
-    if len(fgroups) > 1:
-        forecast_data.append(["TOTAL", "", "", "—",
-                               f"{grand_budget:,.2f} {currency_sym}",
-                               "—", "—"])
-
-    if vcr_target is not None:
-        forecast_data.append(["Target VCR (%)", f"{vcr_target}%", "", "", "", "", ""])
-        forecast_data.append(["Est. Completed Views", f"{completed_views:,.0f}" if completed_views else "—", "", "", "", "", ""])
-    
-    forecast_table = Table(forecast_data, colWidths=[1.3*inch, 0.9*inch, 0.7*inch, 0.9*inch, 1.1*inch, 0.9*inch, 0.9*inch])
-    forecast_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0078D4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D9E1F2')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-
-    elements.append(forecast_table)
-    
-    doc.build(elements)
-    pdf_buffer.seek(0)
-    return pdf_buffer
+# A plan picked under "Saved Plans" is applied here, before the inputs are built
+_loaded_plan = st.session_state.pop("load_plan", None)
+if _loaded_plan is not None:
+    st.session_state.flights = _loaded_plan["flights"]
+    st.session_state.campaign_details = dict(_loaded_plan["campaign_info"])
+    for _key in ("market", "advertiser", "campaign", "publisher", "product", "format", "device",
+                 "start_date", "end_date"):
+        if _key in _loaded_plan["campaign_info"]:
+            st.session_state[_key] = _loaded_plan["campaign_info"][_key]
 
 # ================================================================================
 # 2. CAMPAIGN DETAILS (INPUTS)
 # ================================================================================
+_timer.mark("Campaign Details")
 st.markdown("## Campaign Details")
 st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
 
@@ -1108,7 +239,7 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     market = st.selectbox(
         "Market",
-        list(REGION_CURRENCY.keys()),
+        _options["markets"],
         key="market",
         help="Country/Region for campaign"
     )
@@ -1135,7 +266,7 @@ with col3:
 with col4:
     publisher = st.selectbox(
         "Publisher",
-        ["MSN", "Outlook", "MCG"],
+        _options["publishers"],
         key="publisher",
         help="Target publisher (MSN, Outlook, MCG = Microsoft Casual Games)"
     )
@@ -1144,7 +275,7 @@ with col4:
 col5, col6, col7, col8 = st.columns(4)
 
 with col5:
-    _tmp_product = st.session_state.get("product", list(PRODUCT_RULES.keys())[0])
+    _tmp_product = st.session_state.get("product", _options["products"][0])
     _tmp_publisher = st.session_state.get("publisher", "MSN")
     _tmp_format = st.session_state.get("format", "Banner")
     _compatible_devices = get_compatible_devices(_tmp_product, _tmp_publisher, _tmp_format)
@@ -1159,7 +290,7 @@ with col5:
 with col6:
     product = st.selectbox(
         "Product",
-        list(PRODUCT_RULES.keys()),
+        _options["products"],
         key="product",
         help="Monetize Guaranteed product"
     )
@@ -1207,9 +338,41 @@ with col10:
     )
     st.session_state.campaign_details["end_date"] = end_date
 
+
+# ── Exclusive takeover conflicts (live as dates change) ──────────────────────
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _booked_takeovers(path, mtime):
+    """Takeover index of a booked-deals CSV, rebuilt when the file changes (``mtime``).
+
+    One index per server, shared by every session: ``from_deals`` builds every
+    interval tree up front, so conflict queries only read it.
+    """
+    return TakeoverIndex.from_deals(read_deals(path))
+
+
+if is_cpd_product(product):
+    _booked_path = os.environ.get("MEDIAPLANNER_BOOKED_DEALS", "")
+    _takeover_conflicts = []
+    if _booked_path and os.path.exists(_booked_path):
+        _takeover_conflicts += _booked_takeovers(_booked_path, os.path.getmtime(_booked_path)).conflicts(
+            publisher, market, start_date, end_date)
+    # Takeover flights already in this plan, each booked on its own market
+    _takeover_conflicts += TakeoverIndex.from_flights(st.session_state.flights, market).conflicts(
+        publisher, market, start_date, end_date)
+
+    if _takeover_conflicts:
+        st.error(
+            f"❌ **Takeover conflict:** {publisher} {market} is already taken over on overlapping dates — "
+            + "; ".join(f"{c['deal_id']} ({c['start']:%m/%d/%Y} → {c['end']:%m/%d/%Y}, "
+                        f"{c['overlap_days']} day(s) overlap)" for c in _takeover_conflicts)
+        )
+    else:
+        st.caption(f"✅ No exclusive takeover booked on {publisher} {market} for these dates.")
+
 # ================================================================================
 # 3. O&O NAMING TAXONOMY
 # ================================================================================
+_timer.mark("O&O Taxonomy")
 st.markdown("## O&O Naming Taxonomy")
 st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
 
@@ -1229,6 +392,7 @@ with col_tax2:
 # ================================================================================
 # 4. PRICING
 # ================================================================================
+_timer.mark("Pricing")
 st.markdown("## Pricing")
 st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
 
@@ -1339,6 +503,54 @@ _flight_days_est = max(1, (end_date - start_date).days + 1)
 _avg_daily_uniques_est = calc_avg_daily_uniques(impressions, _flight_days_est, _freq_cap_num)
 _avg_freq_est          = calc_avg_frequency_daily(impressions, _avg_daily_uniques_est, _flight_days_est)
 
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _cached_reach(impressions, flight_days, freq_cap, publisher, device, turnover, sample_size, seed):
+    """Monte Carlo reach memoized on its inputs (fixed seed → stable across reruns)."""
+    return simulate_reach(impressions, flight_days, freq_cap, publisher, device, turnover,
+                          sample_size=sample_size, seed=seed)
+
+
+def _rerun_fragment():
+    """Rerun only the calling fragment (the whole page while it runs as part of a full rerun)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+@st.fragment
+@_timed_fragment
+def _monte_carlo_panel(impressions, flight_days, freq_cap, publisher, device, turnover):
+    """Monte Carlo expander; its sample-size and seed widgets rerun only this fragment."""
+    with st.expander("🎲 Monte Carlo reach & frequency (synthetic audience)"):
+        _mc_col1, _mc_col2 = st.columns(2)
+        with _mc_col1:
+            _mc_sample = st.select_slider("Simulated users", options=[10_000, 50_000, 100_000, 250_000],
+                                          value=100_000, key="mc_sample_size")
+        with _mc_col2:
+            _mc_seed = st.number_input("Seed", min_value=0, value=7, step=1, key="mc_seed")
+        _mc = _cached_reach(impressions, flight_days, freq_cap, publisher, device,
+                            turnover, _mc_sample, int(_mc_seed))
+        _mc_band = f"{_mc['band']:.0%} band"
+        _mc_m1, _mc_m2, _mc_m3 = st.columns(3)
+        with _mc_m1:
+            st.metric("Simulated Lifetime Reach", f"{_mc['reach'][0]:,.0f}",
+                      help=f"{_mc_band}: {_mc['reach'][1]:,.0f} – {_mc['reach'][2]:,.0f}")
+        with _mc_m2:
+            st.metric("Simulated Avg Frequency", f"{_mc['avg_frequency'][0]:.2f}",
+                      help=f"{_mc_band}: {_mc['avg_frequency'][1]:.2f} – {_mc['avg_frequency'][2]:.2f}")
+        with _mc_m3:
+            st.metric("Reach % of Audience Pool", f"{_mc['reach_pct'][0]:.1%}",
+                      help=f"Pool ≈ {_mc['pool_size']:,.0f} users on {publisher} {device}")
+        st.bar_chart(pd.DataFrame({"Share of reached users": _mc["frequency_share"]},
+                                  index=pd.Index(_mc["frequency_buckets"], name="Exposures")))
+        st.caption(f"{_mc['reach'][1]:,.0f} – {_mc['reach'][2]:,.0f} reach ({_mc_band} over "
+                   f"{_mc['runs']} replicate batches of the {_mc['sample_size']:,} simulated users)."
+                   + (" ⚠️ Daily volume exceeds the capped audience — the line saturates."
+                      if _mc["saturated"] else ""))
+
+
 # Turnover rate slider — only when forecasting is applicable
 _turnover_rate = 0.0
 _lifetime_uniques_est = 0.0
@@ -1364,6 +576,11 @@ if not _is_cpd and _freq_cap_num > 0:
         )
         st.metric("Est. Lifetime Uniques", f"{_lifetime_uniques_est:,.0f}",
                   help="avg_daily_uniques × (1 + turnover × (days − 1))")
+    _curve_reach_est = curve_reach(product, publisher, device, impressions, _flight_days_est, _turnover_rate)
+    st.caption(f"📈 Reach curve: **{_curve_reach_est:,.0f}** unique users over {_flight_days_est} days "
+               f"(saturating, from the precomputed {publisher} {device} curves)")
+
+    _monte_carlo_panel(impressions, _flight_days_est, _freq_cap_num, publisher, device, _turnover_rate)
 elif _is_cpd:
     # ── CPD summary panel ──────────────────────────────────────────────────
     st.markdown("**📅 CPD Delivery Forecast** _(Fixed Fee — time-based delivery)_")
@@ -1376,9 +593,86 @@ elif _is_cpd:
         st.metric("Total Fee", f"{currency_sym}{_cpd_rate * _flight_days_est:,.2f}")
     st.caption("📌 Impression frequency metrics are **not applicable** for CPD products — SOV delivery is exclusive and time-gated.")
 
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _cached_sweep(product, publisher, device, budget, cpm, flight_days, cpm_range):
+    """Whole scenario grid for the line, memoized on its inputs.
+
+    A shared resource: the grid (several MB) is read, never modified, so
+    reruns and sessions use the one copy instead of unpickling their own.
+    """
+    return product_scenarios(product, publisher, device, *sweep_axes(budget, cpm, flight_days, cpm_range).values())
+
+
+@st.cache_data(max_entries=2, show_spinner="Writing scenario CSV...")
+def _cached_sweep_csv(product, publisher, device, budget, cpm, flight_days, cpm_range):
+    sweep = _cached_sweep(product, publisher, device, budget, cpm, flight_days, cpm_range)
+    return scenario_frame(sweep).to_csv(index=False, float_format="%.6g").encode()
+
+
+# ── SCENARIO SWEEP (budget × CPM × flight days × turnover in one pass) ───────
+@st.fragment
+@_timed_fragment
+def _scenario_sweep_panel(product, publisher, device, budget, cpm_rate, flight_days, turnover,
+                          cpm_range, currency_sym):
+    """Scenario sweep expander; axis, metric and CSV widgets rerun only this fragment."""
+    with st.expander("🗺️ Scenario sweep — budget × CPM × flight days × turnover"):
+        _sweep = _cached_sweep(product, publisher, device, budget, cpm_rate, flight_days,
+                               cpm_range)
+        _axis_labels = {"budget": f"Budget ({currency_sym})", "cpm": f"CPM ({currency_sym})",
+                        "flight_days": "Flight Days", "turnover": "Daily Turnover"}
+        _sw_col1, _sw_col2, _sw_col3 = st.columns(3)
+        with _sw_col1:
+            _sweep_metric = st.selectbox("Metric", list(SWEEP_METRICS), format_func=SWEEP_METRICS.get,
+                                         index=list(SWEEP_METRICS).index("curve_reach"), key="sweep_metric")
+        with _sw_col2:
+            _sweep_rows = st.selectbox("Rows", list(_axis_labels), format_func=_axis_labels.get,
+                                       index=2, key="sweep_rows")
+        with _sw_col3:
+            _sweep_cols = st.selectbox("Columns", [a for a in _axis_labels if a != _sweep_rows],
+                                       format_func=_axis_labels.get, key="sweep_cols")
+        # The two remaining axes are held at the current inputs (nearest grid point)
+        _sweep_fixed = {"budget": budget, "cpm": cpm_rate, "flight_days": flight_days,
+                        "turnover": turnover or 0.30}
+        _heat = heatmap_frame(_sweep, _sweep_metric, _sweep_rows, _sweep_cols, _sweep_fixed)
+        _heat_long = _heat.stack().rename("value").reset_index()
+        st.vega_lite_chart(_heat_long, {
+            "mark": "rect",
+            "encoding": {
+                "x": {"field": _sweep_cols, "type": "ordinal", "title": _axis_labels[_sweep_cols],
+                      "axis": {"format": ",.2~f"}},
+                "y": {"field": _sweep_rows, "type": "ordinal", "title": _axis_labels[_sweep_rows],
+                      "sort": "descending", "axis": {"format": ",.2~f"}},
+                "color": {"field": "value", "type": "quantitative", "title": SWEEP_METRICS[_sweep_metric]},
+                "tooltip": [{"field": _sweep_rows, "format": ",.2f"}, {"field": _sweep_cols, "format": ",.2f"},
+                            {"field": "value", "format": ",.2f", "title": SWEEP_METRICS[_sweep_metric]}],
+            },
+        }, use_container_width=True)
+        _held = [a for a in _axis_labels if a not in (_sweep_rows, _sweep_cols)]
+        st.caption(f"{_sweep['curve_reach'].size:,} scenarios evaluated in one pass · "
+                   + " · ".join(f"{_axis_labels[a]} held at "
+                                + (f"{_sweep_fixed[a]:.0%}" if a == "turnover" else f"{_sweep_fixed[a]:,.2f}"
+                                   if a != "flight_days" else f"{_sweep_fixed[a]}") for a in _held))
+        # The full grid CSV is only written on request (it runs to tens of MB)
+        _sweep_key = (product, publisher, device, budget, cpm_rate, flight_days)
+        if st.session_state.get("sweep_csv_key") != _sweep_key:
+            if st.button("⚙️ Prepare scenario CSV", key="sweep_prepare"):
+                st.session_state.sweep_csv_key = _sweep_key
+                _rerun_fragment()
+        else:
+            st.download_button("⬇️ Download all scenarios (CSV)",
+                               data=_cached_sweep_csv(*_sweep_key, cpm_range),
+                               file_name="scenario_sweep.csv", mime="text/csv", key="sweep_download")
+
+
+if not _is_cpd:
+    _scenario_sweep_panel(product, publisher, device, budget, cpm_rate, _flight_days_est, _turnover_rate,
+                          (float(_cpm_rec["min"]), float(_cpm_rec["max"])), currency_sym)
+
 # ================================================================================
 # 5. TARGETING RULES (LOCKED BY PRODUCT)
 # ================================================================================
+_timer.mark("Targeting Rules")
 st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
 st.markdown("## Targeting Rules")
 
@@ -1421,6 +715,7 @@ for key, value in rules_data.items():
 # ================================================================================
 # 6. MONETIZE SETUP (COMPACT CHECKLIST)
 # ================================================================================
+_timer.mark("Monetize Setup")
 st.markdown('<div style="margin-bottom: 1rem;"></div>', unsafe_allow_html=True)
 st.markdown("## Monetize Setup")
 
@@ -1432,357 +727,556 @@ product_rule_str = (
 )
 st.info(product_rule_str)
 
-# ================================================================================
-# 7. MANAGE MULTIPLE FLIGHTS
-# ================================================================================
-st.markdown('<div style="margin-bottom: 1rem;"></div>', unsafe_allow_html=True)
-st.markdown("## Multiple Flights")
-
-st.write(f"**Current Flights:** {len(st.session_state.flights)}")
-
-if st.button("➕ Add New Flight (Same Product, Different Dates & Budget)", use_container_width=True):
-    new_flight = {
-        "flight_num": len(st.session_state.flights) + 1,
-        "product": product,
-        "publisher": publisher,
-        "format": ad_format,
-        "device": device,
-        "start_date": start_date,
-        "end_date": end_date,
-        "budget": budget,
-        "cpm": cpm_rate,
-        "volume": impressions,
-        "currency": currency_sym,
-        "total_cost": total_cost,
-        "duration": video_duration,
-    }
-    st.session_state.flights.append(new_flight)
-    st.success(f"Flight {new_flight['flight_num']} added — {product} | {publisher} {ad_format} | {start_date} to {end_date}")
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_optimize(total_budget, flight_days, objective, products, min_spend, max_spend, turnover):
+    """Budget allocation memoized on its inputs (limits as (product, amount) tuples)."""
+    return optimize_budget(total_budget, flight_days, objective, products=list(products),
+                           min_spend=dict(min_spend), max_spend=dict(max_spend), turnover=turnover)
+
+
+@st.fragment
+@_timed_fragment
+def _budget_optimizer_panel(budget, flight_days, turnover, currency_sym, currency_code, start_date, end_date):
+    """Optimizer expander; its inputs and data editor rerun only this fragment."""
+    with st.expander("🧮 Budget Optimizer — split a total budget across product × publisher × format lines"):
+        _cpm_products = list(_options["cpm_products"])
+        _opt_col1, _opt_col2, _opt_col3 = st.columns([1, 1, 2])
+        with _opt_col1:
+            _opt_budget = st.number_input(f"Total Budget ({currency_sym})", min_value=0.0,
+                                          value=float(max(budget, 100_000.0)), step=5_000.0, key="opt_budget")
+        with _opt_col2:
+            _opt_objective = st.radio("Maximize", ["reach", "impressions"], key="opt_objective",
+                                      format_func={"reach": "Unique reach", "impressions": "Impressions"}.get)
+        with _opt_col3:
+            _opt_products = st.multiselect("Products", _cpm_products, default=_cpm_products, key="opt_products")
+        _opt_limits = st.data_editor(
+            pd.DataFrame({"Product": _opt_products, "Min Spend": 0.0, "Max Spend": None}, dtype=object),
+            hide_index=True, use_container_width=True, key="opt_limits", disabled=["Product"],
+            column_config={"Min Spend": st.column_config.NumberColumn(min_value=0.0, format="%.0f"),
+                           "Max Spend": st.column_config.NumberColumn(min_value=0.0, format="%.0f",
+                                                                     help="Blank = no limit")},
+        )
+        try:
+            _opt = _cached_optimize(
+                _opt_budget, flight_days, _opt_objective, tuple(_opt_products),
+                tuple((r["Product"], float(r["Min Spend"])) for r in _opt_limits.to_dict("records")
+                      if pd.notna(r["Min Spend"]) and r["Min Spend"]),
+                tuple((r["Product"], float(r["Max Spend"])) for r in _opt_limits.to_dict("records")
+                      if pd.notna(r["Max Spend"])),
+                turnover,
+            )
+        except ValueError as exc:
+            st.error(f"❌ {exc}")
+            _opt = None
+        if _opt is not None:
+            _opt_lines = _opt["lines"][_opt["lines"]["spend"] > 0]
+            _opt_m1, _opt_m2, _opt_m3 = st.columns(3)
+            _opt_m1.metric("Forecast Unique Reach", f"{_opt['reach']:,.0f}")
+            _opt_m2.metric("Impressions", f"{_opt['impressions']:,.0f}")
+            _opt_m3.metric("Unallocated", f"{currency_sym}{_opt['unallocated']:,.2f}")
+            st.dataframe(_opt_lines.style.format({"cpm": "{:.2f}", "spend": "{:,.2f}", "impressions": "{:,.0f}",
+                                                  "reach": "{:,.0f}", "budget_share": "{:.1%}"}),
+                         hide_index=True, use_container_width=True)
+            st.caption(f"{flight_days}-day window · rate-card CPMs · reach from the precomputed reach "
+                       "curves, shared per publisher × device audience.")
+            if not _opt_lines.empty and st.button("➕ Add allocation as flights", key="opt_add_flights"):
+                for _line in _opt_lines.to_dict("records"):
+                    st.session_state.flights.append({
+                        "flight_num": len(st.session_state.flights) + 1,
+                        "product": _line["product"], "publisher": _line["publisher"],
+                        "format": _line["format"], "device": _line["device"],
+                        "start_date": start_date, "end_date": end_date,
+                        "budget": _line["spend"], "cpm": _line["cpm"], "volume": _line["impressions"],
+                        "currency": currency_sym, "total_cost": _line["spend"], "duration": None,
+                        "currency_code": currency_code, "market": market,
+                    })
+                st.rerun(scope="app")  # new flights feed every section below and the takeover check
+
+
+def _reporting_flights(flights, market, currency_sym):
+    """(flights, currency label) for totals: as entered for a one-currency plan, else
+    converted into a chosen reporting currency at the latest FX rates."""
+    currencies = sorted(set(flight_currencies(flights, market)))
+    if len(currencies) <= 1:
+        return flights, currency_sym
+    try:
+        fx_table = load_fx_rates()
+        options = list(fx_table.codes)
+        target = st.selectbox(
+            "Reporting currency", options, key="report_currency",
+            index=options.index(market_currency(market)) if market_currency(market) in options else 0,
+            help="Flights priced in other markets' currencies are converted for the forecast totals and exports",
+        )
+        converted = convert_flights(flights, target, market, fx_table)
+    except (OSError, ValueError) as exc:
+        st.warning(f"Flights are in {', '.join(currencies)} but the FX table could not be used ({exc}); "
+                   f"totals add the amounts as entered.")
+        return flights, currency_sym
+    st.caption(f"Flights in {', '.join(currencies)} · totals and exports in **{target}** "
+               f"at the {fx_table.version} FX rates.")
+    return converted, target
 
-if st.session_state.flights:
-    st.markdown("**Existing Flights:**")
-    for idx, flight in enumerate(st.session_state.flights):
-        col_flight1, col_flight2, col_flight3 = st.columns([3, 1, 1])
-        
-        with col_flight1:
-            pub_label = flight.get('publisher', publisher)
-            fmt_label = flight.get('format', ad_format)
-            st.write(f"**Flight {flight['flight_num']}** | {flight['product']} | {pub_label} {fmt_label} | {flight['start_date']} → {flight['end_date']}")
-        
-        with col_flight2:
-            st.write(f"{flight['currency']}{flight['total_cost']:,.2f}")
-        
-        with col_flight3:
-            if st.button("🗑️ Remove", key=f"remove_flight_{idx}"):
-                st.session_state.flights.pop(idx)
-                st.rerun()
 
-# ================================================================================
-# PREPARE EXPORT DATA
-# ================================================================================
-# Define export_flights early so it can be used in Risk & Quality Control section
-export_flights = st.session_state.flights if st.session_state.flights else [
-    {
-        "flight_num": 1,
-        "product": product,
-        "publisher": publisher,
-        "format": ad_format,
-        "device": device,
-        "start_date": start_date,
-        "end_date": end_date,
-        "budget": budget,
-        "cpm": cpm_rate,
-        "volume": impressions,
-        "currency": currency_sym,
-        "total_cost": total_cost
-    }
-]
+def _plan_db_path():
+    return os.environ.get("MEDIAPLANNER_PLAN_DB", DEFAULT_DB_PATH)
 
-# ================================================================================
-# RISK & QUALITY CONTROL
-# ================================================================================
-st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
-st.markdown("## Risk & Quality Control")
 
-product_config = get_product_config(product, publisher, ad_format, device)
-freq_cap_text = product_config.get("frequency_cap", "6 imps/day")
-delivery_pressure, pressure_explanation = calculate_delivery_pressure(
-    st.session_state.flights if st.session_state.flights else export_flights,
-    product,
-    freq_cap_text
-)
+@st.cache_resource(show_spinner=False)
+def _plan_store(path):
+    """One plan store per server process (schema and migrations run once) and the lock its sessions share."""
+    return PlanStore(path), threading.Lock()
+
+
+@contextmanager
+def _plans():
+    """The shared plan store, opened on first use so page loads never touch the database file."""
+    store, lock = _plan_store(_plan_db_path())
+    with lock:
+        yield store
+
+
+def _find_saved_plans():
+    """Run the panel's search and keep the matches for later reruns."""
+    market, product = st.session_state.plan_find_market, st.session_state.plan_find_product
+    with _plans() as store:
+        st.session_state.plan_results = store.find_plans(
+            advertiser=st.session_state.plan_find_advertiser.strip() or None,
+            market=None if market == "Any" else market, product=None if product == "Any" else product, limit=200)
+
+
+def _saved_plans_panel(export_flights, turnover):
+    """Save the current plan to the local plan store, or search and reload a saved one.
 
-# Calculate QC metrics
-total_imp = sum(f.get("volume", 0) for f in (st.session_state.flights if st.session_state.flights else export_flights))
-first_flight = (st.session_state.flights if st.session_state.flights else export_flights)[0] if (st.session_state.flights or export_flights) else {}
-start_dt = first_flight.get("start_date")
-end_dt = first_flight.get("end_date")
-if isinstance(start_dt, str):
-    from datetime import datetime
-    start_dt = datetime.strptime(start_dt, "%Y-%m-%d").date()
-if isinstance(end_dt, str):
-    from datetime import datetime
-    end_dt = datetime.strptime(end_dt, "%Y-%m-%d").date()
-flight_duration = (end_dt - start_dt).days + 1 if start_dt and end_dt else 0
-
-# ── PER-PRODUCT FORECASTING BREAKDOWN ──────────────────────────────────────────
-all_flights_for_forecast = st.session_state.flights if st.session_state.flights else export_flights
-if all_flights_for_forecast:
-    forecast_groups = {}
-    for fl in all_flights_for_forecast:
-        fkey = (
-            fl.get("product", product),
-            fl.get("publisher", publisher),
-            fl.get("format", ad_format),
+    The store is queried only on Save / Search / Delete; other reruns show the last results.
+    """
+    with st.expander("💾 Saved Plans"):
+        _find_col1, _find_col2, _find_col3 = st.columns(3)
+        with _find_col1:
+            st.text_input("Advertiser", key="plan_find_advertiser")
+        with _find_col2:
+            st.selectbox("Market", ["Any", *_options["markets"]], key="plan_find_market")
+        with _find_col3:
+            st.selectbox("Product", ["Any", *_options["products"]], key="plan_find_product")
+        _save_col, _search_col = st.columns(2)
+        if _save_col.button("💾 Save current plan", key="plan_save", use_container_width=True):
+            with _plans() as store:
+                _plan_id = store.save_plan(dict(st.session_state.campaign_details), export_flights,
+                                           turnover=turnover)
+            _find_saved_plans()
+            st.success(f"Plan #{_plan_id} saved — {len(export_flights)} flight(s)")
+        if _search_col.button("🔍 Search plans", key="plan_search", use_container_width=True):
+            _find_saved_plans()
+
+        _found = st.session_state.get("plan_results")
+        if _found is None:
+            st.caption("Search to list saved plans.")
+            return
+        if _found.empty:
+            st.caption("No saved plans match.")
+            return
+        st.dataframe(_found.drop(columns=["total_volume"]), hide_index=True, use_container_width=True,
+                     column_config={"total_budget": st.column_config.NumberColumn(format="%.2f")})
+        _labels = {row.plan_id: f"#{row.plan_id} · {row.advertiser or '—'} · {row.campaign or '—'} · "
+                                f"{row.start_date} → {row.end_date}" for row in _found.itertuples()}
+        _pick = st.selectbox("Plan", list(_labels), format_func=_labels.get, key="plan_pick")
+        _load_col, _delete_col = st.columns(2)
+        if _load_col.button("📂 Load plan", key="plan_load", use_container_width=True):
+            with _plans() as store:
+                st.session_state.load_plan = store.load_plan(_pick)
+            st.rerun(scope="app")  # the inputs at the top of the page take the plan's values
+        if _delete_col.button("🗑️ Delete plan", key="plan_delete", use_container_width=True):
+            with _plans() as store:
+                store.delete_plans([_pick])
+            _find_saved_plans()
+            _rerun_fragment()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_export_files(fingerprint, _inputs, _timer=None):
+    """Export bytes memoized by input fingerprint (``_inputs`` / ``_timer`` are not hashed)."""
+    return build_export_files(**_inputs, timer=_timer)
+
+
+# ================================================================================
+# 7–9. FLIGHTS, RISK & QC, EXPORT (one fragment)
+# ================================================================================
+# Everything below depends on the flight list and on the current line's inputs
+# (the fragment's arguments). Adding or removing a flight or preparing the
+# export files reruns only this fragment; any input above reruns the page.
+@st.fragment
+@_timed_fragment
+def _plan_section(product, publisher, ad_format, device, market, advertiser, start_date, end_date,
+                  budget, cpm_rate, impressions, total_cost, currency_sym, video_duration,
+                  vcr_target, completed_views, cpd_rate, flight_days, turnover, avg_daily_uniques,
+                  avg_frequency, lifetime_uniques):
+    _takeover = _is_cpd = is_cpd_product(product)
+    _freq_cap_num = get_freq_cap_numeric(product)
+    currency_code = market_currency(market)
+
+    # ================================================================================
+    # 7. MANAGE MULTIPLE FLIGHTS
+    # ================================================================================
+    _timer.mark("Multiple Flights")
+    st.markdown('<div style="margin-bottom: 1rem;"></div>', unsafe_allow_html=True)
+    st.markdown("## Multiple Flights")
+
+    st.write(f"**Current Flights:** {len(st.session_state.flights)}")
+
+    if st.button("➕ Add New Flight (Same Product, Different Dates & Budget)", use_container_width=True):
+        new_flight = {
+            "flight_num": len(st.session_state.flights) + 1,
+            "product": product,
+            "publisher": publisher,
+            "format": ad_format,
+            "device": device,
+            "start_date": start_date,
+            "end_date": end_date,
+            "budget": budget,
+            "cpm": cpm_rate,
+            "volume": impressions,
+            "currency": currency_sym,
+            "total_cost": total_cost,
+            "duration": video_duration,
+            "currency_code": currency_code,
+            "market": market,
+        }
+        st.session_state.flights.append(new_flight)
+        if _takeover:
+            st.rerun(scope="app")  # re-run the takeover conflict check against the new booking
+        st.success(f"Flight {new_flight['flight_num']} added — {product} | {publisher} {ad_format} | {start_date} to {end_date}")
+
+    if st.session_state.flights:
+        st.markdown("**Existing Flights:**")
+        for idx, flight in enumerate(st.session_state.flights):
+            col_flight1, col_flight2, col_flight3 = st.columns([3, 1, 1])
+        
+            with col_flight1:
+                pub_label = flight.get('publisher', publisher)
+                fmt_label = flight.get('format', ad_format)
+                st.write(f"**Flight {flight['flight_num']}** | {flight['product']} | {pub_label} {fmt_label} | {flight['start_date']} → {flight['end_date']}")
+        
+            with col_flight2:
+                st.write(f"{flight['currency']}{flight['total_cost']:,.2f}")
+        
+            with col_flight3:
+                if st.button("🗑️ Remove", key=f"remove_flight_{idx}"):
+                    st.session_state.flights.pop(idx)
+                    # Takeover flights also feed the conflict check at the top of the page
+                    if is_cpd_product(flight["product"]):
+                        st.rerun(scope="app")
+                    _rerun_fragment()
+
+    # ── BUDGET OPTIMIZER ─────────────────────────────────────────────────────────
+    _budget_optimizer_panel(budget, flight_days, turnover, currency_sym, currency_code, start_date, end_date)
+
+    # ================================================================================
+    # PREPARE EXPORT DATA
+    # ================================================================================
+    # Define export_flights early so it can be used in Risk & Quality Control section
+    export_flights = st.session_state.flights if st.session_state.flights else FlightStore([
+        {
+            "flight_num": 1,
+            "product": product,
+            "publisher": publisher,
+            "format": ad_format,
+            "device": device,
+            "start_date": start_date,
+            "end_date": end_date,
+            "budget": budget,
+            "cpm": cpm_rate,
+            "volume": impressions,
+            "currency": currency_sym,
+            "total_cost": total_cost,
+            "currency_code": currency_code,
+            "market": market,
+        }
+    ])
+    _saved_plans_panel(export_flights, turnover)
+    # Totals and exports in one currency (the flights themselves stay as priced)
+    report_flights, report_sym = _reporting_flights(export_flights, market, currency_sym)
+
+    # ================================================================================
+    # RISK & QUALITY CONTROL
+    # ================================================================================
+    _timer.mark("Risk & QC")
+    st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
+    st.markdown("## Risk & Quality Control")
+
+    product_config = get_product_config(product, publisher, ad_format, device)
+    # Day-by-day simulation across every flight (shared audience per publisher × device)
+    delivery_sim = simulate_delivery(export_flights)
+    delivery_pressure, pressure_explanation = calculate_delivery_pressure(export_flights, simulation=delivery_sim)
+
+    # Calculate QC metrics
+    total_imp = export_flights.total_volume
+    first_flight = export_flights.first or {}
+    start_dt = first_flight.get("start_date")
+    end_dt = first_flight.get("end_date")
+    if isinstance(start_dt, str):
+        start_dt = datetime.strptime(start_dt, "%Y-%m-%d").date()
+    if isinstance(end_dt, str):
+        end_dt = datetime.strptime(end_dt, "%Y-%m-%d").date()
+    flight_duration = (end_dt - start_dt).days + 1 if start_dt and end_dt else 0
+
+    # ── PER-PRODUCT FORECASTING BREAKDOWN ──────────────────────────────────────────
+    _timer.mark("Forecast Table")
+    if export_flights:
+        # Running per-(product, publisher, format) aggregates kept by the flight store
+        forecast_groups = report_flights.groups
+
+        # Spec §6 audience metrics for every group in one vectorized pass
+        _group_caps = [get_freq_cap_numeric(k[0]) for k in forecast_groups]
+        _group_du, _group_fr, _group_lu = forecast_audience_array(
+            [g["impressions"] for g in forecast_groups.values()],
+            [max(1, g["days"]) for g in forecast_groups.values()],
+            _group_caps,
+            turnover,
         )
-        if fkey not in forecast_groups:
-            forecast_groups[fkey] = {"budget": 0, "impressions": 0, "cpm": fl.get("cpm", cpm_rate), "days": 0, "flights": 0}
-        forecast_groups[fkey]["budget"] += fl.get("budget", 0)
-        forecast_groups[fkey]["impressions"] += fl.get("volume", 0)
-        forecast_groups[fkey]["flights"] += 1
-        sd, ed = fl.get("start_date"), fl.get("end_date")
-        if hasattr(sd, "__sub__") and hasattr(ed, "__sub__"):
-            forecast_groups[fkey]["days"] += (ed - sd).days + 1
-
-    forecast_rows = []
-    grand_budget = grand_imps = 0
-    for (fprod, fpub, ffmt), fdata in forecast_groups.items():
-        _fcap = get_freq_cap_numeric(fprod)
-        _cpd  = is_cpd_product(fprod)
-        if _cpd:
-            # CPD row: budget-based, no impressions
-            _days = max(1, fdata["days"])
-            _daily_rate = fdata["budget"] / _days
-            forecast_rows.append({
-                "Product": fprod,
-                "Publisher": fpub,
-                "Format": ffmt,
-                "Pricing": "Fixed Fee (CPD)",
-                "Budget / Total Fee": f"{fdata['budget']:,.2f} {currency_sym}",
-                "Duration": f"{_days} day(s)",
-                "Daily Rate": f"{_daily_rate:,.2f} {currency_sym}/day",
-                "Total Imps": "SOV — N/A",
-                "Est. Daily Avg": "—",
-                "Avg Daily Uniques": "N/A (CPD)",
-                "Avg Frequency": "N/A (CPD)",
-                "Lifetime Uniques": "N/A (CPD)",
-                "Flights": fdata["flights"],
-            })
-        else:
-            daily_avg = fdata["impressions"] / max(1, fdata["days"])
-            _du = calc_avg_daily_uniques(fdata["impressions"], max(1, fdata["days"]), _fcap)
-            _fr = calc_avg_frequency_daily(fdata["impressions"], _du, max(1, fdata["days"]))
-            _lu = calc_lifetime_uniques(_du, _turnover_rate, max(1, fdata["days"])) if _du > 0 else 0
+
+        forecast_rows = []
+        grand_budget = grand_imps = 0
+        for _gi, ((fprod, fpub, ffmt), fdata) in enumerate(forecast_groups.items()):
+            _fcap = _group_caps[_gi]
+            _cpd  = is_cpd_product(fprod)
+            if _cpd:
+                # CPD row: budget-based, no impressions
+                _days = max(1, fdata["days"])
+                _daily_rate = fdata["budget"] / _days
+                forecast_rows.append({
+                    "Product": fprod,
+                    "Publisher": fpub,
+                    "Format": ffmt,
+                    "Pricing": "Fixed Fee (CPD)",
+                    "Budget / Total Fee": f"{fdata['budget']:,.2f} {report_sym}",
+                    "Duration": f"{_days} day(s)",
+                    "Daily Rate": f"{_daily_rate:,.2f} {report_sym}/day",
+                    "Total Imps": "SOV — N/A",
+                    "Est. Daily Avg": "—",
+                    "Avg Daily Uniques": "N/A (CPD)",
+                    "Avg Frequency": "N/A (CPD)",
+                    "Lifetime Uniques": "N/A (CPD)",
+                    "Flights": fdata["flights"],
+                })
+            else:
+                daily_avg = fdata["impressions"] / max(1, fdata["days"])
+                _du, _fr, _lu = _group_du[_gi], _group_fr[_gi], _group_lu[_gi]
+                forecast_rows.append({
+                    "Product": fprod,
+                    "Publisher": fpub,
+                    "Format": ffmt,
+                    "Pricing": f"CPM {fdata['cpm']:,.2f} {report_sym}",
+                    "Budget / Total Fee": f"{fdata['budget']:,.2f} {report_sym}",
+                    "Duration": f"{max(1,fdata['days'])} day(s)",
+                    "Daily Rate": "—",
+                    "Total Imps": f"{fdata['impressions']:,.0f}",
+                    "Est. Daily Avg": f"{daily_avg:,.0f}",
+                    "Avg Daily Uniques": f"{_du:,.0f}" if _fcap > 0 else "Uncapped",
+                    "Avg Frequency": f"{_fr:.2f}" if _fcap > 0 else "Uncapped",
+                    "Lifetime Uniques": f"{_lu:,.0f}" if _lu > 0 else "—",
+                    "Flights": fdata["flights"],
+                })
+            grand_budget += fdata["budget"]
+            grand_imps += fdata["impressions"]
+
+        if len(forecast_groups) > 1:
+            # Add summary row for multi-product plans
             forecast_rows.append({
-                "Product": fprod,
-                "Publisher": fpub,
-                "Format": ffmt,
-                "Pricing": f"CPM {fdata['cpm']:,.2f} {currency_sym}",
-                "Budget / Total Fee": f"{fdata['budget']:,.2f} {currency_sym}",
-                "Duration": f"{max(1,fdata['days'])} day(s)",
+                "Product": "📄 TOTAL", "Publisher": "", "Format": "",
+                "Pricing": "—",
+                "Budget / Total Fee": f"{grand_budget:,.2f} {report_sym}",
+                "Duration": "—",
                 "Daily Rate": "—",
-                "Total Imps": f"{fdata['impressions']:,.0f}",
-                "Est. Daily Avg": f"{daily_avg:,.0f}",
-                "Avg Daily Uniques": f"{_du:,.0f}" if _fcap > 0 else "Uncapped",
-                "Avg Frequency": f"{_fr:.2f}" if _fcap > 0 else "Uncapped",
-                "Lifetime Uniques": f"{_lu:,.0f}" if _lu > 0 else "—",
-                "Flights": fdata["flights"],
+                "Total Imps": f"{grand_imps:,.0f}" if grand_imps > 0 else "—",
+                "Est. Daily Avg": "—",
+                "Avg Daily Uniques": "—",
+                "Avg Frequency": "—",
+                "Lifetime Uniques": "—",
+                "Flights": len(report_flights),
             })
-        grand_budget += fdata["budget"]
-        grand_imps += fdata["impressions"]
-
-    if len(forecast_groups) > 1:
-        # Add summary row for multi-product plans
-        forecast_rows.append({
-            "Product": "📄 TOTAL", "Publisher": "", "Format": "",
-            "Pricing": "—",
-            "Budget / Total Fee": f"{grand_budget:,.2f} {currency_sym}",
-            "Duration": "—",
-            "Daily Rate": "—",
-            "Total Imps": f"{grand_imps:,.0f}" if grand_imps > 0 else "—",
-            "Est. Daily Avg": "—",
-            "Avg Daily Uniques": "—",
-            "Avg Frequency": "—",
-            "Lifetime Uniques": "—",
-            "Flights": len(all_flights_for_forecast),
-        })
-    if forecast_rows:
-        st.dataframe(
-            pd.DataFrame(forecast_rows), use_container_width=True, hide_index=True,
-            column_config={
-                "Product": st.column_config.TextColumn(width="large"),
-                "Budget": st.column_config.TextColumn(width="medium"),
-                "Total Imps": st.column_config.TextColumn(width="medium"),
-            }
-        )
-
-# ── UNIFIED QC CHECKLIST ────────────────────────────────────────────────────────
-_inv_type      = resolve_inventory_type(ad_format)
-_inv_tgt_mode  = resolve_inventory_targeting_mode(publisher, ad_format)
-_fmt_valid, _fmt_err = validate_deal_format(product, ad_format)
-_allowed_sizes = get_allowed_banner_sizes(publisher, device) if ad_format == "Banner" else []
-
-unified_checklist = [
-    ("Product",            f"{product} | {publisher} | {ad_format}"),
-    ("Priority",           product_config.get("priority", "N/A")),
-    ("Line Item Type",     product_config.get("line_item_type", "N/A")),
-    ("Revenue Type",       product_config.get("revenue_type", "CPM")),
-    ("Frequency Cap",      product_config.get("frequency_cap", "N/A")),
-    ("Pacing",             product_config.get("pacing", "Even")),
-    # Spec §4.1–4.2: resolved inventory + targeting mode
-    ("Inventory Type",     _inv_type),
-    ("Inventory Targeting Mode", _inv_tgt_mode),
-    ("Inventory Targeting", product_config.get("inventory_targeting",
-                            product_config.get("publisher_targeting", "N/A"))),
-    ("Supply",             product_config.get("supply", product_config.get("supply_targeting", "N/A"))),
-    ("Ad Sizes",           product_config.get("ad_sizes", "N/A")),
-    # Spec §4.4: canonical allowed sizes
-    ("Allowed Banner Sizes", ", ".join(_allowed_sizes) if _allowed_sizes else "N/A (non-Banner)"),
-    # Spec §4.3: format validation
-    ("Format Validation",  "✅ Valid" if _fmt_valid else f"❌ INVALID — {_fmt_err}"),
-    ("Device Targeting",   product_config.get("device_targeting", "N/A")),
-    ("Creative Specs",     product_config.get("creative_specs", "N/A")),
-    ("Allow RTB",          str(product_config.get("allow_rtb", "N/A"))),
-    ("Underspend Catchup", product_config.get("underspend_catchup", "N/A")),
-    ("Geo Targeting",      product_config.get("geo_targeting", "Country Targeting")),
-    ("Dates",              f"{start_dt.strftime('%m/%d/%Y') if start_dt else 'N/A'} \u2192 {end_dt.strftime('%m/%d/%Y') if end_dt else 'N/A'}"),
-    ("Flight Duration",    f"{flight_duration} days"),
-    ("Delivery Risk",      delivery_pressure),
-    ("Total Flights",      len(st.session_state.flights if st.session_state.flights else export_flights)),
-    # CPD vs CPM pricing rows
-    *([("Total Fixed Fee",   f"{budget:,.2f} {currency_sym}"),
-       ("Daily Rate",        f"{_cpd_rate:,.2f} {currency_sym}/day"),
-       ("Takeover Days",     f"{_flight_days_pricing}"),
-       ("Impressions",       "SOV — N/A (Fixed Fee)")] if _takeover else
-      [("Total Impressions", f"{total_imp:,.0f}"),
-       ("Est. Daily Imps",   f"{total_imp/flight_duration:,.0f}" if flight_duration > 0 else "0"),
-       ("CPM",               f"{cpm_rate:.2f} {currency_sym}")]),
-    ("Request Date",       datetime.now().strftime("%m/%d/%Y")),
-]
-
-# Spec §6 + §8: Forecasting metrics — guarded by CPD check
-if not _is_cpd and _freq_cap_num > 0:
-    unified_checklist += [
-        ("── Audience Forecast ──", ""),
-        ("Est. Avg Daily Uniques",  f"{_avg_daily_uniques_est:,.0f}"),
-        ("Est. Avg Daily Frequency", f"{_avg_freq_est:.2f}"),
-        ("Daily Turnover Rate",     f"{int(_turnover_rate * 100)}%"),
-        ("Est. Lifetime Uniques",   f"{_lifetime_uniques_est:,.0f}"),
+        if forecast_rows:
+            st.dataframe(
+                pd.DataFrame(forecast_rows), use_container_width=True, hide_index=True,
+                column_config={
+                    "Product": st.column_config.TextColumn(width="large"),
+                    "Budget": st.column_config.TextColumn(width="medium"),
+                    "Total Imps": st.column_config.TextColumn(width="medium"),
+                }
+            )
+
+    # ── UNIFIED QC CHECKLIST ────────────────────────────────────────────────────────
+    _timer.mark("Unified Checklist")
+    _inv_type      = resolve_inventory_type(ad_format)
+    _inv_tgt_mode  = resolve_inventory_targeting_mode(publisher, ad_format)
+    _fmt_valid, _fmt_err = validate_deal_format(product, ad_format)
+    _allowed_sizes = get_allowed_banner_sizes(publisher, device) if ad_format == "Banner" else []
+
+    unified_checklist = [
+        ("Product",            f"{product} | {publisher} | {ad_format}"),
+        ("Priority",           product_config.get("priority", "N/A")),
+        ("Line Item Type",     product_config.get("line_item_type", "N/A")),
+        ("Revenue Type",       product_config.get("revenue_type", "CPM")),
+        ("Frequency Cap",      product_config.get("frequency_cap", "N/A")),
+        ("Pacing",             product_config.get("pacing", "Even")),
+        # Spec §4.1–4.2: resolved inventory + targeting mode
+        ("Inventory Type",     _inv_type),
+        ("Inventory Targeting Mode", _inv_tgt_mode),
+        ("Inventory Targeting", product_config.get("inventory_targeting",
+                                product_config.get("publisher_targeting", "N/A"))),
+        ("Supply",             product_config.get("supply", product_config.get("supply_targeting", "N/A"))),
+        ("Ad Sizes",           product_config.get("ad_sizes", "N/A")),
+        # Spec §4.4: canonical allowed sizes
+        ("Allowed Banner Sizes", ", ".join(_allowed_sizes) if _allowed_sizes else "N/A (non-Banner)"),
+        # Spec §4.3: format validation
+        ("Format Validation",  "✅ Valid" if _fmt_valid else f"❌ INVALID — {_fmt_err}"),
+        ("Device Targeting",   product_config.get("device_targeting", "N/A")),
+        ("Creative Specs",     product_config.get("creative_specs", "N/A")),
+        ("Allow RTB",          str(product_config.get("allow_rtb", "N/A"))),
+        ("Underspend Catchup", product_config.get("underspend_catchup", "N/A")),
+        ("Geo Targeting",      product_config.get("geo_targeting", "Country Targeting")),
+        ("Dates",              f"{start_dt.strftime('%m/%d/%Y') if start_dt else 'N/A'} \u2192 {end_dt.strftime('%m/%d/%Y') if end_dt else 'N/A'}"),
+        ("Flight Duration",    f"{flight_duration} days"),
+        ("Delivery Risk",      delivery_pressure),
+        ("Total Flights",      len(export_flights)),
+        # CPD vs CPM pricing rows
+        *([("Total Fixed Fee",   f"{budget:,.2f} {currency_sym}"),
+           ("Daily Rate",        f"{cpd_rate:,.2f} {currency_sym}/day"),
+           ("Takeover Days",     f"{flight_days}"),
+           ("Impressions",       "SOV — N/A (Fixed Fee)")] if _takeover else
+          [("Total Impressions", f"{total_imp:,.0f}"),
+           ("Est. Daily Imps",   f"{total_imp/flight_duration:,.0f}" if flight_duration > 0 else "0"),
+           ("CPM",               f"{cpm_rate:.2f} {currency_sym}")]),
+        ("Request Date",       datetime.now().strftime("%m/%d/%Y")),
     ]
-elif _is_cpd:
-    unified_checklist.append(("Audience Forecast", "❌ N/A — Fixed Fee (CPD) product"))
-else:
-    unified_checklist.append(("Audience Forecast", "❌ N/A — Uncapped product"))
-
-# Add video-specific rows when applicable
-if is_video_product(product, ad_format):
-    if video_duration:
-        unified_checklist.append(("Creative Duration", video_duration))
-    unified_checklist.append(("Target VCR (%)", f"{vcr_target}%"))
-    unified_checklist.append(("Est. Completed Views", f"{completed_views:,.0f}" if completed_views > 0 else "—"))
-    if completed_views > 0 and budget > 0:
-        unified_checklist.append(("Est. Cost / Completed View", f"{currency_sym}{budget / completed_views:.4f}"))
-
-# Display unified table
-table_data = []
-for item_name, item_value in unified_checklist:
-    table_data.append([item_name, str(item_value)])
-
-df = pd.DataFrame(table_data, columns=["Item", "Value"])
-st.dataframe(
-    df, 
-    use_container_width=True, 
-    hide_index=True,
-    column_config={
-        "Item": st.column_config.TextColumn(width="medium"),
-        "Value": st.column_config.TextColumn(width="large"),
-    }
-)
-st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
 
-# ================================================================================
-# EXPORT MEDIA PLAN
-# ================================================================================
-st.markdown("## Export Media Plan")
-st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
+    # Spec §6 + §8: Forecasting metrics — guarded by CPD check
+    if not _is_cpd and _freq_cap_num > 0:
+        unified_checklist += [
+            ("── Audience Forecast ──", ""),
+            ("Est. Avg Daily Uniques",  f"{avg_daily_uniques:,.0f}"),
+            ("Est. Avg Daily Frequency", f"{avg_frequency:.2f}"),
+            ("Daily Turnover Rate",     f"{int(turnover * 100)}%"),
+            ("Est. Lifetime Uniques",   f"{lifetime_uniques:,.0f}"),
+        ]
+    elif _is_cpd:
+        unified_checklist.append(("Audience Forecast", "❌ N/A — Fixed Fee (CPD) product"))
+    else:
+        unified_checklist.append(("Audience Forecast", "❌ N/A — Uncapped product"))
+
+    # Add video-specific rows when applicable
+    if is_video_product(product, ad_format):
+        if video_duration:
+            unified_checklist.append(("Creative Duration", video_duration))
+        unified_checklist.append(("Target VCR (%)", f"{vcr_target}%"))
+        unified_checklist.append(("Est. Completed Views", f"{completed_views:,.0f}" if completed_views > 0 else "—"))
+        if completed_views > 0 and budget > 0:
+            unified_checklist.append(("Est. Cost / Completed View", f"{currency_sym}{budget / completed_views:.4f}"))
+
+    # Display unified table
+    table_data = []
+    for item_name, item_value in unified_checklist:
+        table_data.append([item_name, str(item_value)])
+
+    df = pd.DataFrame(table_data, columns=["Item", "Value"])
+    st.dataframe(
+        df, 
+        use_container_width=True, 
+        hide_index=True,
+        column_config={
+            "Item": st.column_config.TextColumn(width="medium"),
+            "Value": st.column_config.TextColumn(width="large"),
+        }
+    )
+    st.caption(f"Delivery risk **{delivery_pressure}** — {pressure_explanation}")
+    if delivery_sim["dates"].size and delivery_sim["peak_pressure"] > 0:
+        with st.expander("📈 Daily delivery simulation", expanded=delivery_pressure == "High"):
+            _delivery_df = delivery_frame(delivery_sim).set_index("date")
+            st.line_chart(_delivery_df[["required_imps", "deliverable_imps", "shortfall_imps"]])
+            st.caption("Pressure = uniques needed ÷ frequency-capped daily audience of the busiest "
+                       "publisher × device slot (1.0 = at capacity).")
+            st.line_chart(_delivery_df[["pressure"]])
+    st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
+
+    # ================================================================================
+    # EXPORT MEDIA PLAN
+    # ================================================================================
+    _timer.mark("Export Media Plan")
+    st.markdown("## Export Media Plan")
+    st.markdown('<div style="margin-bottom: 1.5rem;"></div>', unsafe_allow_html=True)
+
+    st.write("Download your media plan for client proposal in your preferred format:")
+    st.markdown('<div style="margin-bottom: 1rem;"></div>', unsafe_allow_html=True)
+
+    _is_video_export = is_video_product(product, ad_format)
+    _export_inputs = dict(
+        flights_list=report_flights,
+        campaign_info=dict(st.session_state.campaign_details),
+        delivery_pressure_label=delivery_pressure,
+        product_config=product_config,
+        cpm_rate=cpm_rate,
+        currency_sym=report_sym,
+        unified_checklist=[(str(k), str(v)) for k, v in unified_checklist],
+        vcr_target=vcr_target if _is_video_export else None,
+        completed_views=completed_views if _is_video_export else None,
+    )
+    _export_fp = export_fingerprint(_export_inputs)
 
-st.write("Download your media plan for client proposal in your preferred format:")
-st.markdown('<div style="margin-bottom: 1rem;"></div>', unsafe_allow_html=True)
 
-col_export1, col_export2, col_export3 = st.columns(3)
-
-# IO Excel Export
-with col_export1:
-    excel_file = create_excel_export(
-        export_flights, 
-        st.session_state.campaign_details,
-        delivery_pressure,
-        product_config,
-        cpm_rate,
-        currency_sym,
-        vcr_target=vcr_target if is_video_product(product, ad_format) else None,
-        completed_views=completed_views if is_video_product(product, ad_format) else None
-    )
-    excel_bytes = BytesIO()
-    excel_file.save(excel_bytes)
-    excel_bytes.seek(0)
-    
     _adv_slug   = re.sub(r"[^\w]", "_", advertiser or "Plan")[:20].strip("_")
     _mkt_slug   = re.sub(r"[^\w]", "_", market or "MKT")[:6].strip("_")
     _prod_slug  = re.sub(r"[^\w]", "_", product or "Product")[:14].strip("_")
     _date_slug  = datetime.now().strftime("%Y%m%d")
     _base_name  = f"{_adv_slug}_{_mkt_slug}_{_prod_slug}_{_date_slug}"
 
-    st.download_button(
-        label="📊 IO (Excel)",
-        data=excel_bytes.getvalue(),
-        file_name=f"{_base_name}_IO.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True,
-        help="Microsoft-style Excel file with campaign details and forecasting"
-    )
-
-# IO PDF Export
-with col_export2:
-    pdf_buffer = create_pdf_export(
-        export_flights, 
-        st.session_state.campaign_details,
-        delivery_pressure,
-        product_config,
-        cpm_rate,
-        currency_sym,
-        vcr_target=vcr_target if is_video_product(product, ad_format) else None,
-        completed_views=completed_views if is_video_product(product, ad_format) else None
-    )
-    
-    st.download_button(
-        label="📄 IO (PDF)",
-        data=pdf_buffer.getvalue(),
-        file_name=f"{_base_name}_IO.pdf",
-        mime="application/pdf",
-        use_container_width=True,
-        help="PDF version of the media plan"
-    )
-
-# Internal-Facing Excel Export
-with col_export3:
-    # Create internal-facing Excel with targeting setup
-    internal_file = create_internal_excel_export(
-        export_flights, st.session_state.campaign_details, delivery_pressure,
-        product_config, unified_checklist
-    )
-    internal_bytes = BytesIO()
-    internal_file.save(internal_bytes)
-    internal_bytes.seek(0)
-    
-    st.download_button(
-        label="🔒 Internal Setup (Excel)",
-        data=internal_bytes.getvalue(),
-        file_name=f"{_base_name}_InternalSetup.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True,
-        help="Internal-facing Excel with targeting setup and QC checklist"
-    )
+    # Files are only built on request; any input change invalidates the prepared set
+    if st.session_state.get("export_fingerprint") != _export_fp:
+        if st.button("⚙️ Prepare Export Files", use_container_width=True,
+                     help="Build the IO (Excel & PDF) and Internal Setup files for the current plan"):
+            st.session_state.export_fingerprint = _export_fp
+            _rerun_fragment()
+    else:
+        with st.spinner("Building export files..."):
+            export_files = _cached_export_files(_export_fp, _export_inputs, _timer)
+
+        col_export1, col_export2, col_export3 = st.columns(3)
+
+        # IO Excel Export
+        with col_export1:
+            st.download_button(
+                label="📊 IO (Excel)",
+                data=export_files["io_excel"],
+                file_name=f"{_base_name}_IO.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True,
+                help="Microsoft-style Excel file with campaign details and forecasting"
+            )
+
+        # IO PDF Export
+        with col_export2:
+            st.download_button(
+                label="📄 IO (PDF)",
+                data=export_files["io_pdf"],
+                file_name=f"{_base_name}_IO.pdf",
+                mime="application/pdf",
+                use_container_width=True,
+                help="PDF version of the media plan"
+            )
+
+        # Internal-Facing Excel Export
+        with col_export3:
+            st.download_button(
+                label="🔒 Internal Setup (Excel)",
+                data=export_files["internal_excel"],
+                file_name=f"{_base_name}_InternalSetup.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True,
+                help="Internal-facing Excel with targeting setup and QC checklist"
+            )
+
+
+_plan_section(product, publisher, ad_format, device, market, advertiser, start_date, end_date,
+              budget, cpm_rate, impressions, total_cost, currency_sym, video_duration,
+              vcr_target, completed_views, _cpd_rate, _flight_days_pricing, _turnover_rate,
+              _avg_daily_uniques_est, _avg_freq_est, _lifetime_uniques_est)
 
 st.divider()
 
@@ -1791,3 +1285,23 @@ st.markdown(f"""
 Monetize Guaranteed Media Planner • Seat 280 • Generated {datetime.now().strftime('%b %d, %Y at %I:%M %p')}
 </p>
 """, unsafe_allow_html=True)
+
+# ================================================================================
+# RERUN TIMING PANEL
+# ================================================================================
+if _timer.enabled:
+    _timing = _timer.finish()
+    append_jsonl(_timing, _timing_log)
+    with st.expander(f"⏱️ Rerun timings — {_timing['total_s'] * 1000:,.0f} ms "
+                     f"(session {_timing['session']}, rerun {_timing['rerun']})"):
+        st.caption("Export rows are only present when the files were built (cache miss) "
+                   "and are part of Export Media Plan.")
+        st.dataframe(pd.DataFrame(
+            [{"Section": name, "ms": round(sec * 1000, 2), "% of rerun": round(100 * sec / _timing["total_s"], 1)}
+             for name, sec in _timing["sections"].items()]
+        ), use_container_width=True, hide_index=True)
+        if _timing["helpers"]:
+            st.dataframe(pd.DataFrame(
+                [{"Helper": name, "Calls": h["calls"], "Total ms": round(h["seconds"] * 1000, 3)}
+                 for name, h in sorted(_timing["helpers"].items(), key=lambda item: -item[1]["seconds"])]
+            ), use_container_width=True, hide_index=True)
@@ -0,0 +1,368 @@
+"""Planner benchmark suite: timing and peak memory for a fixed set of scenarios.
+
+    python benchmarks/run_benchmarks.py                     # full suite
+    python benchmarks/run_benchmarks.py --quick             # small sizes only
+    python benchmarks/run_benchmarks.py --only export       # scenarios whose name contains "export"
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier>.json
+
+Scenarios:
+
+* ``product_config``      – ``get_product_config`` over every product × publisher × format × device
+* ``forecast_array``      – the vectorized §6 formulas at 1e3 … 1e7 rows
+* ``forecast_scalar``     – the scalar §6 formulas in a Python loop at 1e3 … 1e5 rows
+* ``excel_export`` / ``pdf_export`` / ``internal_export`` – at 1, 100 and 10,000 flights
+* ``reach_mc``            – Monte Carlo reach of one line with 100,000 and 1,000,000 simulated users
+* ``reach_curve``         – interpolated reach-curve lookups at 1e3 … 1e6 rows (tables already loaded)
+* ``scenario_sweep``      – a budget × CPM × flight days × turnover grid of one line (≈160,000 and ≈1.3M scenarios)
+* ``capacity``            – the overbooking sweep line over 10,000 and 200,000 deals (three-year horizon)
+* ``deal_audit``          – the nine DealAuditor checks over 100,000 and 1,000,000 deals
+* ``fx_rollup``           – multi-market budgets rolled into one reporting currency per publisher at 1e5 … 1e7 rows
+* ``name_parse``          – O&O taxonomy names split back into fields at 1e5 and 1e6 rows (matrix names, and all distinct)
+* ``app_rerun``           – a complete headless run of ``app.py`` through Streamlit's AppTest
+
+Each scenario is timed over several repeats (min / median / mean seconds) and
+run once more under ``tracemalloc`` for peak Python memory. Results go to a
+JSON file (default ``benchmarks/results/bench-<timestamp>.json``); with
+``--compare`` the median of every scenario is printed against an earlier file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from mediaplanner import (  # noqa: E402
+    calc_avg_daily_uniques, calc_avg_frequency_daily, calc_lifetime_uniques,
+    forecast_audience_array, get_compatible_devices, get_product_config, list_valid_combinations,
+)
+from mediaplanner.exporters import (  # noqa: E402
+    create_excel_export, create_internal_excel_export, create_pdf_export,
+)
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+ARRAY_ROWS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+SCALAR_ROWS = [1_000, 10_000, 100_000]
+FLIGHT_COUNTS = [1, 100, 10_000]
+DEAL_COUNTS = [10_000, 200_000]
+REACH_USERS = [100_000, 1_000_000]
+SWEEP_STEPS = [(25, 20, 30, 10), (50, 40, 60, 10)]
+AUDIT_ROWS = [100_000, 1_000_000]
+
+_CAMPAIGN_INFO = {"advertiser": "Benchmark Advertiser", "campaign": "Benchmark Campaign",
+                  "market": "US", "publisher": "MSN"}
+_FLIGHT_MIX = [("High Impact", "MSN", "Banner", 12.0), ("PG - Standard", "MSN", "Native", 8.0),
+               ("GDALI - Outlook Takeover", "Outlook", "Banner", 0.0)]
+
+
+# ── FIXTURES ─────────────────────────────────────────────────────────────────
+
+def make_flights(count) -> list:
+    """``count`` flight dicts cycling through a CPM, a native and a CPD product."""
+    start = date(2026, 1, 5)
+    flights = []
+    for i in range(count):
+        product, publisher, ad_format, cpm = _FLIGHT_MIX[i % len(_FLIGHT_MIX)]
+        sd = start + timedelta(days=i % 300)
+        budget = 5_000.0 + (i % 50) * 100
+        flights.append({
+            "flight_num": i + 1, "product": product, "publisher": publisher, "format": ad_format,
+            "device": "All Devices", "start_date": sd, "end_date": sd + timedelta(days=13),
+            "budget": budget, "cpm": cpm, "volume": budget / cpm * 1000 if cpm else 0,
+            "currency": "$", "total_cost": budget, "duration": None,
+        })
+    return flights
+
+
+def make_forecast_inputs(rows):
+    rng = np.random.default_rng(7)
+    return (rng.uniform(1e4, 5e7, rows), rng.integers(1, 120, rows),
+            rng.choice([0, 1, 3, 6], rows), 0.30)
+
+
+def make_deals(count):
+    """``count`` rows resampled from ``sample_deals.csv`` with random dates and markets."""
+    import pandas as pd
+
+    from mediaplanner.capacity import read_deals
+
+    rng = np.random.default_rng(11)
+    sample = read_deals(ROOT / "sample_deals.csv")
+    deals = sample.iloc[rng.integers(0, len(sample), count)].reset_index(drop=True)
+    start = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 1000, count), unit="D")
+    deals["flight_start"] = start.strftime("%Y-%m-%d")
+    deals["flight_end"] = (start + pd.to_timedelta(rng.integers(0, 120, count), unit="D")).strftime("%Y-%m-%d")
+    deals["market_country"] = rng.choice(["US", "CA", "GB", "DE", "US;CA", "FR;DE", "JP", "BR"], count)
+    return deals
+
+
+def _checklist(count=40) -> list:
+    return [(f"Item {i}", f"Value {i}") for i in range(count)]
+
+
+# ── SCENARIOS ────────────────────────────────────────────────────────────────
+
+def scenarios(quick=False):
+    """Yield ``(name, params, setup)``; ``setup()`` returns the zero-argument callable to time."""
+    def product_config():
+        lines = [(p, pub, fmt) for p, pub, fmt, _ in list_valid_combinations()]
+        keys = [(p, pub, fmt, dev) for p, pub, fmt in dict.fromkeys(lines)
+                for dev in get_compatible_devices(p, pub, fmt)]
+        return lambda: [get_product_config(*key) for key in keys]
+    yield "product_config", {"lines": len(list_valid_combinations())}, product_config
+
+    for rows in ARRAY_ROWS[:3] if quick else ARRAY_ROWS:
+        def forecast_array(rows=rows):
+            imps, days, caps, turnover = make_forecast_inputs(rows)
+            return lambda: forecast_audience_array(imps, days, caps, turnover)
+        yield "forecast_array", {"rows": rows}, forecast_array
+
+    for rows in SCALAR_ROWS[:2] if quick else SCALAR_ROWS:
+        def forecast_scalar(rows=rows):
+            imps, days, caps, turnover = (a.tolist() if hasattr(a, "tolist") else a
+                                          for a in make_forecast_inputs(rows))
+
+            def run():
+                for i, d, c in zip(imps, days, caps):
+                    uniques = calc_avg_daily_uniques(i, d, c)
+                    calc_avg_frequency_daily(i, uniques, d)
+                    calc_lifetime_uniques(uniques, turnover, d)
+            return run
+        yield "forecast_scalar", {"rows": rows}, forecast_scalar
+
+    for count in FLIGHT_COUNTS[:2] if quick else FLIGHT_COUNTS:
+        def excel_export(count=count):
+            flights = make_flights(count)
+            return lambda: create_excel_export(flights, _CAMPAIGN_INFO, "Low", {}, 12.0, "$")
+        yield "excel_export", {"flights": count}, excel_export
+
+        def pdf_export(count=count):
+            flights = make_flights(count)
+            return lambda: create_pdf_export(flights, _CAMPAIGN_INFO, "Low", {}, 12.0, "$")
+        yield "pdf_export", {"flights": count}, pdf_export
+
+        def internal_export(count=count):
+            flights = make_flights(count)
+            config = get_product_config("High Impact", "MSN", "Banner")
+            return lambda: create_internal_excel_export(flights, _CAMPAIGN_INFO, "Low", config, _checklist())
+        yield "internal_export", {"flights": count}, internal_export
+
+    for users in REACH_USERS[:1] if quick else REACH_USERS:
+        def reach_mc(users=users):
+            from mediaplanner.reach import simulate_reach
+
+            return lambda: simulate_reach(20_000_000, 31, 6, "MSN", "All Devices", 0.30,
+                                          sample_size=users, seed=7)
+        yield "reach_mc", {"users": users}, reach_mc
+
+    for rows in ARRAY_ROWS[:3] if quick else ARRAY_ROWS[:4]:
+        def reach_curve(rows=rows):
+            from mediaplanner.reach_curves import curve_reach_array, load_reach_curves
+
+            load_reach_curves()
+            imps, days, caps, turnover = make_forecast_inputs(rows)
+            return lambda: curve_reach_array(imps, days, caps, 30_000_000, turnover)
+        yield "reach_curve", {"rows": rows}, reach_curve
+
+    for steps in SWEEP_STEPS[:1] if quick else SWEEP_STEPS:
+        def scenario_sweep(steps=steps):
+            from mediaplanner.reach_curves import load_reach_curves
+            from mediaplanner.scenarios import product_scenarios, sweep_axes
+
+            load_reach_curves()
+            axes = sweep_axes(100_000, 12.0, 31, steps=steps)
+            return lambda: product_scenarios("PG - Standard", "MSN", "All Devices", *axes.values())
+        yield "scenario_sweep", {"steps": "x".join(map(str, steps))}, scenario_sweep
+
+    for count in DEAL_COUNTS[:1] if quick else DEAL_COUNTS:
+        def capacity(count=count):
+            from mediaplanner.capacity import check_capacity
+
+            deals = make_deals(count)
+            return lambda: check_capacity(deals)
+        yield "capacity", {"deals": count}, capacity
+
+    for count in AUDIT_ROWS[:1] if quick else AUDIT_ROWS:
+        def deal_audit(count=count):
+            from mediaplanner.audit import audit_deals
+
+            deals = make_deals(count)
+            return lambda: audit_deals(deals)
+        yield "deal_audit", {"deals": count}, deal_audit
+
+    for rows in ARRAY_ROWS[2:3] if quick else ARRAY_ROWS[2:]:
+        def fx_rollup(rows=rows):
+            import pandas as pd
+
+            from mediaplanner.fx import load_fx_rates, rollup
+            from mediaplanner.rules import REGION_CURRENCY
+
+            rng = np.random.default_rng(5)
+            flights = pd.DataFrame({"market": rng.choice(list(REGION_CURRENCY), rows),
+                                    "publisher": rng.choice(["MSN", "Outlook", "MCG"], rows),
+                                    "budget": rng.uniform(1e3, 1e6, rows)})
+            fx_table = load_fx_rates()
+            return lambda: rollup(flights, "EUR", by="publisher", table=fx_table)
+        yield "fx_rollup", {"rows": rows}, fx_rollup
+
+    for rows in ARRAY_ROWS[2:3] if quick else ARRAY_ROWS[2:4]:
+        for distinct in (False, True):
+            def name_parse(rows=rows, distinct=distinct):
+                from mediaplanner.naming import parse_taxonomy
+                from mediaplanner.resolvers import generate_o_o_taxonomy
+                from mediaplanner.rules import REGION_CURRENCY
+
+                rng = np.random.default_rng(9)
+                lines = list_valid_combinations()
+                markets = rng.choice(list(REGION_CURRENCY), rows)
+                names = [generate_o_o_taxonomy(markets[n], publisher, f"{product} {n}" if distinct else product,
+                                               ad_format, device)
+                         for n, (product, publisher, ad_format, device)
+                         in enumerate(lines[i] for i in rng.integers(0, len(lines), rows))]
+                return lambda: parse_taxonomy(names)
+            yield "name_parse", {"rows": rows, "distinct": distinct}, name_parse
+
+    def app_rerun():
+        from streamlit.testing.v1 import AppTest
+
+        def run():
+            at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120).run()
+            if at.exception:
+                raise RuntimeError(f"app.py raised: {at.exception[0].message}")
+        return run
+    yield "app_rerun", {}, app_rerun
+
+
+# ── RUNNER ───────────────────────────────────────────────────────────────────
+
+def _repeats_for(first_seconds, budget_seconds) -> int:
+    """Enough repeats to fill ``budget_seconds``, between 3 and 50."""
+    return max(3, min(50, int(budget_seconds / max(first_seconds, 1e-9))))
+
+
+def run_scenario(name, params, setup, budget_seconds=2.0) -> dict:
+    fn = setup()
+    started = time.perf_counter()
+    fn()  # warm-up (imports, caches); also sizes the repeat count
+    first = time.perf_counter() - started
+
+    timings = []
+    for _ in range(_repeats_for(first, budget_seconds)):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "params": params,
+        "repeats": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata() -> dict:
+    import openpyxl
+    import pandas
+    import reportlab
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "openpyxl": openpyxl.__version__,
+        "reportlab": reportlab.Version,
+    }
+
+
+def _key(result) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]" if params else result["name"]
+
+
+def compare(baseline_path, results):
+    """Print median time and peak memory of ``results`` against an earlier results file."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {_key(r): r for r in json.load(fh)["results"]}
+    print(f"\n{'scenario':<36} {'median (ms)':>12} {'vs base':>9} {'peak MB':>9} {'vs base':>9}")
+    for result in results:
+        base = baseline.get(_key(result))
+        time_delta = mem_delta = "new"
+        if base:
+            time_delta = f"{result['median_s'] / base['median_s'] - 1:+.1%}" if base["median_s"] else "—"
+            mem_delta = f"{result['peak_mb'] / base['peak_mb'] - 1:+.1%}" if base["peak_mb"] else "—"
+        print(f"{_key(result):<36} {result['median_s'] * 1e3:>12.3f} {time_delta:>9} "
+              f"{result['peak_mb']:>9.1f} {mem_delta:>9}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the planner helpers, exports and app rerun.")
+    parser.add_argument("-o", "--output", help="Results JSON (default benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--quick", action="store_true", help="Small sizes only (for a fast sanity pass)")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Run only scenarios whose name contains this text (repeatable)")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="Target seconds of timed repeats per scenario (default 2)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    results = []
+    for name, params, setup in scenarios(quick=args.quick):
+        if args.only and not any(text in name for text in args.only):
+            continue
+        result = run_scenario(name, params, setup, budget_seconds=args.budget)
+        results.append(result)
+        print(f"{_key(result):<36} median {result['median_s'] * 1e3:10.3f} ms  min {result['min_s'] * 1e3:10.3f} ms  "
+              f"peak {result['peak_mb']:.1f} MB  ({result['repeats']} runs)", file=sys.stderr)
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump({"meta": _metadata(), "quick": args.quick, "results": results}, fh, indent=2)
+    print(f"Results → {output}", file=sys.stderr)
+
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Headless planning core for the Monetize Guaranteed Media Planner (Seat 280).
+
+Rules, resolvers and forecasting formulas with no Streamlit dependency, so
+batch jobs and notebooks can import them directly. The Excel / PDF builders
+live in :mod:`mediaplanner.exporters` and are not imported here.
+"""
+
+from .rules import PRODUCT_RULES, REGION_CURRENCY, CPM_RECOMMENDATIONS
+from .resolvers import (
+    get_currency_symbol,
+    get_compatible_formats,
+    get_compatible_devices,
+    get_product_config,
+    generate_o_o_taxonomy,
+    generate_li_name,
+    is_video_product,
+    get_default_cpm,
+    is_cpd_product,
+    resolve_inventory_type,
+    resolve_inventory_targeting_mode,
+    validate_deal_format,
+    get_allowed_banner_sizes,
+    get_freq_cap_numeric,
+)
+from .product_index import (
+    PRODUCT_INDEX,
+    lookup_product_config,
+    list_valid_combinations,
+    product_matrix_frame,
+    resolve_deals_frame,
+)
+from .flights import Flight, FlightStore, group_flights
+from .forecasting import (
+    calc_avg_daily_uniques,
+    calc_avg_frequency_daily,
+    calc_lifetime_uniques,
+    calc_avg_daily_uniques_array,
+    calc_avg_frequency_daily_array,
+    calc_lifetime_uniques_array,
+    forecast_audience_array,
+)
+from .delivery import calculate_delivery_pressure, delivery_frame, simulate_delivery
+from .reach import simulate_reach
+
+__all__ = [
+    "PRODUCT_RULES",
+    "REGION_CURRENCY",
+    "CPM_RECOMMENDATIONS",
+    "get_currency_symbol",
+    "get_compatible_formats",
+    "get_compatible_devices",
+    "get_product_config",
+    "generate_o_o_taxonomy",
+    "generate_li_name",
+    "is_video_product",
+    "get_default_cpm",
+    "is_cpd_product",
+    "resolve_inventory_type",
+    "resolve_inventory_targeting_mode",
+    "validate_deal_format",
+    "get_allowed_banner_sizes",
+    "get_freq_cap_numeric",
+    "PRODUCT_INDEX",
+    "lookup_product_config",
+    "list_valid_combinations",
+    "product_matrix_frame",
+    "resolve_deals_frame",
+    "Flight",
+    "FlightStore",
+    "group_flights",
+    "calc_avg_daily_uniques",
+    "calc_avg_frequency_daily",
+    "calc_lifetime_uniques",
+    "calc_avg_daily_uniques_array",
+    "calc_avg_frequency_daily_array",
+    "calc_lifetime_uniques_array",
+    "forecast_audience_array",
+    "calculate_delivery_pressure",
+    "delivery_frame",
+    "simulate_delivery",
+    "simulate_reach",
+]
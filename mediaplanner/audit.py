@@ -0,0 +1,294 @@
+"""Bulk deal audit: the nine ``DealAuditor`` checks of ``src/main.js`` over a whole deal file.
+
+The browser tool audits one deal from a form. :func:`audit_deals` applies the
+same checks, thresholds and wording to every row of a deal frame as column
+operations:
+
+- every field is factorized and each check runs once per distinct value,
+  then is broadcast back to the rows by code — deal exports repeat the same
+  few hundred statuses, prices and KVP / geo / device lists, so a million
+  rows cost a handful of array passes
+- status and issue texts come back as categoricals, not a million strings
+
+Input columns follow the batch-audit layout of the README (``status``,
+``buyer_seat_id``, ``kvps_*``, ``geo``, ``devices``, ``segments``,
+``deal_list_id``, ``floor_price``, ``creative_approved``,
+``inventory_strength``, ``historical_performance``); deal exports shaped like
+``sample_deals.csv`` are read through ``AUDIT_FIELD_ALIASES`` (``kvps`` as
+``key=value;…``, ``market_country`` as geo, ``device_types`` as devices,
+``cpm_usd`` as floor price). A missing field audits as empty, exactly as a
+blank form field does.
+
+Values the form can produce audit exactly as in ``main.js`` (geo codes and
+KVP keys are case-sensitive, floor prices parse like ``parseFloat``). File
+cells can hold things the form cannot, and those differ on purpose:
+
+- cells are stripped, and lists split on ``;``, ``,`` or ``|`` (the form
+  splits segments on commas only)
+- device types match case-insensitively: deal exports write ``Desktop``,
+  the form's checkboxes send ``desktop``
+- a KVP counts when it has a value (``key=value``) or a true ``kvps_<key>``
+  flag; ``creative_approved`` is true for true / 1 / yes / y / approved
+- a floor price with no leading number is "Not Set" — ``parseFloat`` would
+  give NaN, which the JS scores as Competitive
+"""
+
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+MARKET_CPM_RANGE = (2.0, 15.0)
+REQUIRED_KVPS = ("msft_refresh", "brand_safety", "inventory_type")
+VALID_DEVICE_TYPES = ("mobile", "desktop", "tablet")
+VALID_COUNTRY_CODES = ("US", "CA", "GB", "DE", "FR", "AU", "JP", "IN", "BR", "MX")
+MAX_SEGMENTS = 5
+VALID_INVENTORY_STRENGTHS = ("Strong", "Moderate")
+VALID_HISTORICAL_PERFORMANCES = ("Good", "Mixed")
+
+# Check key → label, in the order of DealAuditor.validateDeal
+AUDIT_CHECKS = {
+    "deal_status":    "Deal Status",
+    "buyer_seat":     "Buyer Seat ID",
+    "kvps":           "KVPs",
+    "targeting":      "Targeting",
+    "deal_list":      "Deal List ID",
+    "floor_price":    "Floor Price",
+    "creative_audit": "Creative Audit",
+    "inventory":      "Inventory",
+    "historical":     "Historical Performance",
+}
+
+# (minimum %, outcome, recommendation), first match wins (calculateOutcome)
+AUDIT_OUTCOMES = [
+    (90.0, "HIGH ✅", "Deal ready for launch"),
+    (60.0, "MEDIUM ⚠️", "Address flagged issues before launch"),
+    (0.0, "LOW ❌", "Significant remediation required"),
+]
+
+# Audit field → columns read for it, first present wins
+AUDIT_FIELD_ALIASES = {
+    "deal_id":                ["deal_id"],
+    "status":                 ["status"],
+    "buyer_seat_id":          ["buyer_seat_id"],
+    "kvps":                   ["kvps"],
+    "geo":                    ["geo", "market_country"],
+    "devices":                ["devices", "device_types"],
+    "segments":               ["segments"],
+    "deal_list_id":           ["deal_list_id"],
+    "floor_price":            ["floor_price", "cpm_usd"],
+    "creative_approved":      ["creative_approved"],
+    "inventory_strength":     ["inventory_strength"],
+    "historical_performance": ["historical_performance"],
+}
+
+# Output columns: per check passed / status / issue, then the outcome
+AUDIT_COLUMNS = [
+    *(f"audit_{check}{suffix}" for check in AUDIT_CHECKS for suffix in ("", "_status", "_issue")),
+    "audit_checks_passed", "audit_percentage", "audit_outcome", "audit_recommendation",
+]
+
+_LIST_SEPARATORS = re.compile(r"[;,|]")
+_TRUE_VALUES = {"true", "1", "yes", "y", "approved"}
+_JS_FLOAT = re.compile(r"[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+
+def _factorized(deals, name) -> tuple:
+    """(codes, distinct stripped values) of the first column present for ``name``.
+
+    A missing column is a single blank value. Every check runs on the
+    distinct values and is broadcast back to the rows through ``codes``.
+    """
+    for column in AUDIT_FIELD_ALIASES.get(name, [name]):
+        if column in deals:
+            codes, uniques = pd.factorize(deals[column], use_na_sentinel=False)
+            return codes, np.array(["" if pd.isna(value) else str(value).strip() for value in uniques],
+                                   dtype=object)
+    return np.zeros(len(deals), dtype=np.int64), np.array([""], dtype=object)
+
+
+def _split(text) -> list:
+    return [item.strip() for item in _LIST_SEPARATORS.split(text) if item.strip()]
+
+
+def _parse_float(text) -> float:
+    """JavaScript ``parseFloat``: the longest numeric prefix, NaN when there is none."""
+    match = _JS_FLOAT.match(text.lstrip())
+    return float(match.group()) if match else np.nan
+
+
+def _labels(codes, per_unique) -> pd.Categorical:
+    """Row labels from one label per distinct value (None → missing), as a categorical."""
+    label_codes, categories = pd.factorize(pd.Series(list(per_unique), dtype=object))
+    return pd.Categorical.from_codes(label_codes[codes], categories=categories)
+
+
+def _missing_kvps(deals) -> np.ndarray:
+    """Per row: bitmask of the ``REQUIRED_KVPS`` that are missing (bit k = key k)."""
+    bits = 1 << np.arange(len(REQUIRED_KVPS))
+    codes, texts = _factorized(deals, "kvps")
+    present = np.array([sum(int(b) for b, key in zip(bits, REQUIRED_KVPS) if key in {
+        k.strip() for k, _, v in (pair.partition("=") for pair in _split(text)) if v.strip()})
+        for text in texts], dtype=np.int64)[codes]
+    # README layout: one kvps_<key> column per required key
+    for bit, key in zip(bits, REQUIRED_KVPS):
+        if f"kvps_{key}" in deals:
+            flag_codes, flags = _factorized(deals, f"kvps_{key}")
+            present |= np.array([flag.lower() in _TRUE_VALUES for flag in flags])[flag_codes] * int(bit)
+    return bits.sum() & ~present
+
+
+def _targeting_issues(deals) -> tuple:
+    """Per row: number of targeting issues and their text (checkTargeting)."""
+    def invalid(values, valid, normalize):
+        return [", ".join(item for item in _split(text) if normalize(item) not in valid) for text in values]
+
+    geo_codes, geos = _factorized(deals, "geo")
+    device_codes, devices = _factorized(deals, "devices")
+    segment_codes, segments = _factorized(deals, "segments")
+    geo_bad = invalid(geos, VALID_COUNTRY_CODES, str)
+    device_bad = invalid(devices, VALID_DEVICE_TYPES, str.lower)
+    too_many = np.array([len(_split(text)) > MAX_SEGMENTS for text in segments])[segment_codes]
+
+    # Issue text per distinct (geo, devices, too many segments) combination
+    combo_codes, combos = pd.factorize((geo_codes * len(devices) + device_codes) * 2 + too_many)
+    issue_lists = []
+    for combo in combos:
+        g, d, many = combo // 2 // len(devices), combo // 2 % len(devices), combo % 2
+        issue_lists.append([text for text in (f"Invalid countries: {geo_bad[g]}" if geo_bad[g] else "",
+                                              f"Invalid devices: {device_bad[d]}" if device_bad[d] else "",
+                                              "Too many segments (restrictive)" if many else "") if text])
+    counts = np.array([len(issues) for issues in issue_lists], dtype=np.int64)
+    return counts[combo_codes], _labels(combo_codes, ["; ".join(issues) or None for issues in issue_lists])
+
+
+def _check(deals, name, passes, status_pass, status_fail, issue) -> tuple:
+    """(passed, status, issue) of a fixed-wording check; ``passes`` tests one distinct value."""
+    codes, values = _factorized(deals, name)
+    passed = np.array([passes(value) for value in values], dtype=bool)
+    return (passed[codes], _labels(codes, [status_pass if ok else status_fail for ok in passed]),
+            _labels(codes, [None if ok else issue for ok in passed]))
+
+
+def audit_deals(deals: pd.DataFrame) -> pd.DataFrame:
+    """Run the nine DealAuditor checks on every row of ``deals``.
+
+    Returns ``deal_id`` plus ``AUDIT_COLUMNS``: for each check
+    ``audit_<check>`` (passed), ``audit_<check>_status`` and
+    ``audit_<check>_issue`` (missing when passed), then the number of
+    checks passed, the percentage and the HIGH / MEDIUM / LOW outcome with
+    its recommendation. Text columns are categoricals.
+    """
+    results = {
+        "deal_status": _check(deals, "status", lambda v: v == "Active",
+                              "Active", "Inactive/Archived", "Deal is not active"),
+        "buyer_seat": _check(deals, "buyer_seat_id", bool, "Present", "Missing", "Buyer seat ID missing"),
+    }
+
+    # Missing keys as a bitmask → one of 2^3 messages
+    missing = _missing_kvps(deals)
+    messages = [f"Missing: {', '.join(k for b, k in enumerate(REQUIRED_KVPS) if m >> b & 1)}" if m else None
+                for m in range(1 << len(REQUIRED_KVPS))]
+    results["kvps"] = (missing == 0, _labels(missing, ["Valid"] + ["Invalid"] * (len(messages) - 1)),
+                       _labels(missing, messages))
+
+    issue_count, issue_text = _targeting_issues(deals)
+    band = np.minimum(issue_count, 2)
+    results["targeting"] = (issue_count == 0, _labels(band, ["All Pass", "Minor Issue", "Multiple Issues"]),
+                            issue_text)
+
+    results["deal_list"] = _check(deals, "deal_list_id", bool, "Approved", "Unapproved", "Deal List ID missing")
+
+    low, high = MARKET_CPM_RANGE
+    price_codes, prices = _factorized(deals, "floor_price")
+    price = np.array([_parse_float(value) for value in prices], dtype=float)
+    price_band = np.select([np.isnan(price), price < low, price > high], [1, 2, 3], 0)[price_codes]
+    results["floor_price"] = (
+        price_band == 0,
+        _labels(price_band, ["Competitive", "Not Set", "Too Low", "Too High"]),
+        _labels(price_band, [None, "Floor price not specified", f"Below market minimum (${low:g})",
+                             f"Above market maximum (${high:g})"]),
+    )
+
+    results["creative_audit"] = _check(deals, "creative_approved", lambda v: v.lower() in _TRUE_VALUES,
+                                       "Approved", "Rejected/Pending", "Creative not approved")
+    for check, name, valid, fallback, issue in (
+            ("inventory", "inventory_strength", VALID_INVENTORY_STRENGTHS, "Insufficient",
+             "Insufficient inventory"),
+            ("historical", "historical_performance", VALID_HISTORICAL_PERFORMANCES, "Unknown",
+             "Poor historical performance")):
+        codes, values = _factorized(deals, name)
+        passed = np.isin(values, valid)
+        results[check] = (passed[codes], _labels(codes, [value or fallback for value in values]),
+                          _labels(codes, [None if ok else issue for ok in passed]))
+
+    id_column = next((c for c in AUDIT_FIELD_ALIASES["deal_id"] if c in deals), None)
+    out = {"deal_id": deals[id_column].to_numpy() if id_column else np.full(len(deals), None, dtype=object)}
+    for check in AUDIT_CHECKS:
+        passed, check_status, issue = results[check]
+        out[f"audit_{check}"] = np.asarray(passed, dtype=bool)
+        out[f"audit_{check}_status"] = check_status
+        out[f"audit_{check}_issue"] = issue
+
+    checks_passed = np.sum([out[f"audit_{check}"] for check in AUDIT_CHECKS], axis=0, dtype=np.int64)
+    percentage = np.round(checks_passed / len(AUDIT_CHECKS) * 100, 1)
+    band = np.select([percentage >= minimum for minimum, _, _ in AUDIT_OUTCOMES],
+                     np.arange(len(AUDIT_OUTCOMES)), len(AUDIT_OUTCOMES) - 1)
+    out["audit_checks_passed"] = checks_passed
+    out["audit_percentage"] = percentage
+    out["audit_outcome"] = _labels(band, [outcome for _, outcome, _ in AUDIT_OUTCOMES])
+    out["audit_recommendation"] = _labels(band, [text for _, _, text in AUDIT_OUTCOMES])
+    return pd.DataFrame(out, index=deals.index)
+
+
+def audit_deal(deal: dict) -> dict:
+    """One deal (field → value, as in ``AUDIT_FIELD_ALIASES``) in the DealAuditor result shape."""
+    row = audit_deals(pd.DataFrame([{key: value for key, value in deal.items() if value is not None}])).iloc[0]
+    result = {check: {"passed": bool(row[f"audit_{check}"]), "status": row[f"audit_{check}_status"],
+                      "issue": None if pd.isna(row[f"audit_{check}_issue"]) else row[f"audit_{check}_issue"]}
+              for check in AUDIT_CHECKS}
+    result["overall_outcome"] = {"outcome": row["audit_outcome"], "percentage": f"{row['audit_percentage']:.1f}",
+                                 "recommendation": row["audit_recommendation"]}
+    return result
+
+
+def audit_summary(results: pd.DataFrame) -> dict:
+    """Deal count, deals per outcome and pass rate per check of an :func:`audit_deals` frame."""
+    return {
+        "deals": len(results),
+        "outcomes": {outcome: int((results["audit_outcome"] == outcome).sum()) for _, outcome, _ in AUDIT_OUTCOMES},
+        "pass_rate": {check: float(results[f"audit_{check}"].mean()) if len(results) else 0.0
+                      for check in AUDIT_CHECKS},
+    }
+
+
+def audit_deal_file(input_path, output_path, chunksize: int = 250_000) -> dict:
+    """Stream ``input_path`` through :func:`audit_deals` into ``output_path``.
+
+    Returns the :func:`audit_summary` of the whole file plus seconds and rows per second.
+    """
+    started = time.perf_counter()
+    wanted = {column for columns in AUDIT_FIELD_ALIASES.values() for column in columns}
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype=str, index_col=False,
+                         keep_default_na=False, na_values=[""],
+                         usecols=lambda column: column in wanted or column.startswith("kvps_"))
+    outcomes = {outcome: 0 for _, outcome, _ in AUDIT_OUTCOMES}
+    passed = dict.fromkeys(AUDIT_CHECKS, 0)
+    rows = 0
+    for i, chunk in enumerate(reader):
+        results = audit_deals(chunk)
+        results.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        rows += len(results)
+        for outcome, count in audit_summary(results)["outcomes"].items():
+            outcomes[outcome] += count
+        for check in AUDIT_CHECKS:
+            passed[check] += int(results[f"audit_{check}"].sum())
+    seconds = time.perf_counter() - started
+    return {
+        "deals": rows,
+        "outcomes": outcomes,
+        "pass_rate": {check: count / rows if rows else 0.0 for check, count in passed.items()},
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,229 @@
+"""Batch planning of deal files shaped like ``sample_deals.csv``.
+
+Each row is resolved to a product × publisher × format × device line, checked
+against the format rules (Spec §4.3), priced (CPM impressions or CPD fixed fee)
+and run through the audience formulas (Spec §6) and the precomputed reach
+curves. Files are read in chunks so
+memory stays bounded regardless of input size.
+"""
+
+import time
+
+import pandas as pd
+
+from .rules import PRODUCT_RULES
+from .resolvers import get_freq_cap_numeric, is_cpd_product, validate_deal_format
+from .product_index import compatible_devices, compatible_formats, lookup_product_config
+from .forecasting import forecast_audience_array
+from .reach_curves import curve_reach_array, slot_audience
+from .creative_sizes import check_creative_sizes
+from .naming import taxonomy_names
+
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_TURNOVER_RATE = 0.30
+
+# ── DEAL FILE → PRODUCT RULES MAPPING ────────────────────────────────────────
+
+# Product names used in deal exports → PRODUCT_RULES keys. PMPs have no entry
+# (Seat 280 is Monetize Guaranteed only) and are reported as unresolved.
+DEAL_PRODUCT_ALIASES = {
+    "High Impact PG":        "High Impact",
+    "PG First Impact":       "PG - First Impression",
+    "PG First Impression":   "PG - First Impression",
+    "PG Standard":           "PG - Standard",
+    "GDALI Impressions":     "GDALI - Impressions",
+    "Outlook Takeover":      "GDALI - Outlook Takeover",
+    "MSN Takeover":          "GDALI - MSN Takeover",
+    "MSN Vertical Takeover": "GDALI - MSN Takeover",
+    "MSN HP Takeover":       "GDALI - MSN Takeover",
+    **{name: name for name in PRODUCT_RULES},
+}
+
+# creative_type → ad format
+_CREATIVE_FORMATS = {"Display": "Banner", "Banner": "Banner", "Video": "Video", "Native": "Native"}
+
+# Output columns appended to every input row, in order
+PLAN_COLUMNS = [
+    "plan_product", "plan_publisher", "plan_format", "plan_device",
+    "plan_valid", "plan_issue",
+    "plan_line_item_type", "plan_priority", "plan_frequency_cap", "plan_pacing",
+    "plan_revenue_type", "plan_flight_days", "plan_total_cost", "plan_impressions",
+    "plan_avg_daily_uniques", "plan_avg_frequency", "plan_lifetime_uniques",
+    "plan_curve_reach", "plan_creative_fit", "plan_rejected_sizes", "plan_taxonomy",
+]
+
+
+def _resolve_publisher(targeting: pd.Series) -> pd.Series:
+    """Derive the publisher from publisher_targeting / kvps text."""
+    text = targeting.fillna("").str.lower()
+    publisher = pd.Series("", index=targeting.index, dtype=object)
+    publisher[text.str.contains("pub=msn", regex=False)] = "MSN"
+    publisher[text.str.contains("outlook", regex=False)] = "Outlook"
+    publisher[text.str.contains("microsoftcasualgames|pub=mcg", regex=True)] = "MCG"
+    return publisher
+
+
+def _resolve_device(device_types: pd.Series) -> pd.Series:
+    """Spec §4.4 device slots: Desktop + Mobile → All Devices, else the single slot."""
+    text = device_types.fillna("").str.lower()
+    has_desktop = text.str.contains("desktop", regex=False)
+    has_mobile = text.str.contains("mobile", regex=False)
+    device = pd.Series("All Devices", index=device_types.index, dtype=object)
+    device[has_desktop & ~has_mobile] = "Desktop"
+    device[has_mobile & ~has_desktop] = "Mobile"
+    return device
+
+
+# Resolved-config fields copied onto each planned row
+_CONFIG_COLUMNS = {
+    "plan_line_item_type": "line_item_type",
+    "plan_priority":       "priority",
+    "plan_frequency_cap":  "frequency_cap",
+    "plan_pacing":         "pacing",
+    "plan_revenue_type":   "revenue_type",
+}
+_NO_CONFIG = dict.fromkeys(_CONFIG_COLUMNS, "")
+_LINE_KEYS = ["product", "publisher", "format", "device"]
+
+
+def _resolve_line(product, publisher, ad_format, device):
+    """Resolve one unique line to its plan_* publisher/device/validation/config values."""
+    if not product:
+        return {"plan_publisher": publisher, "plan_device": device, "plan_valid": False,
+                "plan_issue": "Not a Monetize Guaranteed product", "freq_cap": 0, "cpd": False,
+                "audience": 0.0, **_NO_CONFIG}
+    product_info = PRODUCT_RULES[product]
+    if not publisher:
+        publisher = product_info["publishers"][0]
+    if publisher not in product_info["publishers"]:
+        return {"plan_publisher": publisher, "plan_device": device, "plan_valid": False,
+                "plan_issue": f"{publisher} is not sold for {product}", "freq_cap": 0, "cpd": False,
+                "audience": 0.0, **_NO_CONFIG}
+
+    valid, issue = validate_deal_format(product, ad_format)
+    if valid and ad_format not in compatible_formats(product, publisher):
+        valid, issue = False, f"{publisher} {ad_format} does not exist for {product}"
+
+    devices = compatible_devices(product, publisher, ad_format)
+    if device not in devices:
+        device = "All Devices" if "All Devices" in devices else devices[0]
+    config = lookup_product_config(product, publisher, ad_format, device)
+    return {"plan_publisher": publisher, "plan_device": device, "plan_valid": valid, "plan_issue": issue,
+            "freq_cap": get_freq_cap_numeric(product), "cpd": is_cpd_product(product),
+            "audience": slot_audience(publisher, device),
+            **{col: config.get(field, "") for col, field in _CONFIG_COLUMNS.items()}}
+
+
+def _deal_lines(deals: pd.DataFrame) -> tuple:
+    """(line keys, resolved line values) for every row of a non-empty deal frame.
+
+    Each unique product × publisher × format × device line is resolved once
+    and joined back onto the rows with a single merge.
+    """
+    blank = pd.Series("", index=deals.index)
+    keys = pd.DataFrame({
+        "product": deals["product_name"].map(DEAL_PRODUCT_ALIASES).fillna(""),
+        "publisher": _resolve_publisher(deals["publisher_targeting"].fillna("") + ";"
+                                        + deals.get("kvps", blank).fillna("")),
+        "format": deals.get("creative_type", blank).map(_CREATIVE_FORMATS).fillna("Banner"),
+        "device": _resolve_device(deals.get("device_types", blank)),
+    })
+    unique = keys.drop_duplicates().reset_index(drop=True)
+    resolved = unique.join(pd.DataFrame(
+        [_resolve_line(*key) for key in unique.itertuples(index=False, name=None)]
+    ))
+    return keys, keys.merge(resolved, on=_LINE_KEYS, how="left").set_index(deals.index)
+
+
+def plan_deals(deals: pd.DataFrame, turnover_rate: float = DEFAULT_TURNOVER_RATE) -> pd.DataFrame:
+    """Return ``deals`` with the ``PLAN_COLUMNS`` appended.
+
+    Config resolution runs once per unique product × publisher × format × device
+    line in the frame and is joined back onto the rows with a single merge.
+    """
+    out = deals.copy()
+    if out.empty:
+        return out.reindex(columns=list(out.columns) + PLAN_COLUMNS)
+
+    blank = pd.Series("", index=out.index)
+    keys, lines = _deal_lines(out)
+
+    out["plan_product"] = keys["product"].replace("", None)
+    out["plan_format"] = keys["format"]
+    for col in ["plan_publisher", "plan_device", "plan_valid", "plan_issue", *_CONFIG_COLUMNS]:
+        out[col] = lines[col]
+    freq_caps = lines["freq_cap"].to_numpy(dtype=float)
+    cpd = lines["cpd"].astype(bool)
+
+    # ── Flight window ────────────────────────────────────────────────────────
+    start = pd.to_datetime(out["flight_start"], errors="coerce")
+    end = pd.to_datetime(out["flight_end"], errors="coerce")
+    flight_days = ((end - start).dt.days + 1).clip(lower=1)
+    missing_dates = flight_days.isna()
+    flight_days = flight_days.fillna(0).astype(int)
+    out["plan_valid"] = out["plan_valid"].astype(bool) & ~missing_dates
+    out["plan_issue"] = out["plan_issue"].where(
+        (out["plan_issue"] != "") | ~missing_dates, "Missing or invalid flight dates"
+    )
+    out["plan_flight_days"] = flight_days
+
+    # ── Pricing: CPD = daily rate × days, CPM = (spend ÷ CPM) × 1,000 ────────
+    budget = pd.to_numeric(out["budget_usd"], errors="coerce").fillna(0.0)
+    cpm = pd.to_numeric(out["cpm_usd"], errors="coerce").fillna(0.0)
+    cost_per_day = pd.to_numeric(out["cost_per_day_usd"], errors="coerce").fillna(0.0)
+
+    cpm_imps = (budget / cpm.where(cpm > 0)) * 1000
+    out["plan_total_cost"] = budget.where(~cpd, cost_per_day * flight_days)
+    out["plan_impressions"] = cpm_imps.fillna(0.0).where(~cpd, 0.0)
+
+    # ── Audience formulas (Spec §6) ──────────────────────────────────────────
+    (out["plan_avg_daily_uniques"],
+     out["plan_avg_frequency"],
+     out["plan_lifetime_uniques"]) = forecast_audience_array(
+        out["plan_impressions"].to_numpy(), flight_days.to_numpy(),
+        freq_caps, turnover_rate,
+    )
+    # Saturating reach from the precomputed curves (mediaplanner.reach_curves)
+    out["plan_curve_reach"] = curve_reach_array(
+        out["plan_impressions"].to_numpy(), flight_days.to_numpy(), freq_caps,
+        lines["audience"].to_numpy(dtype=float), turnover_rate,
+    )
+
+    # ── Creative sizes vs the line's accepted sizes / min_creatives ─────────
+    creatives = check_creative_sizes(pd.DataFrame({
+        "ad_sizes": out.get("ad_sizes", blank), "product": keys["product"], "publisher": lines["plan_publisher"],
+        "format": keys["format"], "device": lines["plan_device"],
+    }))
+    out["plan_creative_fit"] = creatives["creative_fit"]
+    out["plan_rejected_sizes"] = creatives["creative_rejected_sizes"]
+
+    # ── O&O taxonomy (the name the line runs under in the ad server) ────────
+    out["plan_taxonomy"] = taxonomy_names(pd.DataFrame({
+        "market": out.get("market_country", blank).fillna("").str.strip(), "publisher": lines["plan_publisher"],
+        "product": keys["product"], "format": keys["format"], "device": lines["plan_device"],
+    })).where(out["plan_valid"].to_numpy())
+    return out[list(deals.columns) + PLAN_COLUMNS]
+
+
+def plan_deal_file(input_path, output_path, chunksize: int = DEFAULT_CHUNKSIZE,
+                   turnover_rate: float = DEFAULT_TURNOVER_RATE) -> dict:
+    """Stream ``input_path`` through :func:`plan_deals` into ``output_path``.
+
+    Returns run statistics: rows, invalid rows, seconds and rows per second.
+    """
+    rows = invalid = 0
+    started = time.perf_counter()
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype=str, index_col=False,
+                         keep_default_na=False, na_values=[""])
+    for i, chunk in enumerate(reader):
+        planned = plan_deals(chunk, turnover_rate=turnover_rate)
+        planned.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        rows += len(planned)
+        invalid += int((~planned["plan_valid"].astype(bool)).sum())
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "invalid": invalid,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }
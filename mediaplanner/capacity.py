@@ -0,0 +1,257 @@
+"""Inventory capacity and overbooking across a whole book of deals.
+
+Every deal is resolved to its publisher × device slot (the line resolution
+of :mod:`mediaplanner.batch`, without the per-row forecasts) and split
+evenly across its markets, giving one booking interval per deal × market
+with a flat daily volume:
+
+- CPM lines book ``impression_goal`` (or spend ÷ CPM × 1,000) ÷ flight days
+- fixed-fee takeovers (CPD) are exclusive and book the slot's whole capacity
+
+A deal's ``expected_daily_capacity_imps`` is the slot's capacity for that
+deal's own flight days only (in a deal file only takeovers report one — it
+is what they book). Every other day takes the slot's capacity from an
+explicit ``default_capacity[(publisher, device)]`` table; slot-days with
+neither are tracked but never flagged.
+
+Booked volume per slot and day is a sweep line: +rate on the start day and
+−rate the day after the end, scattered into one flat day-bin array with
+``np.bincount`` and summed with ``np.cumsum`` — no per-deal Python loop, so
+hundreds of thousands of deals over a multi-year horizon take a few array
+passes. Overbooked windows are the runs of consecutive days above capacity.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .batch import _deal_lines
+from .resolvers import is_cpd_product
+from .rules import PRODUCT_RULES
+
+# Columns read from a deal file (line resolution, flight, volume and capacity)
+DEAL_COLUMNS = [
+    "deal_id", "product_name", "market_country", "publisher_targeting", "kvps",
+    "creative_type", "device_types", "flight_start", "flight_end",
+    "budget_usd", "cpm_usd", "impression_goal",
+    "expected_daily_capacity_imps",
+]
+
+SLOT_KEYS = ["publisher", "device", "market"]
+
+_CPD_PRODUCTS = [product for product in PRODUCT_RULES if is_cpd_product(product)]
+
+# Slot-days spread per batch when laying reported capacities onto the grid
+_SPREAD_CHUNK = 1 << 20
+
+
+def _numeric(frame, column) -> pd.Series:
+    if column not in frame:
+        return pd.Series(np.nan, index=frame.index)
+    return pd.to_numeric(frame[column], errors="coerce")
+
+
+def booking_intervals(deals: pd.DataFrame) -> pd.DataFrame:
+    """One row per deal × market: slot, first / last day, daily volume and reported capacity.
+
+    Deals without a publisher or valid flight dates are dropped. PMP and
+    other non-guaranteed rows still consume inventory and are kept.
+    """
+    if deals.empty:
+        return pd.DataFrame(columns=["deal_id", *SLOT_KEYS, "start", "end", "daily_imps", "exclusive", "capacity"])
+    keys, lines = _deal_lines(deals)
+    start = pd.to_datetime(deals["flight_start"], errors="coerce")
+    end = pd.to_datetime(deals["flight_end"], errors="coerce")
+    keep = (lines["plan_publisher"].fillna("") != "") & start.notna() & end.notna() & (end >= start)
+    flight_days = ((end - start).dt.days + 1).clip(lower=1).fillna(0)
+
+    # Goal, else spend ÷ CPM × 1,000 (takeovers book the slot, not a volume)
+    goal = _numeric(deals, "impression_goal")
+    cpm = _numeric(deals, "cpm_usd")
+    volume = goal.where(goal > 0, _numeric(deals, "budget_usd") / cpm.where(cpm > 0) * 1000).fillna(0.0)
+    cpd = keys["product"].isin(_CPD_PRODUCTS)
+
+    # Split each distinct market list once, then repeat rows per market (no per-row split)
+    codes, market_lists = pd.factorize(deals["market_country"].fillna("").astype(str))
+    market_lists = [[m.strip().upper() or "ALL" for m in text.split(";")] for text in market_lists]
+    n_markets = np.array([len(markets) for markets in market_lists], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(n_markets)[:-1]])
+    flat_markets = np.array([m for markets in market_lists for m in markets], dtype=object)
+
+    rows = np.flatnonzero(keep.to_numpy())
+    per_row = n_markets[codes[rows]]
+    repeated = np.repeat(rows, per_row)
+    within = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    deal_ids = deals["deal_id"] if "deal_id" in deals else pd.Series(deals.index, index=deals.index)
+    daily = (volume / flight_days.clip(lower=1)).to_numpy(dtype=float) / n_markets[codes]
+
+    return pd.DataFrame({
+        "deal_id": deal_ids.to_numpy()[repeated],
+        "publisher": lines["plan_publisher"].to_numpy()[repeated],
+        "device": lines["plan_device"].to_numpy()[repeated],
+        "market": flat_markets[offsets[codes[repeated]] + within],
+        "start": start.dt.normalize().to_numpy()[repeated],
+        "end": end.dt.normalize().to_numpy()[repeated],
+        "daily_imps": daily[repeated],
+        "exclusive": cpd.to_numpy()[repeated],
+        "capacity": _numeric(deals, "expected_daily_capacity_imps").to_numpy()[repeated],
+    })
+
+
+def _day_spans(intervals, first, n_days) -> tuple:
+    """(inside mask, first bin, one-past-last bin) of every interval, clipped to the horizon."""
+    begin = (intervals["start"].to_numpy().astype("datetime64[D]") - first).astype(np.int64)
+    stop = (intervals["end"].to_numpy().astype("datetime64[D]") - first).astype(np.int64) + 1
+    inside = (stop > 0) & (begin < n_days)
+    return inside, np.clip(begin, 0, n_days), np.clip(stop, 0, n_days)
+
+
+def _sweep(rows, begin, stop, weights, n_slots, n_days) -> np.ndarray:
+    """Slots × days sum of ``weights`` over each ``[begin, stop)`` run: +w at the start, −w one past the end."""
+    width = n_days + 1
+    bins = np.concatenate([rows * width + begin, rows * width + stop])
+    totals = np.bincount(bins, weights=np.concatenate([weights, -weights]), minlength=n_slots * width)
+    return np.cumsum(totals.reshape(n_slots, width), axis=1)[:, :n_days]
+
+
+def capacity_grid(intervals: pd.DataFrame, default_capacity=None, start=None, end=None) -> dict:
+    """Booked volume and capacity per slot × day for :func:`booking_intervals` rows.
+
+    Returns ``slots`` (publisher / device / market / default_capacity frame),
+    ``dates`` (datetime64[D]) and slots × days arrays: ``capacity`` (NaN
+    where unknown), ``booked`` impressions and concurrent ``deals``. A
+    reported capacity holds on its deal's days (the largest when reports
+    overlap), the ``default_capacity`` table everywhere else. ``start`` /
+    ``end`` clip the horizon, which defaults to the span of all bookings.
+    """
+    first = np.datetime64(pd.Timestamp(start), "D") if start is not None else \
+        intervals["start"].min().to_datetime64().astype("datetime64[D]") if len(intervals) else None
+    last = np.datetime64(pd.Timestamp(end), "D") if end is not None else \
+        intervals["end"].max().to_datetime64().astype("datetime64[D]") if len(intervals) else None
+    if first is None or last < first:
+        empty = pd.DataFrame(columns=SLOT_KEYS + ["default_capacity"])
+        return {"slots": empty, "dates": np.array([], dtype="datetime64[D]"), "capacity": np.zeros((0, 0)),
+                "booked": np.zeros((0, 0)), "deals": np.zeros((0, 0), dtype=np.int64)}
+    n_days = int((last - first).astype(int)) + 1
+
+    slot_codes, slots = pd.MultiIndex.from_frame(intervals[SLOT_KEYS]).factorize()
+    slots = slots.set_names(SLOT_KEYS).to_frame(index=False)
+    n_slots = len(slots)
+    default = np.full(n_slots, np.nan)
+    if default_capacity:
+        default = np.array([default_capacity.get((pub, dev), np.nan)
+                            for pub, dev in zip(slots["publisher"], slots["device"])], dtype=float)
+    slots["default_capacity"] = default
+
+    inside, begin, stop = _day_spans(intervals, first, n_days)
+    rows, begin, stop = slot_codes[inside], begin[inside], stop[inside]
+
+    # Reported capacity: spread over its deal's own days only, the largest where reports overlap
+    reported = intervals["capacity"].to_numpy(dtype=float)[inside]
+    has = np.flatnonzero(reported > 0)
+    spans = stop[has] - begin[has]
+    capacity = np.full(n_slots * n_days, -np.inf)
+    cuts = np.searchsorted(np.cumsum(spans), np.arange(_SPREAD_CHUNK, spans.sum(), _SPREAD_CHUNK))
+    for part in np.split(np.arange(len(has)), cuts):  # bounded slot-day batches keep memory flat
+        owner = np.repeat(has[part], spans[part])
+        days = begin[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(spans[part]) - spans[part], spans[part])
+        np.maximum.at(capacity, rows[owner] * n_days + days, reported[owner])
+    capacity = capacity.reshape(n_slots, n_days)
+    np.copyto(capacity, np.broadcast_to(default[:, None], capacity.shape), where=np.isneginf(capacity))
+
+    # Takeovers are exclusive: each books whatever the slot holds that day
+    exclusive = intervals["exclusive"].to_numpy(dtype=bool)[inside]
+    rate = np.where(exclusive, 0.0, intervals["daily_imps"].to_numpy(dtype=float)[inside])
+    held = np.rint(_sweep(rows, begin, stop, exclusive.astype(float), n_slots, n_days))
+    booked = _sweep(rows, begin, stop, rate, n_slots, n_days) + held * np.nan_to_num(capacity)
+    counts = _sweep(rows, begin, stop, np.ones(len(rows)), n_slots, n_days)
+
+    return {
+        "slots": slots,
+        "dates": first + np.arange(n_days),
+        "capacity": capacity,
+        "booked": np.maximum(booked, 0.0),  # clears cumsum round-off
+        "deals": np.rint(counts).astype(np.int64),
+    }
+
+
+def overbooked_windows(grid: dict) -> pd.DataFrame:
+    """Runs of consecutive days where a slot's booked volume exceeds its capacity.
+
+    One row per window: slot, first / last day, days, capacity (the lowest
+    in the window), peak booked, peak utilisation, overbooked impressions
+    (sum of the daily excess) and the most concurrent bookings. Slot-days of
+    unknown capacity are never overbooked. Sorted by overbooked impressions,
+    largest first.
+    """
+    columns = SLOT_KEYS + ["start", "end", "days", "capacity", "peak_booked", "peak_utilization",
+                           "overbooked_imps", "max_concurrent_deals"]
+    booked, capacity, slots = grid["booked"], grid["capacity"], grid["slots"]
+    if not booked.size:
+        return pd.DataFrame(columns=columns)
+    with np.errstate(invalid="ignore"):
+        over = booked > capacity * (1 + 1e-9)
+    if not over.any():
+        return pd.DataFrame(columns=columns)
+
+    n_days = booked.shape[1]
+    edges = np.diff(np.pad(over, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    slot_idx, first = np.nonzero(edges == 1)
+    _, stop = np.nonzero(edges == -1)  # same row-major order, so runs pair up
+
+    # Per-window reductions over the flattened grid; every run is contiguous in it
+    offsets = slot_idx * n_days
+    bounds = np.column_stack([offsets + first, offsets + stop]).ravel()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = booked / capacity
+    excess = np.append((booked - capacity).ravel(), 0.0)
+    flat_booked = np.append(booked.ravel(), 0.0)
+    flat_capacity = np.append(capacity.ravel(), 0.0)
+    flat_utilization = np.append(utilization.ravel(), 0.0)
+    flat_deals = np.append(grid["deals"].ravel(), 0)
+    peak = np.maximum.reduceat(flat_booked, bounds)[::2]
+
+    windows = slots.iloc[slot_idx][SLOT_KEYS].reset_index(drop=True)
+    windows["start"] = pd.to_datetime(grid["dates"][first])
+    windows["end"] = pd.to_datetime(grid["dates"][stop - 1])
+    windows["days"] = stop - first
+    windows["capacity"] = np.minimum.reduceat(flat_capacity, bounds)[::2]
+    windows["peak_booked"] = peak
+    windows["peak_utilization"] = np.maximum.reduceat(flat_utilization, bounds)[::2]
+    windows["overbooked_imps"] = np.add.reduceat(excess, bounds)[::2]
+    windows["max_concurrent_deals"] = np.maximum.reduceat(flat_deals, bounds)[::2]
+    return windows.sort_values("overbooked_imps", ascending=False, ignore_index=True)[columns]
+
+
+def capacity_frame(grid: dict) -> pd.DataFrame:
+    """Long-form booked vs capacity for every slot-day with at least one booking."""
+    booked, slots = grid["booked"], grid["slots"]
+    slot_idx, day_idx = np.nonzero(grid["deals"] > 0)
+    frame = slots.iloc[slot_idx][SLOT_KEYS].reset_index(drop=True)
+    frame["date"] = pd.to_datetime(grid["dates"][day_idx])
+    frame["booked_imps"] = booked[slot_idx, day_idx]
+    frame["capacity"] = grid["capacity"][slot_idx, day_idx]
+    frame["utilization"] = frame["booked_imps"] / frame["capacity"].where(frame["capacity"] > 0)
+    frame["deals"] = grid["deals"][slot_idx, day_idx]
+    return frame
+
+
+def check_capacity(deals: pd.DataFrame, default_capacity=None, start=None, end=None):
+    """``(grid, windows)`` for a deal frame shaped like ``sample_deals.csv``."""
+    grid = capacity_grid(booking_intervals(deals), default_capacity=default_capacity, start=start, end=end)
+    return grid, overbooked_windows(grid)
+
+
+def read_deals(path) -> pd.DataFrame:
+    """Load only the columns the capacity check needs from a deal CSV."""
+    return pd.read_csv(path, dtype=str, index_col=False, keep_default_na=False, na_values=[""],
+                       usecols=lambda column: column in DEAL_COLUMNS)
+
+
+def read_capacity_table(path) -> dict:
+    """``(publisher, device) → daily impressions`` from a CSV with ``publisher,device,daily_capacity_imps``."""
+    frame = pd.read_csv(path, dtype={"publisher": str, "device": str}, skipinitialspace=True)
+    missing = {"publisher", "device", "daily_capacity_imps"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"{path}: missing capacity column(s) {', '.join(sorted(missing))}")
+    return {(pub.strip(), dev.strip()): float(imps)
+            for pub, dev, imps in zip(frame["publisher"], frame["device"], frame["daily_capacity_imps"])}
@@ -0,0 +1,202 @@
+"""Command-line entry point.
+
+    python -m mediaplanner plan deals.csv -o planned.csv
+    python -m mediaplanner timings planner_timings.jsonl
+    python -m mediaplanner capacity deals.csv --default-capacity slots.csv -o overbooked.csv
+    python -m mediaplanner takeovers deals.csv
+    python -m mediaplanner reach-curves
+    python -m mediaplanner optimize 250000 --days 31 --objective reach
+    python -m mediaplanner audit deals.csv -o audited.csv
+    python -m mediaplanner eligible "970x250;728x90;300x250"
+    python -m mediaplanner plans --advertiser Contoso --market US
+    python -m mediaplanner fx --convert 1000 GBP EUR
+    python -m mediaplanner names report.csv --column line_item -o joined.csv
+"""
+
+import argparse
+import sys
+
+from .audit import AUDIT_CHECKS, audit_deal_file
+from .batch import DEFAULT_CHUNKSIZE, DEFAULT_TURNOVER_RATE, plan_deal_file
+from .creative_sizes import eligible_lines, line_sizes, parse_sizes
+from .capacity import check_capacity, read_capacity_table, read_deals
+from .takeovers import scan_conflicts
+from .reach_curves import default_cache_dir, load_reach_curves
+from .plan_store import DEFAULT_DB_PATH, PlanStore
+from .fx import default_fx_path, fx_versions, load_fx_rates, rollup
+from .naming import parse_name_file
+from .optimizer import DEFAULT_STEPS, OBJECTIVES, optimize_budget
+from .timing import DEFAULT_LOG_PATH, summarize_log
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mediaplanner", description="Monetize Guaranteed media planner (headless).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", help="Plan every row of a deal CSV and write an enriched CSV")
+    plan.add_argument("input", help="Deal file shaped like sample_deals.csv")
+    plan.add_argument("-o", "--output", required=True, help="Enriched output CSV")
+    plan.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                      help=f"Rows per chunk (default {DEFAULT_CHUNKSIZE:,})")
+    plan.add_argument("--turnover", type=float, default=DEFAULT_TURNOVER_RATE,
+                      help="Daily audience turnover rate for lifetime uniques (default 0.30)")
+
+    timings = sub.add_parser("timings", help="Summarise a rerun timing log (p50 / p95 per section and helper)")
+    timings.add_argument("log", nargs="?", default=DEFAULT_LOG_PATH,
+                         help=f"JSON-lines timing log (default {DEFAULT_LOG_PATH})")
+
+    capacity = sub.add_parser("capacity", help="Booked vs capacity per publisher × device × market × day")
+    capacity.add_argument("input", help="Deal file shaped like sample_deals.csv")
+    capacity.add_argument("-o", "--output", help="Write the overbooked windows to this CSV")
+    capacity.add_argument("--start", help="First day of the horizon (default: earliest flight start)")
+    capacity.add_argument("--end", help="Last day of the horizon (default: latest flight end)")
+    capacity.add_argument("--default-capacity", metavar="CSV",
+                          help="publisher,device,daily_capacity_imps table for days no deal reports a capacity "
+                               "(without it only takeover windows are checked)")
+
+    takeovers = sub.add_parser("takeovers", help="List exclusive takeovers overlapping on the same publisher × market")
+    takeovers.add_argument("input", help="Deal file shaped like sample_deals.csv")
+    takeovers.add_argument("-o", "--output", help="Write the conflicting pairs to this CSV")
+
+    curves = sub.add_parser("reach-curves", help="Build (or load) the reach-curve tables in the cache directory")
+    curves.add_argument("--cache-dir", help="Cache directory (default MEDIAPLANNER_CACHE_DIR or ~/.cache/mediaplanner)")
+
+    optimize = sub.add_parser("optimize", help="Split a total budget across every CPM product × publisher × format line")
+    optimize.add_argument("budget", type=float, help="Total budget")
+    optimize.add_argument("--days", type=int, default=30, help="Flight days (default 30)")
+    optimize.add_argument("--objective", choices=OBJECTIVES, default="reach", help="What to maximize (default reach)")
+    optimize.add_argument("--min", action="append", default=[], metavar="PRODUCT=AMOUNT",
+                          help="Minimum spend for a product (repeatable)")
+    optimize.add_argument("--max", action="append", default=[], metavar="PRODUCT=AMOUNT",
+                          help="Maximum spend for a product (repeatable)")
+    optimize.add_argument("--turnover", type=float, default=DEFAULT_TURNOVER_RATE,
+                          help="Daily audience turnover rate (default 0.30)")
+    optimize.add_argument("--steps", type=int, default=DEFAULT_STEPS,
+                          help=f"Budget steps (default {DEFAULT_STEPS})")
+
+    audit = sub.add_parser("audit", help="Run the DealAuditor checks on every row of a deal CSV")
+    audit.add_argument("input", help="Deal file (batch-audit columns or shaped like sample_deals.csv)")
+    audit.add_argument("-o", "--output", required=True, help="Audit results CSV")
+    audit.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                       help=f"Rows per chunk (default {DEFAULT_CHUNKSIZE:,})")
+
+    eligible = sub.add_parser("eligible", help="List the product × publisher × format × device lines a creative set fits")
+    eligible.add_argument("sizes", nargs="+", help="Creative sizes, e.g. 970x250 728x90 or \"970x250;728x90\"")
+
+    plans = sub.add_parser("plans", help="Search the saved plans in a plan store")
+    plans.add_argument("--db", default=DEFAULT_DB_PATH, help=f"Plan store (default {DEFAULT_DB_PATH})")
+    plans.add_argument("--advertiser", help="Advertiser (exact)")
+    plans.add_argument("--market", help="Market code")
+    plans.add_argument("--publisher", help="Plans with a flight on this publisher")
+    plans.add_argument("--product", help="Plans with a flight of this product")
+    plans.add_argument("--start", help="Plans running on or after this date (YYYY-MM-DD)")
+    plans.add_argument("--end", help="Plans running on or before this date (YYYY-MM-DD)")
+    plans.add_argument("--limit", type=int, default=50, help="Most recent N plans (default 50)")
+    plans.add_argument("--currency", help="Also total the budgets of the plans found in this currency (ISO code)")
+
+    fx = sub.add_parser("fx", help="Show the FX rate table or convert an amount")
+    fx.add_argument("--rates", help="Rate file (default MEDIAPLANNER_FX_RATES or the packaged fx_rates.csv)")
+    fx.add_argument("--version", help="Rates in effect on this date (YYYY-MM-DD; default the latest)")
+    fx.add_argument("--convert", nargs=3, metavar=("AMOUNT", "FROM", "TO"), help="Convert AMOUNT from one currency to another")
+
+    names = sub.add_parser("names", help="Split the O&O taxonomy / line-item names of a report CSV into columns")
+    names.add_argument("input", help="Report CSV with one name per row")
+    names.add_argument("-o", "--output", required=True, help="Report CSV with the parsed fields appended")
+    names.add_argument("--column", default="line_item_name", help="Column holding the names (default line_item_name)")
+    names.add_argument("--kind", choices=("taxonomy", "li_name"), default="taxonomy",
+                       help="taxonomy: market_publisher_product_format_device_licode_metric (default); "
+                            "li_name: advertiser_market_publisher_product")
+    names.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                       help=f"Rows per chunk (default {DEFAULT_CHUNKSIZE:,})")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "plan":
+        stats = plan_deal_file(args.input, args.output, chunksize=args.chunksize,
+                               turnover_rate=args.turnover)
+        print(
+            f"Planned {stats['rows']:,} deals ({stats['invalid']:,} with issues) "
+            f"in {stats['seconds']:.2f}s · {stats['rows_per_second']:,.0f} rows/s → {args.output}",
+            file=sys.stderr,
+        )
+    elif args.command == "timings":
+        print(f"{'kind':<8} {'name':<36} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+        for row in summarize_log(args.log):
+            print(f"{row['kind']:<8} {row['name']:<36} {row['count']:>6} {row['p50_s'] * 1e3:>10.2f} "
+                  f"{row['p95_s'] * 1e3:>10.2f} {row['max_s'] * 1e3:>10.2f}")
+    elif args.command == "capacity":
+        default = read_capacity_table(args.default_capacity) if args.default_capacity else None
+        grid, windows = check_capacity(read_deals(args.input), default_capacity=default,
+                                       start=args.start, end=args.end)
+        print(f"{len(grid['slots']):,} slots × {len(grid['dates']):,} days · "
+              f"{len(windows):,} overbooked window(s)", file=sys.stderr)
+        if args.output:
+            windows.to_csv(args.output, index=False)
+        else:
+            print(windows.to_string(index=False))
+    elif args.command == "takeovers":
+        conflicts = scan_conflicts(read_deals(args.input))
+        print(f"{len(conflicts):,} conflicting takeover pair(s)", file=sys.stderr)
+        if args.output:
+            conflicts.to_csv(args.output, index=False)
+        else:
+            print(conflicts.to_string(index=False))
+    elif args.command == "reach-curves":
+        curves = load_reach_curves(args.cache_dir)
+        print(f"Reach curves for caps {', '.join(map(str, curves['caps']))}: "
+              f"{curves['share'].size:,} points ({curves['share'].nbytes / 1024:,.0f} KiB) "
+              f"in {args.cache_dir or default_cache_dir()}", file=sys.stderr)
+    elif args.command == "optimize":
+        def _amounts(pairs):
+            return {name.strip(): float(amount) for name, amount in (pair.rsplit("=", 1) for pair in pairs)}
+
+        result = optimize_budget(args.budget, args.days, args.objective, min_spend=_amounts(args.min),
+                                 max_spend=_amounts(args.max), turnover=args.turnover, steps=args.steps)
+        lines = result["lines"]
+        print(lines[lines["spend"] > 0].to_string(index=False))
+        print(f"Reach {result['reach']:,.0f} · impressions {result['impressions']:,.0f} · "
+              f"unallocated {result['unallocated']:,.2f}", file=sys.stderr)
+    elif args.command == "audit":
+        stats = audit_deal_file(args.input, args.output, chunksize=args.chunksize)
+        print(" · ".join(f"{outcome} {count:,}" for outcome, count in stats["outcomes"].items()), file=sys.stderr)
+        print(" · ".join(f"{label} {stats['pass_rate'][check]:.0%}" for check, label in AUDIT_CHECKS.items()),
+              file=sys.stderr)
+        print(f"Audited {stats['deals']:,} deals in {stats['seconds']:.2f}s · "
+              f"{stats['rows_per_second']:,.0f} rows/s → {args.output}", file=sys.stderr)
+    elif args.command == "eligible":
+        sizes = parse_sizes(" ".join(args.sizes))
+        lines = eligible_lines(sizes)
+        for line in lines:
+            accepted, min_creatives = line_sizes(*line)
+            print(f"{' | '.join(line):<54} min {min_creatives} of {', '.join(accepted)}")
+        print(f"{', '.join(sizes) or 'no sizes'} · {len(lines)} eligible line(s)", file=sys.stderr)
+    elif args.command == "plans":
+        with PlanStore(args.db) as store:
+            found = store.find_plans(advertiser=args.advertiser, market=args.market, publisher=args.publisher,
+                                     product=args.product, start=args.start, end=args.end, limit=args.limit)
+            print(found.to_string(index=False))
+            print(f"{len(found):,} of {len(store):,} saved plan(s) in {args.db}", file=sys.stderr)
+            if args.currency and len(found):
+                fx_table = load_fx_rates()
+                total = rollup(found, args.currency.upper(), amounts="total_budget", table=fx_table)
+                print(f"Total budget {total['total_budget'].iloc[0]:,.2f} {args.currency.upper()} "
+                      f"(FX {fx_table.version})", file=sys.stderr)
+    elif args.command == "fx":
+        fx_table = load_fx_rates(args.rates, version=args.version)
+        if args.convert:
+            amount, source, target = float(args.convert[0]), args.convert[1].upper(), args.convert[2].upper()
+            print(f"{amount:,.2f} {source} = {amount * fx_table.rate(source, target):,.2f} {target}")
+        else:
+            for code, usd in zip(fx_table.codes, fx_table.usd_per_unit):
+                print(f"{code:<4} {usd:>12.6f} USD")
+        print(f"FX {fx_table.version} of {', '.join(fx_versions(args.rates))} · {args.rates or default_fx_path()}",
+              file=sys.stderr)
+    elif args.command == "names":
+        stats = parse_name_file(args.input, args.output, column=args.column, kind=args.kind,
+                                chunksize=args.chunksize)
+        print(f"Parsed {stats['parsed']:,} of {stats['rows']:,} names in {stats['seconds']:.2f}s · "
+              f"{stats['rows_per_second']:,.0f} rows/s → {args.output}", file=sys.stderr)
+    return 0
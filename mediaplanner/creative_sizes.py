@@ -0,0 +1,209 @@
+"""Creative size compatibility as bitmasks over one size vocabulary.
+
+Size rules live in three places: the comma lists of ``device_config``
+``ad_sizes``, the free-text ``creative_specs`` ("ATF: 970x250 OR 728x90 |
+BTF: …") and the Spec §4.4 table behind ``get_allowed_banner_sizes``. Every
+``WxH`` token in them is parsed once at import into ``SIZE_VOCABULARY``;
+size ``i`` is bit ``i``. Each matrix line then stores
+
+- ``accepted`` — the sizes it takes: its ``ad_sizes``, else the sizes named
+  in its ``creative_specs``, else the §4.4 banner sizes of its slot
+- ``min_creatives`` — how many distinct accepted sizes a deal must supply
+
+so "do these creatives fit?" is one AND and one popcount, and the reverse
+question ("which lines can this creative set run on?") is the same test
+against every line at once. Lines with no sizes (video, native) are not
+size-checked. Deal files carry their sizes as ``970x250;728x90;300x250``;
+distinct size lists are parsed once per file and broadcast by code.
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .product_index import _FALLBACK_DEVICE, PRODUCT_INDEX
+from .resolvers import _BANNER_SIZES
+
+_SIZE_PATTERN = re.compile(r"(\d{2,4})\s*[x×X]\s*(\d{2,4})")
+
+
+def parse_sizes(text) -> tuple:
+    """Canonical ``WxH`` sizes named in ``text``, in order of first appearance."""
+    if not isinstance(text, str):
+        return ()
+    return tuple(dict.fromkeys(f"{int(w)}x{int(h)}" for w, h in _SIZE_PATTERN.findall(text)))
+
+
+def _line_sizes(key, config) -> tuple:
+    """Sizes a line accepts: ad_sizes → creative_specs → the §4.4 banner table."""
+    sizes = parse_sizes(config.get("ad_sizes")) or parse_sizes(config.get("creative_specs"))
+    if not sizes and key[2] == "Banner":
+        sizes = tuple(_BANNER_SIZES.get((key[1], key[3]), _BANNER_SIZES.get((key[1], "All Devices"), [])))
+    return sizes
+
+
+def _build_vocabulary() -> tuple:
+    found = {size for key, config in PRODUCT_INDEX.items() for size in _line_sizes(key, config)}
+    found.update(size for sizes in _BANNER_SIZES.values() for size in sizes)
+    return tuple(sorted(found, key=lambda size: tuple(map(int, size.split("x")))))
+
+
+SIZE_VOCABULARY = _build_vocabulary()
+SIZE_BITS = {size: 1 << i for i, size in enumerate(SIZE_VOCABULARY)}
+
+
+def size_mask(sizes) -> int:
+    """Bitmask of ``sizes`` (text or iterable of ``WxH``); sizes outside the vocabulary are dropped."""
+    if isinstance(sizes, str) or sizes is None:
+        sizes = parse_sizes(sizes)
+    mask = 0
+    for size in sizes:
+        mask |= SIZE_BITS.get(size, 0)
+    return mask
+
+
+def mask_sizes(mask) -> list:
+    """The vocabulary sizes set in ``mask``."""
+    return [size for size, bit in SIZE_BITS.items() if int(mask) & bit]
+
+
+def _popcount(masks) -> np.ndarray:
+    """Set bits per mask, counted once per distinct mask (``np.bitwise_count`` needs NumPy 2)."""
+    codes, uniques = pd.factorize(np.asarray(masks, dtype=np.int64).ravel())
+    counts = np.array([bin(int(mask)).count("1") for mask in uniques], dtype=np.int64)
+    return counts[codes].reshape(np.shape(masks))
+
+
+# ── LINE TABLE ───────────────────────────────────────────────────────────────
+
+def _build_lines():
+    keys, accepted, minimum = [], [], []
+    for key, config in PRODUCT_INDEX.items():
+        keys.append(key)
+        accepted.append(size_mask(_line_sizes(key, config)))
+        minimum.append(int(config.get("min_creatives", 1) or 1))
+    return (tuple(keys), np.array(accepted, dtype=np.int64), np.array(minimum, dtype=np.int64))
+
+
+LINE_KEYS, LINE_ACCEPTED, LINE_MIN_CREATIVES = _build_lines()
+LINE_SIZED = LINE_ACCEPTED != 0
+_LINE_POSITION = {key: i for i, key in enumerate(LINE_KEYS)}
+
+# Size → bitset (Python int) of the lines that accept it
+SIZE_LINES = {size: sum(1 << i for i in np.flatnonzero(LINE_ACCEPTED & bit)) for size, bit in SIZE_BITS.items()}
+
+
+def _line_position(product, publisher, ad_format, device) -> int:
+    """Index in ``LINE_KEYS`` of the line a request resolves to (fallback device as in the configs), or -1."""
+    position = _LINE_POSITION.get((product, publisher, ad_format, device))
+    if position is not None:
+        return position
+    fallback = _FALLBACK_DEVICE.get((product, publisher, ad_format))
+    return _LINE_POSITION.get((product, publisher, ad_format, fallback), -1)
+
+
+def line_sizes(product, publisher, ad_format, device="All Devices") -> tuple:
+    """(accepted sizes, min_creatives) of a line; ``((), 0)`` off the matrix."""
+    position = _line_position(product, publisher, ad_format, device)
+    if position < 0:
+        return (), 0
+    return tuple(mask_sizes(LINE_ACCEPTED[position])), int(LINE_MIN_CREATIVES[position])
+
+
+def creatives_fit(sizes, product, publisher, ad_format, device="All Devices") -> bool:
+    """True if ``sizes`` cover the line's ``min_creatives`` (always True for lines without sizes)."""
+    position = _line_position(product, publisher, ad_format, device)
+    if position < 0 or not LINE_SIZED[position]:
+        return position >= 0
+    return bin(size_mask(sizes) & int(LINE_ACCEPTED[position])).count("1") >= LINE_MIN_CREATIVES[position]
+
+
+@lru_cache(maxsize=4096)
+def _eligible_positions(mask) -> tuple:
+    candidates = 0
+    for size, bit in SIZE_BITS.items():
+        if mask & bit:
+            candidates |= SIZE_LINES[size]
+    if not candidates:
+        return ()
+    positions = np.array([i for i in range(len(LINE_KEYS)) if candidates >> i & 1], dtype=np.int64)
+    fits = _popcount(LINE_ACCEPTED[positions] & mask) >= LINE_MIN_CREATIVES[positions]
+    return tuple(positions[fits].tolist())
+
+
+def eligible_lines(sizes) -> list:
+    """Every sized (product, publisher, format, device) line a creative set is eligible for, in matrix order."""
+    return [LINE_KEYS[i] for i in _eligible_positions(size_mask(sizes))]
+
+
+# ── BULK ─────────────────────────────────────────────────────────────────────
+
+def _parse_column(sizes: pd.Series) -> tuple:
+    """(codes, mask per distinct list, sizes outside the vocabulary per distinct list) of a size-list column."""
+    codes, uniques = pd.factorize(sizes, use_na_sentinel=False)
+    parsed = [parse_sizes(text) for text in uniques]
+    masks = np.array([size_mask(found) for found in parsed], dtype=np.int64)
+    unknown = [tuple(size for size in found if size not in SIZE_BITS) for found in parsed]
+    return codes, masks, unknown
+
+
+def size_masks(sizes: pd.Series) -> np.ndarray:
+    """Per row: the size bitmask of a size-list column (``970x250;728x90``)."""
+    codes, masks, _ = _parse_column(sizes)
+    return masks[codes]
+
+
+def _unravel(key, levels) -> tuple:
+    values = []
+    for uniques in reversed(levels):
+        key, code = divmod(int(key), len(uniques))
+        values.append(uniques[code])
+    return tuple(reversed(values))
+
+
+CREATIVE_COLUMNS = ["creative_fit", "creative_matched", "creative_required", "creative_rejected_sizes",
+                    "creative_eligible_lines"]
+
+
+def check_creative_sizes(deals: pd.DataFrame, sizes="ad_sizes", product="product", publisher="publisher",
+                         ad_format="format", device="device") -> pd.DataFrame:
+    """Size compatibility of every deal row against its resolved line.
+
+    Returns ``CREATIVE_COLUMNS`` on the index of ``deals``: whether the
+    sizes fit (True for lines without sizes; False off the matrix), how many
+    distinct accepted sizes the deal carries vs ``min_creatives``, the
+    deal's sizes the line does not take, and how many lines the creative set
+    is eligible for overall.
+    """
+    list_codes, list_masks, list_unknown = _parse_column(deals[sizes])
+    masks = list_masks[list_codes]
+    # One integer key per product × publisher × format × device, resolved once per distinct key
+    key, levels = np.zeros(len(deals), dtype=np.int64), []
+    for column in (product, publisher, ad_format, device):
+        codes, uniques = pd.factorize(deals[column], use_na_sentinel=False)
+        key = key * len(uniques) + codes
+        levels.append(uniques)
+    key_codes, unique_keys = pd.factorize(key)
+    positions = np.array([_line_position(*_unravel(k, levels)) for k in unique_keys], dtype=np.int64)[key_codes]
+    on_matrix = positions >= 0
+    sized = on_matrix & LINE_SIZED[positions]
+    accepted = np.where(sized, LINE_ACCEPTED[positions], 0)
+    required = np.where(sized, LINE_MIN_CREATIVES[positions], 0)
+    matched = _popcount(masks & accepted)
+
+    mask_codes, unique_masks = pd.factorize(masks)
+    eligible = np.array([len(_eligible_positions(int(mask))) for mask in unique_masks], dtype=np.int64)
+    # Rejected = vocabulary sizes the line does not take + sizes outside the vocabulary
+    n_lists = len(list_unknown)
+    rejected_codes, rejected = pd.factorize(np.where(sized, (masks & ~accepted) * n_lists + list_codes, -1))
+    rejected_text = np.array(["" if key < 0 else ", ".join(mask_sizes(key // n_lists) + list(list_unknown[key % n_lists]))
+                              for key in rejected], dtype=object)
+    return pd.DataFrame({
+        "creative_fit": on_matrix & (matched >= required),
+        "creative_matched": matched,
+        "creative_required": required,
+        "creative_rejected_sizes": rejected_text[rejected_codes],
+        "creative_eligible_lines": eligible[mask_codes],
+    }, index=deals.index)
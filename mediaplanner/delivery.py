@@ -0,0 +1,274 @@
+"""Day-by-day delivery simulation for a whole plan.
+
+Each flight has an on-pace daily requirement from its product rules:
+``impression_pacing`` × (volume ÷ days), raised when it falls behind so the
+remaining goal is spread over the remaining days (underspend catch-up).
+A capped line needs ``daily_imps ÷ freq_cap`` unique users, so lines sharing
+a publisher × device slot compete for the same audience
+(``DAILY_AUDIENCE_UNIQUES``). Pressure is uniques needed ÷ uniques available
+per slot and day; above 1.0 every line in the slot is scaled back and the gap
+is that day's shortfall. ``ASAP`` lines additionally take whatever audience
+is left, so they finish early. Uncapped lines count at
+``UNCAPPED_DAILY_FREQUENCY``; fixed-fee takeovers (CPD) are share-of-voice
+and carry no impression goal.
+
+Slots are independent, so every slot with only 100%-paced (or faster)
+Even lines that never exceeds capacity is solved in closed form over flat
+NumPy arrays (one element per flight day). Only the remaining slots are
+stepped day by day, vectorized across the flights active that day, because
+catch-up and early finishes depend on earlier days.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from .rules import DAILY_AUDIENCE_UNIQUES
+from .product_index import lookup_product_config
+from .resolvers import get_freq_cap_numeric, is_cpd_product
+
+# Daily frequency assumed for uncapped ("Off") lines when sizing capacity
+UNCAPPED_DAILY_FREQUENCY = 6
+
+# Audience for slots missing from DAILY_AUDIENCE_UNIQUES
+DEFAULT_DAILY_UNIQUES = 5_000_000
+
+# Peak pressure at or above which the plan is rated Medium (High means shortfall)
+MEDIUM_PRESSURE = 0.8
+
+
+def _to_days(values) -> np.ndarray:
+    """date / datetime / ISO strings → datetime64[D]; anything unparseable becomes NaT."""
+    values = [value if isinstance(value, (date, str)) else None for value in values]
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        days = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                days[i] = np.datetime64(value, "D") if value is not None else days[i]
+            except ValueError:
+                pass
+        return days
+
+
+def _pacing_percent(text) -> float:
+    try:
+        return float(str(text).strip().rstrip("%")) / 100
+    except ValueError:
+        return 1.0
+
+
+def _line_rules(product, publisher, ad_format, device):
+    """(is_asap, impression_pacing, freq_cap, cpd) for a line, from its resolved config."""
+    config = lookup_product_config(product, publisher, ad_format, device)
+    cap = get_freq_cap_numeric(product)
+    return (str(config.get("pacing", "Even")).upper() == "ASAP",
+            _pacing_percent(config.get("impression_pacing", "100%")),
+            cap if cap > 0 else UNCAPPED_DAILY_FREQUENCY,
+            is_cpd_product(product))
+
+
+def simulate_delivery(flights, daily_uniques=None) -> dict:
+    """Simulate daily delivery for every flight of a plan.
+
+    ``daily_uniques`` overrides ``DAILY_AUDIENCE_UNIQUES``: a number (one
+    audience for every slot) or a ``{(publisher, device): uniques}`` mapping.
+
+    Returns a dict of NumPy arrays and summaries:
+
+    * ``dates`` – the plan horizon, one ``datetime64[D]`` per day
+    * ``slots`` – (publisher, device) labels; ``slot_pressure`` /
+      ``slot_required`` are slots × days
+    * ``required`` – on-pace impressions needed per day (including catch-up)
+    * ``deliverable`` – the part of ``required`` the audience allows per day
+      (ASAP fill beyond the requirement is not counted)
+    * ``shortfall`` – per day, the part of ``required`` that could not be served
+    * ``pressure`` – per day, the highest slot pressure
+    * ``flight_shortfall`` – impressions still undelivered at each flight's end,
+      in input order (``total_shortfall`` is their sum)
+    * ``peak_pressure``, ``peak_date``, ``peak_slot``, ``total_shortfall``,
+      ``shortfall_days``
+    """
+    flights = list(flights)
+    n = len(flights)
+    rules_cache, slot_ids = {}, {}
+    line_rules, slot_of, volumes = [], [], []
+    for fl in flights:
+        line = (fl.get("product", ""), fl.get("publisher", ""), fl.get("format", "Banner"),
+                fl.get("device", "All Devices"))
+        rules = rules_cache.get(line)
+        if rules is None:
+            rules = rules_cache[line] = _line_rules(*line)
+        line_rules.append(rules)
+        slot_of.append(slot_ids.setdefault((line[1], line[3]), len(slot_ids)))
+        volumes.append(0.0 if rules[3] else float(fl.get("volume", 0) or 0))
+
+    start = _to_days([fl.get("start_date") for fl in flights])
+    end = _to_days([fl.get("end_date") for fl in flights])
+    rules = np.array(line_rules, dtype=float).reshape(n, 4)
+    is_asap, pacing, cap = rules[:, 0].astype(bool), rules[:, 1], rules[:, 2]
+    volume = np.array(volumes, dtype=float)
+    slot_idx = np.array(slot_of, dtype=np.int64)
+
+    slots = list(slot_ids)
+    if isinstance(daily_uniques, (int, float)):
+        audience = np.full(len(slots), float(daily_uniques))
+    else:
+        table = DAILY_AUDIENCE_UNIQUES if daily_uniques is None else daily_uniques
+        audience = np.array([float(table.get(slot, DEFAULT_DAILY_UNIQUES)) for slot in slots])
+
+    valid = ~(np.isnat(start) | np.isnat(end))
+    n_slots = len(slots)
+    if not valid.any():
+        empty = np.zeros(0)
+        return {"dates": np.zeros(0, dtype="datetime64[D]"), "slots": slots,
+                "slot_pressure": np.zeros((n_slots, 0)), "slot_required": np.zeros((n_slots, 0)),
+                "required": empty, "deliverable": empty, "shortfall": empty, "pressure": empty,
+                "flight_shortfall": np.zeros(n), "peak_pressure": 0.0, "peak_date": None,
+                "peak_slot": None, "total_shortfall": 0.0, "shortfall_days": 0}
+
+    horizon_start = start[valid].min()
+    days = np.where(valid, np.maximum((end - start).astype(np.int64) + 1, 1), 0)
+    start_off = (np.where(valid, start, horizon_start) - horizon_start).astype(np.int64)
+    n_days = int((start_off + days).max())
+    even_rate = pacing * volume / np.maximum(days, 1)
+
+    # ── Closed form: one row per flight day ──────────────────────────────────
+    flight_of = np.repeat(np.arange(n), days)
+    day_in_flight = np.arange(flight_of.size) - np.repeat(np.cumsum(days) - days, days)
+    day_index = start_off[flight_of] + day_in_flight
+    daily = np.clip(volume[flight_of] - day_in_flight * even_rate[flight_of], 0.0, even_rate[flight_of])
+
+    cell = slot_idx[flight_of] * n_days + day_index
+    uniques_needed = np.bincount(cell, weights=daily / cap[flight_of], minlength=n_slots * n_days)
+    slot_pressure = (uniques_needed / np.repeat(audience, n_days)).reshape(n_slots, n_days)
+    slot_required = np.bincount(cell, weights=daily, minlength=n_slots * n_days).reshape(n_slots, n_days)
+
+    required = deliverable = slot_required.sum(axis=0)
+    shortfall = np.zeros(n_days)
+    flight_shortfall = np.zeros(n)
+
+    # Slots with an ASAP line, an under-paced line (it catches up) or an
+    # over-capacity day are re-simulated day by day; slots are independent,
+    # so every other slot keeps its closed-form result
+    dirty = np.zeros(n_slots, dtype=bool)
+    dirty[slot_idx[(is_asap | (pacing < 1.0)) & (volume > 0)]] = True
+    dirty |= slot_pressure.max(axis=1, initial=0.0) > 1.0
+    if dirty.any():
+        stepped = np.flatnonzero(dirty[slot_idx] & valid)
+        (step_pressure, step_required, step_total, step_delivered, shortfall,
+         flight_shortfall[stepped]) = _step_days(start_off[stepped], days[stepped], volume[stepped],
+                                                 even_rate[stepped], is_asap[stepped], cap[stepped],
+                                                 slot_idx[stepped], audience, n_days)
+        slot_pressure[dirty] = step_pressure[dirty]
+        slot_required[dirty] = step_required[dirty]
+        clean_required = slot_required[~dirty].sum(axis=0)
+        required = clean_required + step_total
+        deliverable = clean_required + step_delivered
+
+    pressure = slot_pressure.max(axis=0) if n_slots else np.zeros(n_days)
+    peak_slot, peak_day = np.unravel_index(int(slot_pressure.argmax()), slot_pressure.shape)
+    return {
+        "dates": horizon_start + np.arange(n_days),
+        "slots": slots,
+        "slot_pressure": slot_pressure,
+        "slot_required": slot_required,
+        "required": required,
+        "deliverable": deliverable,
+        "shortfall": shortfall,
+        "pressure": pressure,
+        "flight_shortfall": flight_shortfall,
+        "peak_pressure": float(slot_pressure[peak_slot, peak_day]),
+        "peak_date": (horizon_start + peak_day).astype(date),
+        "peak_slot": slots[peak_slot],
+        "total_shortfall": float(flight_shortfall.sum()),
+        "shortfall_days": int((shortfall > 0.5).sum()),
+    }
+
+
+def _step_days(start_off, days, volume, even_rate, is_asap, cap, slot_idx, audience, n_days):
+    """Day-ordered simulation with catch-up and ASAP fill, vectorized across active flights."""
+    n_slots = audience.size
+    end_off = start_off + days - 1
+    remaining = volume.copy()
+    slot_pressure = np.zeros((n_slots, n_days))
+    slot_required = np.zeros((n_slots, n_days))
+    required = np.zeros(n_days)
+    deliverable = np.zeros(n_days)
+    shortfall = np.zeros(n_days)
+
+    for day in range(int(start_off.min()), int(end_off.max()) + 1):
+        active = np.flatnonzero((start_off <= day) & (end_off >= day) & (remaining > 0))
+        if not active.size:
+            continue
+        rem = remaining[active]
+        need = np.minimum(rem, np.maximum(even_rate[active], rem / (end_off[active] - day + 1)))
+        slots, caps = slot_idx[active], cap[active]
+
+        need_uniques = np.bincount(slots, weights=need / caps, minlength=n_slots)
+        day_pressure = need_uniques / audience
+        got = need * np.minimum(1.0, 1.0 / np.maximum(day_pressure, 1e-12))[slots]
+
+        asap = is_asap[active]
+        if asap.any():
+            # ASAP lines share the audience left over after every line's requirement
+            spare = np.maximum(audience - need_uniques, 0.0)
+            extra = np.where(asap, rem - got, 0.0) / caps
+            wanted = np.bincount(slots, weights=extra, minlength=n_slots)
+            share = np.minimum(1.0, spare / np.maximum(wanted, 1e-12))
+            got = got + extra * share[slots] * caps
+
+        remaining[active] = rem - got
+        served = np.minimum(got, need)
+        slot_pressure[:, day] = day_pressure
+        slot_required[:, day] = np.bincount(slots, weights=need, minlength=n_slots)
+        required[day] = need.sum()
+        deliverable[day] = served.sum()
+        shortfall[day] = (need - served).sum()
+
+    return slot_pressure, slot_required, required, deliverable, shortfall, remaining
+
+
+def delivery_frame(simulation):
+    """Per-day plan view of :func:`simulate_delivery` as a DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "date": simulation["dates"],
+        "required_imps": simulation["required"],
+        "deliverable_imps": simulation["deliverable"],
+        "shortfall_imps": simulation["shortfall"],
+        "pressure": simulation["pressure"],
+    })
+
+
+def calculate_delivery_pressure(flights_list, daily_uniques=None, simulation=None):
+    """
+    Delivery risk for the whole plan: Low / Medium / High, from :func:`simulate_delivery`.
+
+    - LOW: peak daily pressure below 80% of the frequency-capped audience
+    - MEDIUM: peak pressure 80–100% (no shortfall)
+    - HIGH: some day needs more uniques than the slot has → impressions at risk
+
+    Caps and pacing come from each flight's product rules. Pass ``simulation`` to reuse a :func:`simulate_delivery` result.
+    """
+    if not flights_list:
+        return "Low", "No flights configured."
+
+    sim = simulation if simulation is not None else simulate_delivery(flights_list, daily_uniques=daily_uniques)
+    if not sim["dates"].size:
+        return "Low", "No dated flights configured."
+    n_days = sim["dates"].size
+    if sim["peak_pressure"] <= 0:
+        return "Low", f"Plan spans {n_days} days. No impression goals (fixed-fee / SOV only). Low activation risk."
+
+    publisher, device = sim["peak_slot"]
+    peak = (f"Peak {sim['peak_pressure']:.1%} of the frequency-capped {publisher} {device} audience "
+            f"on {sim['peak_date']:%m/%d/%Y}")
+    if sim["total_shortfall"] > 0.5:
+        return "High", (f"{peak}. {sim['total_shortfall']:,.0f} imps at risk across {sim['shortfall_days']} "
+                        f"day(s) of {n_days}. Escalate to ops team.")
+    if sim["peak_pressure"] >= MEDIUM_PRESSURE:
+        return "Medium", f"{peak}. Moderate delivery pressure. Confirm frequency caps and date windows."
+    return "Low", f"{peak}. Daily volume manageable across {n_days} days. Low activation risk."
@@ -0,0 +1,491 @@
+"""IO Excel / PDF and internal setup exporters.
+
+Kept out of the package namespace so that importing ``mediaplanner`` does not
+load openpyxl or reportlab.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib import colors
+
+from .flights import Flight, FlightStore, add_to_groups, group_flights
+from .resolvers import is_cpd_product, resolve_inventory_type
+
+# ── STYLE TEMPLATES (built once per process, one object per look) ──────────
+
+_XL_BLUE_FILL      = PatternFill(start_color="0078D4", end_color="0078D4", fill_type="solid")
+_XL_SUBHEADER_FILL = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+_XL_GREY_FILL      = PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid")
+_XL_CENTER         = Alignment(horizontal="center", vertical="center")
+_XL_THIN_BORDER    = Border(left=Side(style='thin'), right=Side(style='thin'),
+                            top=Side(style='thin'), bottom=Side(style='thin'))
+
+# Style keys used in sheet specs → cell style attributes
+_XL_STYLES = {
+    "title":        {"font": Font(bold=True, size=14, color="FFFFFF"), "fill": _XL_BLUE_FILL,
+                     "alignment": _XL_CENTER},
+    "label":        {"font": Font(bold=True, size=11)},
+    "value":        {"font": Font(size=11)},
+    "section":      {"font": Font(bold=True, size=11, color="0078D4")},
+    "subheader":    {"font": Font(bold=True, size=10, color="0078D4"), "fill": _XL_SUBHEADER_FILL,
+                     "border": _XL_THIN_BORDER, "alignment": _XL_CENTER},
+    "bold":         {"font": Font(bold=True)},
+    "setup_title":  {"font": Font(bold=True, size=14, color="0078D4")},
+    "setup_header": {"font": Font(bold=True), "fill": _XL_GREY_FILL},
+}
+
+
+# ── IO LAYOUT (one definition for the Excel sheet and the PDF tables) ───────
+
+_IO_TITLE = "MEDIA PLAN - MONETIZE GUARANTEED"
+_OVERVIEW_HEADERS = ["#", "Product", "Publisher", "Format", "Start Date", "End Date", "Budget"]
+_FORECAST_HEADERS = ["Product", "Publisher", "Format", "CPM", "Budget", "Total Imps", "Est. Daily Avg"]
+
+
+def _date_str(value):
+    return value.strftime("%m/%d/%Y") if hasattr(value, "strftime") else str(value)
+
+
+def _campaign_details(campaign_info) -> list:
+    """``(label, value, label, value)`` rows of the IO header block."""
+    return [
+        ("Advertiser:", campaign_info.get("advertiser", ""), "Market:", campaign_info.get("market", "")),
+        ("Campaign:", campaign_info.get("campaign", ""), "Publisher:", campaign_info.get("publisher", "")),
+        ("Order Type:", "Insertion Order", "Request Date:", datetime.now().strftime("%m/%d/%Y")),
+    ]
+
+
+def _overview_row(flight) -> list:
+    """One flight's row of the Campaign Overview table."""
+    return [flight.get("flight_num", 1), flight.get("product", ""), flight.get("publisher", ""),
+            flight.get("format", ""), _date_str(flight.get("start_date")),
+            _date_str(flight.get("end_date")), f"{flight.get('budget', 0):,.2f}"]
+
+
+def _forecast_rows(fgroups, currency_sym) -> tuple:
+    """(one Forecasting row per product group, the TOTAL row — None for a single group)."""
+    rows = []
+    grand_budget = grand_imps = 0
+    for (fprod, fpub, ffmt), fd in fgroups.items():
+        if is_cpd_product(fprod):
+            rows.append([fprod, fpub, ffmt, "Fixed Fee (CPD)",
+                         f"{fd['budget']:,.2f} {currency_sym}",
+                         f"{fd['days']} day(s)",
+                         f"{fd['budget']/max(1,fd['days']):,.2f} {currency_sym}/day"])
+        else:
+            daily = fd["impressions"] / max(1, fd["days"])
+            rows.append([fprod, fpub, ffmt,
+                         f"{fd['cpm']:,.2f} {currency_sym}",
+                         f"{fd['budget']:,.2f} {currency_sym}",
+                         f"{fd['impressions']:,.0f}",
+                         f"{daily:,.0f}"])
+        grand_budget += fd["budget"]
+        grand_imps += fd["impressions"]
+    total = None
+    if len(fgroups) > 1:
+        total = ["TOTAL", "", "", "—", f"{grand_budget:,.2f} {currency_sym}", f"{grand_imps:,.0f}", "—"]
+    return rows, total
+
+
+def _video_rows(vcr_target, completed_views) -> list:
+    """Target VCR / completed views label-value rows (none for display plans)."""
+    if vcr_target is None:
+        return []
+    return [["Target VCR (%)", f"{vcr_target}%"],
+            ["Est. Completed Views", f"{completed_views:,.0f}" if completed_views else "—"]]
+
+
+def create_internal_excel_export(flights_list, campaign_info, delivery_pressure_label,
+                                 product_config, unified_checklist):
+    """Create internal-facing Excel with targeting setup and QC checklist,
+    fully aligned with the on-screen Risk & Quality Control section."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Internal Setup"
+    _write_sheet(ws, _internal_setup_sheet(campaign_info, product_config, unified_checklist))
+    return wb
+
+
+def create_excel_export(flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate, currency_sym, vcr_target=None, completed_views=None):
+    """Create IO Excel file with Microsoft-style formatting and forecasting table."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Media Plan"
+    _write_sheet(ws, _media_plan_sheet(flights_list, campaign_info, cpm_rate, currency_sym,
+                                       vcr_target=vcr_target, completed_views=completed_views))
+    return wb
+
+@lru_cache(maxsize=1)
+def _pdf_styles():
+    """Paragraph and table styles for the IO PDF, built once per process."""
+    styles = getSampleStyleSheet()
+    grid_header = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0078D4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ]
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#0078D4'),
+            spaceAfter=20,
+            alignment=1  # center
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#0078D4'),
+            spaceAfter=10,
+            spaceBefore=10
+        ),
+        "toc_entry": ParagraphStyle('TOCEntry', parent=styles['Normal'], fontSize=9),
+        "campaign_table": TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#D9E1F2')),
+            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#D9E1F2')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        "overview_table": TableStyle(grid_header + [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D9E1F2')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]),
+        "toc_table": TableStyle(grid_header + [
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (4, 0), (-1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]),
+        "forecast_table": TableStyle(grid_header + [
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D9E1F2')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]),
+    }
+
+
+def _pdf_plan_elements(flights_list, campaign_info, cpm_rate, currency_sym,
+                       vcr_target=None, completed_views=None) -> list:
+    """Flowables for one IO plan; the title paragraph is always first."""
+    styles = _pdf_styles()
+    elements = []
+
+    # Title
+    elements.append(Paragraph(_IO_TITLE, styles["title"]))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Campaign Details
+    campaign_table = Table([list(row) for row in _campaign_details(campaign_info)],
+                           colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
+    campaign_table.setStyle(styles["campaign_table"])
+
+    elements.append(campaign_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Campaign Overview
+    elements.append(Paragraph("CAMPAIGN OVERVIEW", styles["heading"]))
+
+    overview_data = [_OVERVIEW_HEADERS]
+    total_budget = 0
+    for flight in flights_list:
+        total_budget += flight.get('budget', 0)
+        overview_data.append(_overview_row(flight))
+
+    overview_data.append(["", "", "", "", "", "TOTAL:", f"{total_budget:,.2f} {currency_sym}"])
+
+    overview_table = Table(overview_data, colWidths=[0.4*inch, 1.2*inch, 0.8*inch, 0.7*inch, 1.1*inch, 1.1*inch, 1.0*inch])
+    overview_table.setStyle(styles["overview_table"])
+
+    elements.append(overview_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Per-product Forecasting
+    elements.append(Paragraph("FORECASTING BY PRODUCT", styles["heading"]))
+
+    rows, total = _forecast_rows(group_flights(flights_list, cpm_rate), currency_sym)
+    forecast_data = [_FORECAST_HEADERS, *rows]
+    if total is not None:
+        forecast_data.append(total)
+    forecast_data += [row + [""] * 5 for row in _video_rows(vcr_target, completed_views)]
+
+    forecast_table = Table(forecast_data, colWidths=[1.3*inch, 0.9*inch, 0.7*inch, 0.9*inch, 1.1*inch, 0.9*inch, 0.9*inch])
+    forecast_table.setStyle(styles["forecast_table"])
+
+    elements.append(forecast_table)
+    return elements
+
+
+def create_pdf_export(flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate, currency_sym, vcr_target=None, completed_views=None):
+    """Create IO PDF file with same information as Excel."""
+    pdf_buffer = BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+    doc.build(_pdf_plan_elements(flights_list, campaign_info, cpm_rate, currency_sym,
+                                 vcr_target=vcr_target, completed_views=completed_views))
+    pdf_buffer.seek(0)
+    return pdf_buffer
+
+
+# ── STREAMING IO EXCEL (write-only, for large multi-flight plans) ────────────
+
+# Above this many flights build_export_files streams the IO workbook
+STREAMING_EXPORT_THRESHOLD = 500
+
+def _media_plan_rows(flights_list, campaign_info, cpm_rate, currency_sym, vcr_target, completed_views, fgroups):
+    """Yield the "Media Plan" rows, folding each flight into ``fgroups`` as its row goes out."""
+    fold = not isinstance(flights_list, FlightStore)  # a store's groups are already running
+    yield [(_IO_TITLE, "title")]
+    yield []
+    for left_label, left_value, right_label, right_value in _campaign_details(campaign_info):
+        yield [(left_label, "label"), (left_value, "value"), None, (right_label, "label"), (right_value, "value")]
+    yield []
+
+    # Campaign Overview
+    yield [("CAMPAIGN OVERVIEW", "section")]
+    yield [(h, "subheader") for h in _OVERVIEW_HEADERS]
+
+    for flight in flights_list:
+        yield _overview_row(flight)
+        if fold:
+            add_to_groups(fgroups, flight, cpm_rate)
+
+    # Per-product Forecasting Table
+    yield []
+    yield []
+    yield [("FORECASTING BY PRODUCT", "section")]
+    yield [(h, "subheader") for h in _FORECAST_HEADERS]
+
+    rows, total = _forecast_rows(fgroups, currency_sym)
+    yield from rows
+    if total is not None:
+        yield [(val, "bold") for val in total]
+
+    # Video metrics
+    for label, value in _video_rows(vcr_target, completed_views):
+        yield [(label, "bold"), value]
+
+
+def _media_plan_sheet(flights_list, campaign_info, cpm_rate, currency_sym,
+                      vcr_target=None, completed_views=None) -> dict:
+    """The IO "Media Plan" sheet as a streamed spec.
+
+    ``rows`` is a one-shot generator of sheet rows; a cell is either a plain
+    value or a ``(value, style_key)`` pair. Only the current row is alive, so
+    the spec costs the same at 50 flights or 50,000. ``groups`` carries the
+    per-product forecast aggregates (:func:`~mediaplanner.flights.group_flights`),
+    totalled as the flight rows stream past — complete once ``rows`` has been
+    written — so callers can roll plans up without regrouping the flights.
+    """
+    fgroups = group_flights(flights_list, cpm_rate) if isinstance(flights_list, FlightStore) else {}
+    return {
+        "rows": _media_plan_rows(flights_list, campaign_info, cpm_rate, currency_sym,
+                                 vcr_target, completed_views, fgroups),
+        "merged": ["A1:F1"],
+        "widths": {"A": 22, "B": 18, "C": 14, "D": 12, "E": 14, "F": 14, "G": 16},
+        "heights": {1: 25},
+        "groups": fgroups,
+    }
+
+
+def _internal_setup_sheet(campaign_info, product_config, unified_checklist) -> dict:
+    """The "Internal Setup" sheet as a picklable spec (also behind create_internal_excel_export)."""
+    rows = [[("Media Plan - Internal Setup & QC", "setup_title")], []]
+    for label, key in [("Campaign Name:", "campaign"), ("Advertiser:", "advertiser"),
+                       ("Market:", "market"), ("Publisher:", "publisher"),
+                       ("Product:", "product")]:
+        rows.append([(label, "bold"), campaign_info.get(key, "")])
+
+    rows += [[], [("INTERNAL SETUP & TARGETING", "section")], []]
+    rows.append([("Field", "setup_header"), ("Value", "setup_header")])
+    setup_fields = [
+        ("Seat ID",              product_config.get("seat", "280 - Monetize")),
+        ("Line Item Type",       product_config.get("line_item_type", "N/A")),
+        ("Revenue Type",         product_config.get("revenue_type", "CPM")),
+        ("Priority",             product_config.get("priority", "N/A")),
+        ("Frequency Cap",        product_config.get("frequency_cap", "N/A")),
+        ("Pacing",               product_config.get("pacing", "N/A")),
+        ("Inventory Type",       product_config.get("inventory_type",
+                                    resolve_inventory_type(campaign_info.get("format", "Banner")))),
+        ("Inventory Targeting",  product_config.get("inventory_targeting",
+                                    product_config.get("publisher_targeting", "N/A"))),
+        ("Supply",               product_config.get("supply",
+                                    product_config.get("supply_targeting", "N/A"))),
+        ("Ad Sizes",             product_config.get("ad_sizes", "N/A")),
+        ("Device Targeting",     product_config.get("device_targeting", "N/A")),
+        ("Creative Specs",       product_config.get("creative_specs", "N/A")),
+        ("Allow RTB",            str(product_config.get("allow_rtb", "N/A"))),
+        ("Underspend Catchup",   product_config.get("underspend_catchup", "N/A")),
+        ("Geo Targeting",        product_config.get("geo_targeting", "Country Targeting")),
+    ]
+    rows += [[name, str(value)] for name, value in setup_fields]
+
+    rows += [[], [], [("QC CHECKLIST", "section")], []]
+    rows.append([("Checklist Item", "setup_header"), ("Status / Value", "setup_header")])
+    rows += [[str(name), str(value)] for name, value in unified_checklist]
+
+    return {"rows": rows, "merged": ["A1:B1"], "widths": {"A": 30, "B": 45}, "heights": {}}
+
+
+def _register_styles(ws):
+    """Register every ``_XL_STYLES`` entry on ``ws``'s workbook, in a fixed order.
+
+    Call on the first sheet before writing any rows: workbooks primed this way
+    share identical style tables, so their sheet XML can be combined into one
+    package (see :mod:`mediaplanner.portfolio`).
+    """
+    for style in _XL_STYLES.values():
+        cell = WriteOnlyCell(ws)
+        for attr, value in style.items():
+            setattr(cell, attr, value)
+        cell.style_id  # adds the cell format to the workbook's table
+
+
+def _write_sheet(ws, spec):
+    """Write a sheet spec into ``ws`` (write-only or in-memory) using the shared styles."""
+    for col, width in spec["widths"].items():
+        ws.column_dimensions[col].width = width
+    for row_num, height in spec["heights"].items():
+        ws.row_dimensions[row_num].height = height
+
+    for row in spec["rows"]:
+        out = []
+        for value in row:
+            if isinstance(value, tuple):
+                value, style_key = value
+                cell = WriteOnlyCell(ws, value=value)
+                for attr, style in _XL_STYLES[style_key].items():
+                    setattr(cell, attr, style)
+                value = cell
+            out.append(value)
+        ws.append(out)
+
+    for cell_range in spec["merged"]:
+        if hasattr(ws, "merge_cells"):  # in-memory sheet: let openpyxl create the merged cells
+            ws.merge_cells(cell_range)
+        else:
+            ws.merged_cells.add(cell_range)
+
+
+def stream_excel_export(flights_list, campaign_info, delivery_pressure_label, product_config,
+                        cpm_rate, currency_sym, vcr_target=None, completed_views=None, path=None):
+    """Write the IO Excel with openpyxl's write-only mode and return the file path.
+
+    Same layout as ``create_excel_export``, but rows are streamed in order with
+    shared styles and the workbook is written straight to ``path`` (a new
+    temporary file when omitted; the caller removes it), so memory stays flat
+    as the flight count grows.
+    """
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+            path = tmp.name
+
+    wb = Workbook(write_only=True)
+    _write_sheet(wb.create_sheet("Media Plan"),
+                 _media_plan_sheet(flights_list, campaign_info, cpm_rate, currency_sym,
+                                   vcr_target=vcr_target, completed_views=completed_views))
+    wb.save(path)
+    return path
+
+
+# ── EXPORT BUNDLE (build on demand, keyed by input fingerprint) ──────────────
+
+def _fingerprint_default(value):
+    if isinstance(value, Flight):
+        return value.to_dict()
+    if isinstance(value, FlightStore):
+        return list(value)
+    return str(value)
+
+
+def export_fingerprint(*inputs) -> str:
+    """Stable SHA-256 of everything that goes into the export files.
+
+    Inputs are serialised as canonical JSON (sorted keys, dates as ISO
+    strings), so the same plan always hashes the same across reruns and
+    sessions. Today's date is included because every file carries a
+    Request Date.
+    """
+    payload = json.dumps([datetime.now().strftime("%Y-%m-%d"), *inputs],
+                         sort_keys=True, default=_fingerprint_default, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_export_files(flights_list, campaign_info, delivery_pressure_label, product_config,
+                       cpm_rate, currency_sym, unified_checklist, vcr_target=None,
+                       completed_views=None, timer=None) -> dict:
+    """Build the IO Excel, IO PDF and Internal Setup Excel as bytes.
+
+    Plans with more than ``STREAMING_EXPORT_THRESHOLD`` flights use the
+    write-only IO workbook (:func:`stream_excel_export`). Each builder is
+    timed as a section of ``timer`` (a :class:`~mediaplanner.timing.RerunTimer`)
+    when one is given.
+
+    Returns ``{"io_excel": bytes, "io_pdf": bytes, "internal_excel": bytes}``.
+    """
+    def section(name):
+        return timer.section(name) if timer is not None else nullcontext()
+
+    with section("Export: IO Excel"):
+        if len(flights_list) > STREAMING_EXPORT_THRESHOLD:
+            excel_path = stream_excel_export(
+                flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate,
+                currency_sym, vcr_target=vcr_target, completed_views=completed_views,
+            )
+            try:
+                with open(excel_path, "rb") as fh:
+                    io_excel = fh.read()
+            finally:
+                os.remove(excel_path)
+        else:
+            excel_bytes = BytesIO()
+            create_excel_export(
+                flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate,
+                currency_sym, vcr_target=vcr_target, completed_views=completed_views,
+            ).save(excel_bytes)
+            io_excel = excel_bytes.getvalue()
+
+    with section("Export: IO PDF"):
+        pdf_buffer = create_pdf_export(
+            flights_list, campaign_info, delivery_pressure_label, product_config, cpm_rate,
+            currency_sym, vcr_target=vcr_target, completed_views=completed_views,
+        )
+
+    with section("Export: Internal Setup"):
+        internal_bytes = BytesIO()
+        create_internal_excel_export(
+            flights_list, campaign_info, delivery_pressure_label, product_config, unified_checklist,
+        ).save(internal_bytes)
+
+    return {
+        "io_excel": io_excel,
+        "io_pdf": pdf_buffer.getvalue(),
+        "internal_excel": internal_bytes.getvalue(),
+    }
@@ -0,0 +1,204 @@
+"""Compact flight records and a flight store with running per-product aggregates.
+
+``Flight`` is a ``__slots__`` record with the same keys as the planner's flight
+dicts and the read-only parts of the dict API (``get``, ``[]``, ``keys``), so
+the exporters and formulas accept either. ``FlightStore`` keeps the plan's
+flights in insertion order and updates the per-(product, publisher, format)
+groups and plan totals on every add / remove, so summaries never re-walk
+the flights.
+"""
+
+from types import MappingProxyType
+
+# Flight dict keys as built in "Multiple Flights" (Spec §7)
+FLIGHT_FIELDS = (
+    "flight_num", "product", "publisher", "format", "device",
+    "start_date", "end_date", "budget", "cpm", "volume",
+    "currency", "total_cost", "duration", "currency_code", "market",
+)
+
+
+class Flight:
+    """One flight. Fields that were never set behave like missing dict keys."""
+
+    __slots__ = FLIGHT_FIELDS
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in FLIGHT_FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in FLIGHT_FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in FLIGHT_FIELDS and hasattr(self, key)
+
+    def keys(self):
+        return [key for key in FLIGHT_FIELDS if hasattr(self, key)]
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self):
+        return f"Flight({self.to_dict()!r})"
+
+
+def _flight_days(flight) -> int:
+    """Inclusive flight length, or 0 when the dates cannot be subtracted."""
+    sd, ed = flight.get("start_date"), flight.get("end_date")
+    if hasattr(sd, "__sub__") and hasattr(ed, "__sub__"):
+        return (ed - sd).days + 1
+    return 0
+
+
+def _group_key(flight) -> tuple:
+    return (flight.get("product", ""), flight.get("publisher", ""), flight.get("format", ""))
+
+
+class FlightStore:
+    """Ordered flights with incrementally maintained forecast groups and totals.
+
+    ``groups`` maps (product, publisher, format) to ``{"budget", "impressions",
+    "cpm", "days", "flights"}``; a group's CPM is that of its earliest flight,
+    as in the forecasting table (Spec §6). Supports ``len``, iteration,
+    indexing, ``append`` and ``pop`` like the list it replaces. ``pop``
+    re-sums the affected group and the totals from the remaining flights, so
+    a store always holds exactly what one built from its flights would.
+    """
+
+    def __init__(self, flights=()):
+        self._flights = []
+        self._groups = {}
+        self._members = {}
+        self._total_budget = 0.0
+        self._total_volume = 0.0
+        self._total_cost = 0.0
+        for flight in flights:
+            self.append(flight)
+
+    # ── list API ─────────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self._flights)
+
+    def __iter__(self):
+        return iter(self._flights)
+
+    def __getitem__(self, index):
+        return self._flights[index]
+
+    def append(self, flight) -> Flight:
+        """Add a flight (a ``Flight`` or a flight dict) and fold it into the aggregates."""
+        if not isinstance(flight, Flight):
+            flight = Flight(**dict(flight))
+        self._flights.append(flight)
+
+        key = _group_key(flight)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = {"budget": 0, "impressions": 0, "cpm": flight.get("cpm", 0.0),
+                                         "days": 0, "flights": 0}
+            self._members[key] = []
+        self._members[key].append(flight)
+        group["budget"] += flight.get("budget", 0)
+        group["impressions"] += flight.get("volume", 0)
+        group["days"] += _flight_days(flight)
+        group["flights"] += 1
+
+        self._total_budget += flight.get("budget", 0)
+        self._total_volume += flight.get("volume", 0)
+        self._total_cost += flight.get("total_cost", 0)
+        return flight
+
+    def pop(self, index=-1) -> Flight:
+        """Remove and return the flight at ``index``, backing it out of the aggregates."""
+        flight = self._flights.pop(index)
+        key = _group_key(flight)
+        members = self._members[key]
+        members.remove(flight)
+        if not members:
+            del self._groups[key]
+            del self._members[key]
+        else:
+            # Re-sum rather than subtract: repeated float -= drifts from the true totals
+            self._groups[key] = {
+                "budget": sum(f.get("budget", 0) for f in members),
+                "impressions": sum(f.get("volume", 0) for f in members),
+                "cpm": members[0].get("cpm", 0.0),
+                "days": sum(_flight_days(f) for f in members),
+                "flights": len(members),
+            }
+
+        self._total_budget = sum((f.get("budget", 0) for f in self._flights), 0.0)
+        self._total_volume = sum((f.get("volume", 0) for f in self._flights), 0.0)
+        self._total_cost = sum((f.get("total_cost", 0) for f in self._flights), 0.0)
+        return flight
+
+    def clear(self):
+        self._flights.clear()
+        self._groups.clear()
+        self._members.clear()
+        self._total_budget = self._total_volume = self._total_cost = 0.0
+
+    # ── O(1) summaries ───────────────────────────────────────────────────────
+
+    @property
+    def groups(self):
+        """Read-only copy of the per-(product, publisher, format) aggregates."""
+        return MappingProxyType({key: MappingProxyType(dict(group)) for key, group in self._groups.items()})
+
+    @property
+    def first(self):
+        """The first flight, or ``None`` for an empty plan."""
+        return self._flights[0] if self._flights else None
+
+    @property
+    def total_budget(self) -> float:
+        return self._total_budget
+
+    @property
+    def total_volume(self) -> float:
+        return self._total_volume
+
+    @property
+    def total_cost(self) -> float:
+        return self._total_cost
+
+    def to_records(self) -> list:
+        """Flights as plain dicts (e.g. for JSON or a DataFrame)."""
+        return [flight.to_dict() for flight in self._flights]
+
+
+def group_flights(flights, default_cpm=0.0) -> dict:
+    """Per-(product, publisher, format) aggregates for any flight sequence.
+
+    Reads the running groups of a ``FlightStore``; walks a plain list of
+    flight dicts otherwise. Always returns a fresh dict of fresh dicts.
+    """
+    if isinstance(flights, FlightStore):
+        return {key: dict(group) for key, group in flights.groups.items()}
+    groups = {}
+    for flight in flights:
+        add_to_groups(groups, flight, default_cpm)
+    return groups
+
+
+def add_to_groups(groups, flight, default_cpm=0.0):
+    """Fold one flight into ``groups`` (as :func:`group_flights`), for callers that walk flights anyway."""
+    key = _group_key(flight)
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = {"budget": 0, "impressions": 0, "cpm": flight.get("cpm", default_cpm),
+                               "days": 0, "flights": 0}
+    group["budget"] += flight.get("budget", 0)
+    group["impressions"] += flight.get("volume", 0)
+    group["days"] += _flight_days(flight)
+    group["flights"] += 1
@@ -0,0 +1,87 @@
+"""Forecasting formulas (Spec §6). Delivery pressure lives in :mod:`mediaplanner.delivery`."""
+
+import numpy as np
+
+# ── FORECASTING FORMULAS (Spec §6) ───────────────────────────────────────────
+
+def calc_avg_daily_uniques(total_impressions: float, flight_days: int,
+                           freq_cap_num: int) -> float:
+    """
+    Spec §6.3: Avg Uniques (Daily) at product level.
+    Estimate = daily_impressions / freq_cap  (users × exposures/user = impressions).
+    When freq_cap is 0 (uncapped/CPD) returns 0 (not applicable).
+    """
+    if flight_days <= 0 or freq_cap_num <= 0:
+        return 0.0
+    daily_imps = total_impressions / flight_days
+    return daily_imps / freq_cap_num
+
+def calc_avg_frequency_daily(total_impressions: float, avg_daily_uniques: float,
+                             flight_days: int) -> float:
+    """
+    Spec §6.1: Avg Frequency (Daily) = daily_impressions / daily_uniques.
+    Returns 0 when not applicable (CPD / uncapped / no uniques).
+    """
+    if flight_days <= 0 or avg_daily_uniques <= 0:
+        return 0.0
+    return (total_impressions / flight_days) / avg_daily_uniques
+
+def calc_lifetime_uniques(avg_daily_uniques: float, turnover_per_day: float,
+                          days_lifetime: int) -> float:
+    """
+    Spec §6.4: Lifetime Uniques = avg_daily_uniques × (1 + turnover × (days - 1)).
+    Not applicable for CPD products (caller must guard).
+    """
+    if avg_daily_uniques <= 0 or days_lifetime <= 0:
+        return 0.0
+    return avg_daily_uniques * (1 + turnover_per_day * (days_lifetime - 1))
+
+
+
+# ── VECTORIZED FORECASTING KERNELS (Spec §6, array in / array out) ───────────
+# Same arithmetic, in the same order, as the scalar formulas above so results
+# match them exactly; the not-applicable guards become masks.
+
+def calc_avg_daily_uniques_array(total_impressions, flight_days, freq_cap_num) -> np.ndarray:
+    """Spec §6.3 over arrays. 0 where flight_days ≤ 0 or freq_cap ≤ 0 (uncapped/CPD)."""
+    imps, days, cap = np.broadcast_arrays(
+        np.asarray(total_impressions, dtype=np.float64),
+        np.asarray(flight_days, dtype=np.float64),
+        np.asarray(freq_cap_num, dtype=np.float64),
+    )
+    mask = (days > 0) & (cap > 0)
+    out = np.zeros(imps.shape, dtype=np.float64)
+    daily_imps = np.divide(imps, days, out=np.zeros_like(out), where=mask)
+    return np.divide(daily_imps, cap, out=out, where=mask)
+
+def calc_avg_frequency_daily_array(total_impressions, avg_daily_uniques, flight_days) -> np.ndarray:
+    """Spec §6.1 over arrays. 0 where flight_days ≤ 0 or there are no uniques."""
+    imps, uniques, days = np.broadcast_arrays(
+        np.asarray(total_impressions, dtype=np.float64),
+        np.asarray(avg_daily_uniques, dtype=np.float64),
+        np.asarray(flight_days, dtype=np.float64),
+    )
+    mask = (days > 0) & (uniques > 0)
+    out = np.zeros(imps.shape, dtype=np.float64)
+    daily_imps = np.divide(imps, days, out=np.zeros_like(out), where=mask)
+    return np.divide(daily_imps, uniques, out=out, where=mask)
+
+def calc_lifetime_uniques_array(avg_daily_uniques, turnover_per_day, days_lifetime) -> np.ndarray:
+    """Spec §6.4 over arrays. 0 where there are no uniques or days_lifetime ≤ 0."""
+    uniques, turnover, days = np.broadcast_arrays(
+        np.asarray(avg_daily_uniques, dtype=np.float64),
+        np.asarray(turnover_per_day, dtype=np.float64),
+        np.asarray(days_lifetime, dtype=np.float64),
+    )
+    mask = (uniques > 0) & (days > 0)
+    return np.where(mask, uniques * (1 + turnover * (days - 1)), 0.0)
+
+def forecast_audience_array(total_impressions, flight_days, freq_cap_num, turnover_per_day):
+    """Run §6.3 → §6.1 → §6.4 in one pass.
+
+    Returns ``(avg_daily_uniques, avg_frequency_daily, lifetime_uniques)`` arrays.
+    """
+    uniques = calc_avg_daily_uniques_array(total_impressions, flight_days, freq_cap_num)
+    frequency = calc_avg_frequency_daily_array(total_impressions, uniques, flight_days)
+    lifetime = calc_lifetime_uniques_array(uniques, turnover_per_day, flight_days)
+    return uniques, frequency, lifetime
@@ -0,0 +1,195 @@
+"""Local FX rate table and vectorized roll-ups into a reporting currency.
+
+Rates live in a CSV (``version,currency,usd_per_unit``); ``version`` is the
+ISO date a rate set takes effect, so one file keeps every set and a new one
+is appended rather than edited in; a set lists only the rates that changed
+and carries the rest over from the version before. The file is parsed once
+per change (the cache key is its path, mtime and size) and every lookup
+after that is a dict or array read. Conversions factorize the currency column, build one factor
+per distinct currency and broadcast it back by code, so rolling thousands of
+flights — or millions of deal rows — into one currency is a single multiply.
+
+Markets map to currencies through ``REGION_CURRENCY``. Flights carry the
+symbol they were priced in (``currency``) and its ISO code
+(``currency_code``); flights saved without a code fall back to the symbol
+when only one currency uses it (``£``, ``€``…) and to the plan's market
+otherwise (``$``).
+"""
+
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .flights import Flight, FlightStore
+from .rules import REGION_CURRENCY
+
+BASE_CURRENCY = "USD"
+DEFAULT_FX_PATH = Path(__file__).with_name("fx_rates.csv")
+
+FX_COLUMNS = ("version", "currency", "usd_per_unit")
+
+# Symbols that name a single currency (not "$")
+_SYMBOL_CURRENCY = {}
+for _code, _symbol in REGION_CURRENCY.values():
+    _SYMBOL_CURRENCY.setdefault(_symbol, set()).add(_code)
+_SYMBOL_CURRENCY = {symbol: codes.pop() for symbol, codes in _SYMBOL_CURRENCY.items() if len(codes) == 1}
+
+
+def default_fx_path() -> Path:
+    """``MEDIAPLANNER_FX_RATES``, else the table shipped with the package."""
+    return Path(os.environ.get("MEDIAPLANNER_FX_RATES") or DEFAULT_FX_PATH)
+
+
+class FxTable:
+    """One version of the rate table: US dollars per unit of each currency."""
+
+    def __init__(self, version, usd_per_unit):
+        self.version = version
+        self.codes = tuple(usd_per_unit)
+        self.usd_per_unit = np.array([usd_per_unit[code] for code in self.codes], dtype=np.float64)
+        self._position = {code: i for i, code in enumerate(self.codes)}
+
+    def __contains__(self, code):
+        return code in self._position
+
+    def __repr__(self):
+        return f"FxTable({self.version!r}, {len(self.codes)} currencies)"
+
+    def _usd(self, code) -> float:
+        position = self._position.get(code)
+        if position is None:
+            raise ValueError(f"No {code!r} rate in the {self.version} FX table")
+        return self.usd_per_unit[position]
+
+    def rate(self, source, target) -> float:
+        """Units of ``target`` per unit of ``source``."""
+        return float(self._usd(source) / self._usd(target))
+
+    def factors(self, currencies, target) -> np.ndarray:
+        """Per row: the factor that turns an amount in that row's currency into ``target``."""
+        if isinstance(currencies, str):
+            return np.float64(self.rate(currencies, target))
+        codes, uniques = pd.factorize(pd.Series(currencies, copy=False))
+        if (codes < 0).any():
+            raise ValueError("Currency codes must not be missing")
+        return np.array([self.rate(code, target) for code in uniques], dtype=np.float64)[codes]
+
+    def convert(self, amounts, currencies, target) -> np.ndarray:
+        """``amounts`` (in ``currencies``, per row or one code for all) expressed in ``target``."""
+        return np.asarray(amounts, dtype=np.float64) * self.factors(currencies, target)
+
+
+@lru_cache(maxsize=8)
+def _read_rates(path, mtime_ns, size) -> dict:
+    """Version → ``FxTable`` for one state of the rate file (``mtime_ns`` / ``size`` key the cache)."""
+    frame = pd.read_csv(path, comment="#", dtype={"version": str, "currency": str}, skipinitialspace=True)
+    missing = set(FX_COLUMNS) - set(frame.columns)
+    if missing:
+        raise ValueError(f"{path}: missing FX column(s) {', '.join(sorted(missing))}")
+    frame["currency"] = frame["currency"].str.strip().str.upper()
+    if not (frame["usd_per_unit"] > 0).all():
+        raise ValueError(f"{path}: every usd_per_unit must be a positive number")
+    tables, rates = {}, {BASE_CURRENCY: 1.0}
+    for version, rows in frame.groupby("version", sort=True):
+        rates = {**rates, **dict(zip(rows["currency"], rows["usd_per_unit"].astype(float)))}
+        tables[version] = FxTable(version, rates)
+    if not tables:
+        raise ValueError(f"{path}: no FX rates")
+    return tables
+
+
+def _fx_tables(path=None) -> dict:
+    path = Path(path or default_fx_path())
+    stat = path.stat()
+    return _read_rates(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def fx_versions(path=None) -> tuple:
+    """The rate-set versions in the file, oldest first."""
+    return tuple(_fx_tables(path))
+
+
+def load_fx_rates(path=None, version=None) -> FxTable:
+    """The rate set in effect on ``version`` (a date or ISO text; default the latest).
+
+    The file is re-read only when it changes on disk, so calling this on
+    every rerun or every batch chunk costs one ``stat``.
+    """
+    tables = _fx_tables(path)
+    if version is None:
+        return tables[max(tables)]
+    if isinstance(version, (date, datetime)):
+        version = version.isoformat()[:10]
+    effective = [v for v in tables if v <= str(version)]
+    if not effective:
+        raise ValueError(f"No FX rates in effect on {version} (first version {min(tables)})")
+    return tables[max(effective)]
+
+
+# ── CURRENCIES OF MARKETS AND FLIGHTS ────────────────────────────────────────
+
+def market_currency(market) -> str:
+    """ISO currency code of a market (USD for unknown markets, as ``get_currency_symbol``)."""
+    return REGION_CURRENCY.get(str(market or "").upper(), ("USD", "$"))[0]
+
+
+def market_currencies(markets) -> np.ndarray:
+    """Per row: the ISO currency code of a market column, resolved once per distinct market."""
+    codes, uniques = pd.factorize(pd.Series(markets, copy=False), use_na_sentinel=False)
+    return np.array([market_currency("" if pd.isna(market) else market) for market in uniques], dtype=object)[codes]
+
+
+def flight_currencies(flights, market="US") -> list:
+    """ISO code of every flight: ``currency_code``, else an unambiguous symbol, else ``market``'s."""
+    default = market_currency(market)
+    return [flight.get("currency_code") or _SYMBOL_CURRENCY.get(flight.get("currency"), default)
+            for flight in flights]
+
+
+def convert_flights(flights, target, market="US", table=None) -> FlightStore:
+    """Copies of ``flights`` with budget, CPM and total cost in ``target``.
+
+    The copies are labelled with the ISO code (``currency`` and
+    ``currency_code``), since a symbol like ``$`` names several currencies.
+    """
+    table = table or load_fx_rates()
+    records = [flight.to_dict() if isinstance(flight, Flight) else dict(flight) for flight in flights]
+    factors = np.broadcast_to(table.factors(flight_currencies(records, market), target), (len(records),))
+    for field in ("budget", "cpm", "total_cost"):
+        values = np.array([record.get(field) or 0.0 for record in records], dtype=np.float64) * factors
+        for record, value in zip(records, values.tolist()):
+            if field in record:
+                record[field] = value
+    for record in records:
+        record["currency"] = record["currency_code"] = target
+    return FlightStore(records)
+
+
+def rollup(frame, target, amounts=("budget",), by=None, currency=None, market="market", table=None) -> pd.DataFrame:
+    """Sum the ``amounts`` columns of a multi-currency frame in ``target``.
+
+    Each row's currency comes from the ``currency`` column (ISO codes) when
+    given, else from its ``market`` column. Returns one row per ``by``
+    group (one row overall without ``by``) with the converted sums, a
+    ``rows`` count and the target ``currency``.
+    """
+    table = table or load_fx_rates()
+    amounts = [amounts] if isinstance(amounts, str) else list(amounts)
+    if currency:
+        factors = table.factors(frame[currency], target)
+    else:
+        codes, markets = pd.factorize(frame[market], use_na_sentinel=False)
+        factors = table.factors(market_currencies(markets), target)[codes]
+    converted = pd.DataFrame({column: frame[column].fillna(0).to_numpy(dtype=np.float64) * factors
+                              for column in amounts}, index=frame.index)
+    if by:
+        keys = [by] if isinstance(by, str) else list(by)
+        grouped = converted.groupby([frame[key] for key in keys], sort=True, observed=True)
+        totals = grouped.sum().assign(rows=grouped.size()).reset_index()
+    else:
+        totals = pd.DataFrame({**{column: [converted[column].sum()] for column in amounts}, "rows": [len(frame)]})
+    return totals.assign(currency=target)
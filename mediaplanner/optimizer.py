@@ -0,0 +1,162 @@
+"""Budget allocation across product × publisher × format lines.
+
+Every CPM line from ``PRODUCT_RULES`` (fixed-fee takeovers have no
+impression goal and are left out) is a candidate, priced at its rate-card
+CPM (``get_default_cpm``) unless overridden. Lines on the same publisher ×
+device share one audience, so reach is scored per slot on the precomputed
+reach curves (:mod:`mediaplanner.reach_curves`) and each budget step goes to
+the cheapest open line of the slot with the best marginal gain per currency
+unit. Reach is concave in spend, so this greedy water-filling is optimal up
+to the step size; for the impressions objective it reduces to "cheapest CPM
+first". Product minimums are filled first (greedily within the product),
+then the rest of the budget goes to the best slots overall.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .delivery import UNCAPPED_DAILY_FREQUENCY
+from .product_index import compatible_devices, list_valid_combinations
+from .reach_curves import curve_reach_array, slot_audience
+from .resolvers import get_default_cpm, get_freq_cap_numeric, is_cpd_product
+
+OBJECTIVES = ("reach", "impressions")
+DEFAULT_STEPS = 500
+
+LINE_COLUMNS = ["product", "publisher", "format", "device", "cpm", "spend", "impressions", "reach", "budget_share"]
+
+
+def _lookup(mapping, product, ad_format):
+    """``mapping[(product, format)]``, else ``mapping[product]``, else None."""
+    if not mapping:
+        return None
+    return mapping.get((product, ad_format), mapping.get(product))
+
+
+def candidate_lines(products=None, cpm=None, cpm_bounds=None) -> pd.DataFrame:
+    """CPM lines eligible for allocation, one per product × publisher × format.
+
+    ``cpm`` overrides the rate-card CPM per product or (product, format).
+    ``cpm_bounds`` is a ``(low, high)`` pair, or a mapping of such pairs per
+    product or (product, format); lines whose CPM falls outside are dropped.
+    Each line plans on its "All Devices" slot where the format has one.
+    """
+    rows = []
+    for product, publisher, ad_format in dict.fromkeys(combo[:3] for combo in list_valid_combinations()):
+        if is_cpd_product(product) or (products is not None and product not in products):
+            continue
+        line_cpm = _lookup(cpm, product, ad_format) or get_default_cpm(product, ad_format)
+        bounds = cpm_bounds if isinstance(cpm_bounds, tuple) else _lookup(cpm_bounds, product, ad_format)
+        if bounds and not bounds[0] <= line_cpm <= bounds[1]:
+            continue
+        devices = compatible_devices(product, publisher, ad_format)
+        device = "All Devices" if "All Devices" in devices else devices[0]
+        rows.append({
+            "product": product, "publisher": publisher, "format": ad_format, "device": device,
+            "cpm": float(line_cpm),
+            "freq_cap": get_freq_cap_numeric(product) or UNCAPPED_DAILY_FREQUENCY,
+            "audience": slot_audience(publisher, device),
+        })
+    return pd.DataFrame(rows, columns=["product", "publisher", "format", "device", "cpm", "freq_cap", "audience"])
+
+
+def optimize_budget(total_budget, flight_days, objective="reach", products=None, min_spend=None,
+                    max_spend=None, cpm=None, cpm_bounds=None, turnover=0.30, steps=DEFAULT_STEPS) -> dict:
+    """Split ``total_budget`` over the candidate lines to maximize ``objective``.
+
+    ``min_spend`` / ``max_spend`` map product → amount. Returns ``lines``
+    (a DataFrame of ``LINE_COLUMNS``, spend > 0 first) plus totals:
+    ``spend``, ``impressions``, ``reach`` and ``unallocated`` (budget no
+    line could take because every line hit its maximum). Raises
+    ``ValueError`` for an unknown objective or infeasible minimums.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, not {objective!r}")
+    min_spend, max_spend = dict(min_spend or {}), dict(max_spend or {})
+    lines = candidate_lines(products, cpm, cpm_bounds)
+    missing = [p for p, amount in min_spend.items() if amount > 0 and p not in set(lines["product"])]
+    if missing:
+        raise ValueError(f"Minimum spend set for products with no eligible line: {', '.join(missing)}")
+    if sum(min_spend.values()) > total_budget:
+        raise ValueError("Product minimums exceed the total budget")
+    for product, amount in min_spend.items():
+        if amount > max_spend.get(product, np.inf):
+            raise ValueError(f"{product}: minimum spend is above its maximum")
+
+    days = max(1, int(flight_days))
+    product_codes, product_names = pd.factorize(lines["product"])
+    slot_codes, _ = pd.factorize(pd.MultiIndex.from_frame(lines[["publisher", "device"]]))
+    n_slots = int(slot_codes.max()) + 1 if len(lines) else 0
+    line_cpm = lines["cpm"].to_numpy(dtype=float)
+    line_cap = lines["freq_cap"].to_numpy(dtype=float)
+    line_audience = lines["audience"].to_numpy(dtype=float)
+    product_max = np.array([max_spend.get(p, np.inf) for p in product_names], dtype=float)
+    # Per slot, lines in CPM order: the first open one is the slot's next buy
+    slot_order = [np.flatnonzero(slot_codes == s)[np.argsort(line_cpm[slot_codes == s], kind="stable")]
+                  for s in range(n_slots)]
+
+    spend = np.zeros(len(lines))
+    product_spend = np.zeros(len(product_names))
+    slot_imps = np.zeros(n_slots)
+    step = total_budget / max(1, steps)
+
+    def _fill(budget, allowed):
+        """Greedy steps until ``budget`` is spent or no allowed line has room."""
+        while budget > 1e-9:
+            room = np.minimum(product_max[product_codes] - product_spend[product_codes], budget)
+            open_lines = allowed & (room > 1e-9)
+            buys = [order[open_lines[order]][0] if open_lines[order].any() else -1 for order in slot_order]
+            buys = np.array([b for b in buys if b >= 0], dtype=np.int64)
+            if not buys.size:
+                return budget
+            amount = np.minimum(room[buys], step)
+            extra = amount / line_cpm[buys] * 1000
+            if objective == "impressions":
+                gain = extra
+            else:
+                base = slot_imps[slot_codes[buys]]
+                gain = (curve_reach_array(base + extra, days, line_cap[buys], line_audience[buys], turnover)
+                        - curve_reach_array(base, days, line_cap[buys], line_audience[buys], turnover))
+            best = int(np.argmax(gain / amount))
+            line = buys[best]
+            spend[line] += amount[best]
+            product_spend[product_codes[line]] += amount[best]
+            slot_imps[slot_codes[line]] += extra[best]
+            budget -= amount[best]
+        return 0.0
+
+    remaining = float(total_budget)
+    for product, amount in min_spend.items():
+        if amount > 0:
+            code = list(product_names).index(product)
+            remaining -= amount - _fill(amount, product_codes == code)
+    unallocated = _fill(remaining, np.ones(len(lines), dtype=bool))
+
+    impressions = spend / np.where(line_cpm > 0, line_cpm, np.inf) * 1000
+    slot_reach = curve_reach_array(slot_imps, days, _slot_values(line_cap, slot_codes, spend, n_slots),
+                                   _slot_values(line_audience, slot_codes, spend, n_slots), turnover)
+    # A slot's reach is shared among its lines by impressions
+    share_of_slot = np.divide(impressions, slot_imps[slot_codes], out=np.zeros(len(lines)),
+                              where=slot_imps[slot_codes] > 0)
+    result = lines.assign(spend=spend, impressions=impressions,
+                          reach=slot_reach[slot_codes] * share_of_slot if len(lines) else 0.0,
+                          budget_share=spend / total_budget if total_budget else 0.0)
+    result = result.sort_values(["spend", "cpm"], ascending=[False, True], ignore_index=True)[LINE_COLUMNS]
+    return {
+        "lines": result,
+        "spend": float(spend.sum()),
+        "impressions": float(impressions.sum()),
+        "reach": float(slot_reach.sum()),
+        "unallocated": float(unallocated),
+        "objective": objective,
+        "flight_days": days,
+    }
+
+
+def _slot_values(values, slot_codes, spend, n_slots) -> np.ndarray:
+    """Per slot, the value of its highest-spend line (cap / audience used to score the slot)."""
+    out = np.zeros(n_slots)
+    for slot in range(n_slots):
+        members = np.flatnonzero(slot_codes == slot)
+        out[slot] = values[members[np.argmax(spend[members])]]
+    return out
@@ -0,0 +1,256 @@
+"""Local SQLite store for saved plans: campaign details, flights and forecasts.
+
+A plan is stored as one ``plans`` row (campaign details plus the plan's
+date range and totals, for listing without a join), its ``flights`` rows
+and its per-(product, publisher, format) ``forecasts`` rows (Spec §6 metrics
+as computed at save time). Plans are indexed by advertiser, market and date
+range, and their flights by publisher and product, so a search over tens of
+thousands of plans is a few index lookups. :meth:`PlanStore.save_plans` and
+:meth:`PlanStore.load_plans` move many plans in one transaction / three
+queries.
+
+A plan dict has the shape of a portfolio campaign
+(:mod:`mediaplanner.portfolio`)::
+
+    {"campaign_info": {...}, "flights": [...], "forecasts": [...]}   # forecasts optional
+"""
+
+import json
+import sqlite3
+from datetime import date, datetime
+
+from .flights import FLIGHT_FIELDS, FlightStore, group_flights
+from .forecasting import forecast_audience_array
+from .resolvers import get_freq_cap_numeric, is_cpd_product
+
+DEFAULT_DB_PATH = "planner_plans.db"
+
+FORECAST_FIELDS = (
+    "product", "publisher", "format", "budget", "impressions", "cpm", "days", "flights",
+    "avg_daily_uniques", "avg_frequency", "lifetime_uniques",
+)
+
+# Columns of the plans table that double as search keys / listing fields
+PLAN_FIELDS = ("advertiser", "campaign", "market", "start_date", "end_date",
+               "total_budget", "total_volume", "flight_count", "saved_at")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS plans (
+    plan_id      INTEGER PRIMARY KEY,
+    advertiser   TEXT,
+    campaign     TEXT,
+    market       TEXT,
+    start_date   TEXT,
+    end_date     TEXT,
+    total_budget REAL,
+    total_volume REAL,
+    flight_count INTEGER,
+    saved_at     TEXT,
+    details      TEXT
+);
+CREATE TABLE IF NOT EXISTS flights (
+    plan_id INTEGER NOT NULL REFERENCES plans(plan_id) ON DELETE CASCADE,
+    {", ".join(FLIGHT_FIELDS)}
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    plan_id INTEGER NOT NULL REFERENCES plans(plan_id) ON DELETE CASCADE,
+    {", ".join(f'"{field}"' for field in FORECAST_FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS plans_advertiser ON plans(advertiser);
+CREATE INDEX IF NOT EXISTS plans_market     ON plans(market);
+CREATE INDEX IF NOT EXISTS plans_dates      ON plans(start_date, end_date);
+CREATE INDEX IF NOT EXISTS flights_plan      ON flights(plan_id);
+CREATE INDEX IF NOT EXISTS flights_publisher ON flights(publisher, plan_id);
+CREATE INDEX IF NOT EXISTS flights_product   ON flights(product, plan_id);
+CREATE INDEX IF NOT EXISTS forecasts_plan    ON forecasts(plan_id);
+"""
+
+_DATE_KEYS = ("start_date", "end_date")
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _from_iso(value):
+    """ISO text back to a ``date`` (other values unchanged)."""
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _forecast_rows(groups, turnover) -> list:
+    """Forecast rows for a list of ((product, publisher, format), group) pairs, in one vectorized pass."""
+    caps = [0 if is_cpd_product(key[0]) else get_freq_cap_numeric(key[0]) for key, _ in groups]
+    uniques, frequency, lifetime = forecast_audience_array(
+        [g["impressions"] for _, g in groups], [max(1, g["days"]) for _, g in groups], caps, turnover)
+    return [
+        {"product": key[0], "publisher": key[1], "format": key[2], "budget": g["budget"],
+         "impressions": g["impressions"], "cpm": g["cpm"], "days": g["days"], "flights": g["flights"],
+         "avg_daily_uniques": float(uniques[i]), "avg_frequency": float(frequency[i]),
+         "lifetime_uniques": float(lifetime[i])}
+        for i, (key, g) in enumerate(groups)
+    ]
+
+
+def plan_forecasts(flights, turnover: float = 0.30) -> list:
+    """Per-(product, publisher, format) forecast rows of a flight list (``FORECAST_FIELDS``).
+
+    Same groups and §6 formulas as the planner's forecasting table; CPD
+    groups get 0 audience metrics.
+    """
+    return _forecast_rows(list(group_flights(flights).items()), turnover)
+
+
+class PlanStore:
+    """Saved plans in a SQLite file (``":memory:"`` for a throwaway store).
+
+    Usable as a context manager; every write runs in its own transaction.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self):
+        """Bring a store saved by an older version up to the current flight / forecast fields."""
+        for table, fields in (("flights", FLIGHT_FIELDS), ("forecasts", FORECAST_FIELDS)):
+            present = {row["name"] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            for field in fields:
+                if field not in present:
+                    self._db.execute(f'ALTER TABLE {table} ADD COLUMN "{field}"')
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    # ── WRITE ────────────────────────────────────────────────────────────────
+
+    def save_plan(self, campaign_info, flights, forecasts=None, turnover: float = 0.30) -> int:
+        """Save one plan; returns its ``plan_id``. Forecasts are computed when not given."""
+        return self.save_plans([{"campaign_info": campaign_info, "flights": flights, "forecasts": forecasts}],
+                               turnover=turnover)[0]
+
+    def save_plans(self, plans, turnover: float = 0.30) -> list:
+        """Save many plans in one transaction; returns their ``plan_id`` values in order."""
+        saved_at = datetime.now().isoformat(timespec="seconds")
+        ids, flight_rows, forecast_rows, pending = [], [], [], []
+        with self._db:
+            for plan in plans:
+                info = dict(plan.get("campaign_info") or {})
+                flights = list(plan.get("flights") or [])
+                starts = [_iso(f.get("start_date")) for f in flights if f.get("start_date")]
+                ends = [_iso(f.get("end_date")) for f in flights if f.get("end_date")]
+                cursor = self._db.execute(
+                    f"INSERT INTO plans ({', '.join(PLAN_FIELDS)}, details) VALUES ({', '.join('?' * 10)})",
+                    (info.get("advertiser", ""), info.get("campaign", ""), info.get("market", ""),
+                     min(starts) if starts else _iso(info.get("start_date")),
+                     max(ends) if ends else _iso(info.get("end_date")),
+                     sum(f.get("budget", 0) or 0 for f in flights), sum(f.get("volume", 0) or 0 for f in flights),
+                     len(flights), saved_at, json.dumps({k: _iso(v) for k, v in info.items()}, default=str)),
+                )
+                plan_id = cursor.lastrowid
+                ids.append(plan_id)
+                flight_rows.extend((plan_id, *(_iso(f.get(field)) for field in FLIGHT_FIELDS)) for f in flights)
+                forecasts = plan.get("forecasts")
+                if forecasts is None:
+                    # Computed below for every plan at once
+                    pending.extend((plan_id, group) for group in group_flights(flights).items())
+                else:
+                    forecast_rows.extend((plan_id, *(row.get(f) for f in FORECAST_FIELDS)) for row in forecasts)
+            if pending:
+                computed = _forecast_rows([group for _, group in pending], turnover)
+                forecast_rows.extend((plan_id, *(row[f] for f in FORECAST_FIELDS))
+                                     for (plan_id, _), row in zip(pending, computed))
+            for table, fields, rows in (("flights", FLIGHT_FIELDS, flight_rows),
+                                        ("forecasts", FORECAST_FIELDS, forecast_rows)):
+                columns = ", ".join(f'"{field}"' for field in ("plan_id", *fields))
+                self._db.executemany(f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * (len(fields) + 1))})",
+                                     rows)
+        return ids
+
+    def delete_plans(self, plan_ids) -> int:
+        """Delete plans (and their flights / forecasts); returns the number deleted."""
+        with self._db:
+            return self._db.execute("DELETE FROM plans WHERE plan_id IN (SELECT value FROM json_each(?))",
+                                    (json.dumps([int(i) for i in plan_ids]),)).rowcount
+
+    # ── READ ─────────────────────────────────────────────────────────────────
+
+    def load_plan(self, plan_id):
+        """One plan dict (``plan_id``, ``saved_at``, ``campaign_info``, ``flights`` as a
+        ``FlightStore``, ``forecasts``), or ``None`` if there is no such plan."""
+        plans = self.load_plans([plan_id])
+        return plans[0] if plans else None
+
+    def load_plans(self, plan_ids) -> list:
+        """Plan dicts for ``plan_ids`` (missing ids skipped), in the order given."""
+        ids = json.dumps([int(i) for i in plan_ids])
+        selected = "SELECT value FROM json_each(?)"
+        flights, forecasts = {}, {}
+        for row in self._db.execute(f"SELECT * FROM flights WHERE plan_id IN ({selected}) ORDER BY rowid", (ids,)):
+            flights.setdefault(row["plan_id"], []).append(
+                {field: _from_iso(row[field]) for field in FLIGHT_FIELDS if row[field] is not None})
+        for row in self._db.execute(f"SELECT * FROM forecasts WHERE plan_id IN ({selected}) ORDER BY rowid", (ids,)):
+            forecasts.setdefault(row["plan_id"], []).append({field: row[field] for field in FORECAST_FIELDS})
+        plans = {}
+        for row in self._db.execute(f"SELECT plan_id, saved_at, details FROM plans WHERE plan_id IN ({selected})",
+                                    (ids,)):
+            info = {key: _from_iso(value) if key in _DATE_KEYS else value
+                    for key, value in json.loads(row["details"]).items()}
+            plans[row["plan_id"]] = {"plan_id": row["plan_id"], "saved_at": row["saved_at"], "campaign_info": info,
+                                     "flights": FlightStore(flights.get(row["plan_id"], [])),
+                                     "forecasts": forecasts.get(row["plan_id"], [])}
+        return [plans[i] for i in json.loads(ids) if i in plans]
+
+    def find_plans(self, advertiser=None, market=None, publisher=None, product=None, start=None, end=None,
+                   limit=None):
+        """Saved plans matching every given filter, newest first, as a DataFrame.
+
+        ``advertiser`` / ``market`` match exactly; ``publisher`` / ``product``
+        match plans with at least one such flight; ``start`` / ``end`` keep
+        plans whose date range overlaps the window. Columns: ``plan_id`` plus
+        ``PLAN_FIELDS``.
+        """
+        import pandas as pd
+
+        where, params = [], []
+        for column, value in (("advertiser", advertiser), ("market", market)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        for column, value in (("publisher", publisher), ("product", product)):
+            if value:
+                where.append(f"EXISTS (SELECT 1 FROM flights f WHERE f.plan_id = plans.plan_id AND f.{column} = ?)")
+                params.append(value)
+        if start:
+            where.append("end_date >= ?")
+            params.append(_iso(start))
+        if end:
+            where.append("start_date <= ?")
+            params.append(_iso(end))
+        sql = f"SELECT plan_id, {', '.join(PLAN_FIELDS)} FROM plans"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY plan_id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self._db, params=params)
@@ -0,0 +1,368 @@
+"""Multi-campaign portfolio exports built in a process pool.
+
+* :func:`create_portfolio_export` – one workbook: a Portfolio Summary plus a
+  Media Plan + Internal Setup sheet pair per campaign.
+* :func:`render_campaign_pdfs` – one IO PDF per campaign.
+* :func:`create_portfolio_pdf` – a single IO pack PDF with a linked table of
+  contents and one bookmarked plan per campaign.
+
+A campaign is a dict shaped like the planner's export inputs::
+
+    {
+        "campaign_info":     {...},   # advertiser, campaign, market, publisher, product, format, device
+        "flights":           [...],   # flight dicts as in st.session_state.flights
+        "cpm_rate":          12.0,    # optional, default 0.0
+        "currency_sym":      "$",     # optional, defaults from the market
+        "currency_code":     "USD",   # optional, defaults from the market
+        "product_config":    {...},   # optional, resolved from campaign_info when omitted
+        "unified_checklist": [...],   # optional (item, value) pairs for the QC section
+        "vcr_target":        75,      # optional, video only
+        "completed_views":   0,       # optional, video only
+    }
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table
+
+from .fx import load_fx_rates, market_currency
+from .product_index import lookup_product_config
+from .resolvers import get_currency_symbol
+from .exporters import (
+    _internal_setup_sheet, _media_plan_sheet, _pdf_plan_elements, _pdf_styles, _register_styles, _write_sheet,
+)
+
+# Below this many campaigns the pool start-up costs more than it saves
+_MIN_PARALLEL_CAMPAIGNS = 4
+
+
+@contextmanager
+def _campaign_map(worker, campaigns, max_workers=None):
+    """Yield ``worker`` results for ``campaigns`` in order, from a process pool when it pays."""
+    workers = max_workers or os.cpu_count() or 1
+    if workers > 1 and len(campaigns) >= _MIN_PARALLEL_CAMPAIGNS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield pool.map(worker, campaigns, chunksize=max(1, len(campaigns) // (workers * 4)))
+    else:
+        yield map(worker, campaigns)
+
+
+def _currency_sym(campaign) -> str:
+    return campaign.get("currency_sym") or get_currency_symbol(campaign.get("campaign_info", {}).get("market", "US"))
+
+
+def _currency_code(campaign) -> str:
+    return campaign.get("currency_code") or market_currency(campaign.get("campaign_info", {}).get("market", "US"))
+
+
+def _campaign_sheets(campaign) -> dict:
+    """Worker: render one campaign's Media Plan and Internal Setup sheets.
+
+    The sheets are serialised here, in the worker, to standalone worksheet XML
+    files; only their paths and the summary aggregates go back to the parent.
+    """
+    info = campaign.get("campaign_info", {})
+    currency_sym = _currency_sym(campaign)
+    product_config = campaign.get("product_config") or lookup_product_config(
+        info.get("product", ""), info.get("publisher", ""),
+        info.get("format", "Banner"), info.get("device", "All Devices"),
+    )
+    media = _media_plan_sheet(
+        campaign.get("flights", []), info, campaign.get("cpm_rate", 0.0), currency_sym,
+        vcr_target=campaign.get("vcr_target"), completed_views=campaign.get("completed_views"),
+    )
+    internal = _internal_setup_sheet(info, product_config, campaign.get("unified_checklist", []))
+
+    wb = Workbook(write_only=True)
+    media_ws = wb.create_sheet("Media Plan")
+    _register_styles(media_ws)
+    _write_sheet(media_ws, media)
+    _write_sheet(wb.create_sheet("Internal Setup"), internal)
+
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+        book_path = tmp.name
+    sheet_paths = []
+    try:
+        wb.save(book_path)
+        with zipfile.ZipFile(book_path) as book:
+            for part in ("xl/worksheets/sheet1.xml", "xl/worksheets/sheet2.xml"):
+                with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as out, book.open(part) as src:
+                    shutil.copyfileobj(src, out)
+                    sheet_paths.append(out.name)
+    finally:
+        os.remove(book_path)
+
+    groups = media["groups"]
+    return {
+        "sheet_paths": sheet_paths,
+        "currency_sym": currency_sym,
+        "currency_code": _currency_code(campaign),
+        "flights": len(campaign.get("flights", [])),
+        "budget": sum(g["budget"] for g in groups.values()),
+        "imps": sum(g["impressions"] for g in groups.values()),
+        "groups": groups,
+    }
+
+
+def _sheet_title(index, label, campaign_info) -> str:
+    """Unique, Excel-safe sheet title (≤ 31 chars, no []:*?/\\)."""
+    name = re.sub(r"[\[\]:*?/\\]", "_", campaign_info.get("campaign") or campaign_info.get("advertiser") or "Plan")
+    return f"{index:03d} {label} {name}"[:31]
+
+
+def _summary_sheet(campaign_rows, product_rows, reporting_currency=None, fx_table=None) -> dict:
+    """Portfolio Summary sheet spec: one row per campaign, then totals by product line.
+
+    Totals are kept per currency (ISO code, as ``$`` names several). With a
+    ``reporting_currency`` and more than one currency, a converted grand
+    total follows them.
+    """
+    rows = [[("PORTFOLIO SUMMARY - MONETIZE GUARANTEED", "title")], [],
+            [("Campaigns:", "label"), (len(campaign_rows), "value"), None,
+             ("Request Date:", "label"), (datetime.now().strftime("%m/%d/%Y"), "value")], []]
+
+    rows.append([("CAMPAIGNS", "section")])
+    rows.append([(h, "subheader") for h in ["#", "Advertiser", "Campaign", "Market", "Flights", "Budget", "Total Imps"]])
+    totals = {}
+    for idx, (info, currency_sym, currency_code, flights, budget, imps) in enumerate(campaign_rows, 1):
+        rows.append([idx, info.get("advertiser", ""), info.get("campaign", ""), info.get("market", ""),
+                     flights, f"{budget:,.2f} {currency_sym}", f"{imps:,.0f}"])
+        total = totals.setdefault(currency_code, [0, 0.0, 0.0])
+        total[0] += flights
+        total[1] += budget
+        total[2] += imps
+    for currency_code, (flights, budget, imps) in totals.items():
+        rows.append([(val, "bold") for val in
+                     ["TOTAL", "", "", currency_code, flights, f"{budget:,.2f} {currency_code}", f"{imps:,.0f}"]])
+    if reporting_currency and len(totals) > 1:
+        fx_table = fx_table or load_fx_rates()
+        converted = fx_table.convert([t[1] for t in totals.values()], list(totals), reporting_currency).sum()
+        rows.append([(val, "bold") for val in
+                     ["TOTAL", "", f"FX {fx_table.version}", reporting_currency, sum(t[0] for t in totals.values()),
+                      f"{converted:,.2f} {reporting_currency}", f"{sum(t[2] for t in totals.values()):,.0f}"]])
+
+    rows += [[], [("BY PRODUCT", "section")]]
+    rows.append([(h, "subheader") for h in ["Product", "Publisher", "Format", "Campaigns", "Budget", "Total Imps", "Days"]])
+    for (fprod, fpub, ffmt, currency_code), agg in product_rows.items():
+        rows.append([fprod, fpub, ffmt, agg["campaigns"], f"{agg['budget']:,.2f} {currency_code}",
+                     f"{agg['imps']:,.0f}", agg["days"]])
+
+    return {
+        "rows": rows,
+        "merged": ["A1:F1"],
+        "widths": {"A": 22, "B": 22, "C": 22, "D": 12, "E": 12, "F": 18, "G": 16},
+        "heights": {1: 25},
+    }
+
+
+def create_portfolio_export(campaigns, path=None, max_workers=None, reporting_currency=None) -> str:
+    """Write one workbook covering every campaign and return its path.
+
+    Each campaign's sheets are built and serialised in a ``ProcessPoolExecutor``
+    (``max_workers`` defaults to the CPU count; ``1`` builds in-process). The
+    parent only writes the Portfolio Summary and splices the worker sheet XML
+    into the final package, which works because every workbook registers the
+    shared export styles in the same order. ``reporting_currency`` (an ISO
+    code) adds a grand total converted at the latest FX rates when the
+    campaigns span currencies. ``path`` defaults to a new temporary file
+    which the caller removes.
+    """
+    campaigns = list(campaigns)
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+            path = tmp.name
+
+    # Skeleton workbook: summary first, then an empty placeholder per campaign sheet
+    wb = Workbook(write_only=True)
+    summary_ws = wb.create_sheet("Portfolio Summary")
+    _register_styles(summary_ws)
+    for idx, campaign in enumerate(campaigns, 1):
+        info = campaign.get("campaign_info", {})
+        wb.create_sheet(_sheet_title(idx, "MP", info))
+        wb.create_sheet(_sheet_title(idx, "IS", info))
+
+    # Placeholder sheet N (1-based, summary is sheet1) → worker XML file
+    replacements = {}
+    campaign_rows, product_rows = [], {}
+    try:
+        with _campaign_map(_campaign_sheets, campaigns, max_workers) as results:
+            for idx, (campaign, result) in enumerate(zip(campaigns, results), 1):
+                media_xml, internal_xml = result["sheet_paths"]
+                replacements[f"xl/worksheets/sheet{2 * idx}.xml"] = media_xml
+                replacements[f"xl/worksheets/sheet{2 * idx + 1}.xml"] = internal_xml
+
+                currency_code = result["currency_code"]
+                campaign_rows.append((campaign.get("campaign_info", {}), result["currency_sym"], currency_code,
+                                      result["flights"], result["budget"], result["imps"]))
+                for (fprod, fpub, ffmt), g in result["groups"].items():
+                    agg = product_rows.setdefault((fprod, fpub, ffmt, currency_code),
+                                                  {"campaigns": 0, "budget": 0.0, "imps": 0.0, "days": 0})
+                    agg["campaigns"] += 1
+                    agg["budget"] += g["budget"]
+                    agg["imps"] += g["impressions"]
+                    agg["days"] += g["days"]
+
+        _write_sheet(summary_ws, _summary_sheet(campaign_rows, product_rows, reporting_currency))
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+            skeleton_path = tmp.name
+        try:
+            wb.save(skeleton_path)
+            with zipfile.ZipFile(skeleton_path) as skeleton, \
+                    zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as out:
+                for item in skeleton.infolist():
+                    source = replacements.get(item.filename)
+                    with out.open(item.filename, "w") as dst:
+                        if source is None:
+                            with skeleton.open(item) as src:
+                                shutil.copyfileobj(src, dst)
+                        else:
+                            with open(source, "rb") as src:
+                                shutil.copyfileobj(src, dst)
+        finally:
+            os.remove(skeleton_path)
+    finally:
+        for sheet_path in replacements.values():
+            os.remove(sheet_path)
+    return path
+
+
+# ── IO PDFS ──────────────────────────────────────────────────────────────────
+
+def _campaign_pdf_elements(campaign) -> list:
+    return _pdf_plan_elements(
+        campaign.get("flights", []), campaign.get("campaign_info", {}), campaign.get("cpm_rate", 0.0),
+        _currency_sym(campaign),
+        vcr_target=campaign.get("vcr_target"), completed_views=campaign.get("completed_views"),
+    )
+
+
+def _campaign_pdf(campaign) -> bytes:
+    """Worker: render one campaign's IO PDF."""
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(_campaign_pdf_elements(campaign))
+    return buffer.getvalue()
+
+
+def render_campaign_pdfs(campaigns, max_workers=None) -> list:
+    """IO PDF bytes for every campaign, in input order, rendered in a process pool."""
+    campaigns = list(campaigns)
+    with _campaign_map(_campaign_pdf, campaigns, max_workers) as results:
+        return list(results)
+
+
+class _PageRef(Flowable):
+    """TOC cell showing the page a plan starts on, drawn from a form defined when the plan is placed.
+
+    PDF resolves forms by name when the file is read, so the contents can be
+    laid out before the plans they point to.
+    """
+
+    FONT, SIZE = "Helvetica", 9
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def wrap(self, avail_width, avail_height):
+        return 0, self.SIZE * 1.2  # zero width: the right-aligned cell puts it at the padding edge
+
+    def draw(self):
+        self.canv.doForm(f"page_{self.key}")
+
+    @classmethod
+    def fill(cls, canv, key, page):
+        """Define the form every ``_PageRef(key)`` shows: ``page``, right-aligned on its origin."""
+        canv.beginForm(f"page_{key}", lowerx=-inch, upperx=0, uppery=inch)
+        canv.setFont(cls.FONT, cls.SIZE)
+        canv.drawRightString(0, 0.2 * cls.SIZE, str(page))
+        canv.endForm()
+
+
+class _PortfolioDocTemplate(SimpleDocTemplate):
+    """Adds a PDF outline entry for every flowable tagged with ``_bookmark``.
+
+    The page it lands on is also filled into the table of contents
+    (:class:`_PageRef`).
+    """
+
+    def afterFlowable(self, flowable):
+        bookmark = getattr(flowable, "_bookmark", None)
+        if bookmark:
+            key, label = bookmark
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(label, key, level=0)
+            _PageRef.fill(self.canv, key, self.page)
+
+
+def _toc_elements(campaigns) -> list:
+    """Table of contents: one linked row per campaign with the page its plan starts on."""
+    styles = _pdf_styles()
+    link = styles["toc_entry"]
+
+    def entry(idx, text):
+        text = escape(str(text))
+        return Paragraph(f'<a href="#plan{idx}">{text}</a>', link)
+
+    rows = [["#", "Advertiser", "Campaign", "Market", "Flights", "Budget", "Page"]]
+    for idx, campaign in enumerate(campaigns, 1):
+        info = campaign.get("campaign_info", {})
+        flights = campaign.get("flights", [])
+        budget = sum(fl.get("budget", 0) for fl in flights)
+        rows.append([
+            str(idx),
+            entry(idx, info.get("advertiser", "")),
+            entry(idx, info.get("campaign", "")),
+            info.get("market", ""),
+            str(len(flights)),
+            f"{budget:,.2f} {_currency_sym(campaign)}",
+            _PageRef(f"plan{idx}"),
+        ])
+    toc = Table(rows, colWidths=[0.4*inch, 1.6*inch, 1.9*inch, 0.6*inch, 0.6*inch, 1.3*inch, 0.5*inch],
+                repeatRows=1)
+    toc.setStyle(styles["toc_table"])
+    return [
+        Paragraph("PORTFOLIO IO PACK - MONETIZE GUARANTEED", styles["title"]),
+        Spacer(1, 0.1*inch),
+        Paragraph(f"{len(campaigns)} campaign(s) &middot; {datetime.now().strftime('%m/%d/%Y')}", styles["heading"]),
+        toc,
+    ]
+
+
+def create_portfolio_pdf(campaigns, path=None) -> str:
+    """Write a single IO pack PDF covering every campaign and return its path.
+
+    The pack opens with a table of contents (linked rows, start page per plan)
+    followed by each campaign's IO plan on its own pages, with a PDF outline
+    entry per campaign. Everything is laid out in one pass — each plan is
+    rendered once, and the contents' page numbers are filled in as the plans
+    are placed. ``path`` defaults to a new temporary file which the caller
+    removes.
+    """
+    campaigns = list(campaigns)
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            path = tmp.name
+
+    elements = _toc_elements(campaigns)
+    for idx, campaign in enumerate(campaigns, 1):
+        plan = _campaign_pdf_elements(campaign)
+        info = campaign.get("campaign_info", {})
+        plan[0]._bookmark = (f"plan{idx}", f"{idx}. {info.get('advertiser', '')} - {info.get('campaign', '')}")
+        elements.append(PageBreak())
+        elements.extend(plan)
+
+    doc = _PortfolioDocTemplate(path, pagesize=letter, title="Portfolio IO Pack")
+    doc.build(elements)
+    return path
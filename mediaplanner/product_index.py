@@ -0,0 +1,190 @@
+"""Precompiled product × publisher × format × device index over ``PRODUCT_RULES``.
+
+The nested matrix is flattened once at import into immutable tables, so
+config resolution and the compatible-format / compatible-device lists are
+single dict lookups instead of a rescan and a ``{**base, **fmt, **dev}``
+merge per call. :func:`product_matrix_frame` exposes the same table as a
+DataFrame for bulk joins against deal files.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+
+from .rules import PRODUCT_RULES
+
+_FORMAT_ORDER = ["Banner", "Native", "Video"]
+_DEVICE_ORDER = ["All Devices", "Desktop", "Mobile", "Tablet"]
+_DEFAULT_DEVICES = ["All Devices", "Desktop", "Mobile"]
+
+# Columns that identify a line in the matrix
+MATRIX_KEYS = ["product", "publisher", "format", "device"]
+
+
+# ── MATRIX SCANS (source of truth for the index) ─────────────────────────────
+
+def _scan_compatible_formats(product, publisher):
+    """Compatible ad formats for a product + publisher, read from the nested matrix."""
+    product_info = PRODUCT_RULES.get(product, {})
+    all_formats = product_info.get("formats", ["Banner"])
+
+    # If product has publisher_format_config, derive available formats for this publisher
+    pfc = product_info.get("publisher_format_config", {})
+    if pfc:
+        pub_formats = [fmt for (pub, fmt) in pfc.keys() if pub == publisher]
+        if pub_formats:
+            return sorted(set(pub_formats), key=_FORMAT_ORDER.index
+                          if all(f in _FORMAT_ORDER for f in pub_formats) else str)
+    return all_formats
+
+
+def _device_config(product, publisher, ad_format):
+    """device_config that applies to a product × publisher × format."""
+    product_info = PRODUCT_RULES.get(product, {})
+    pfc = product_info.get("publisher_format_config", {})
+    key = (publisher, ad_format)
+    if key in pfc:
+        return pfc[key].get("device_config", {})
+    return product_info.get("device_config", {})
+
+
+def _scan_compatible_devices(product, publisher, ad_format):
+    """Valid device options for a product × publisher × format, read from the nested matrix."""
+    dev_cfg = _device_config(product, publisher, ad_format)
+    if dev_cfg:
+        devices = [d for d in _DEVICE_ORDER if d in dev_cfg]
+        return devices if devices else list(dev_cfg.keys())
+    return list(_DEFAULT_DEVICES)
+
+
+def _merge_product_config(product, publisher, ad_format, device="All Devices"):
+    """Flat targeting dict for a product / publisher / format / device (base ← format ← device)."""
+    base = dict(PRODUCT_RULES.get(product, {}))
+
+    pfc = base.get("publisher_format_config", {})
+    key = (publisher, ad_format)
+
+    if key in pfc:
+        fmt_cfg = dict(pfc[key])
+        dev_cfg = fmt_cfg.pop("device_config", {})
+        fallback = dev_cfg.get("All Devices", next(iter(dev_cfg.values()), {}) if dev_cfg else {})
+        dev_specific = dict(dev_cfg.get(device, fallback))
+        result = {**base, **fmt_cfg, **dev_specific}
+    else:
+        dev_cfg = base.get("device_config", {})
+        fallback = dev_cfg.get("All Devices", next(iter(dev_cfg.values()), {}) if dev_cfg else {})
+        dev_specific = dict(dev_cfg.get(device, fallback))
+        result = {**base, **dev_specific}
+
+    for k in ("publisher_format_config", "device_config"):
+        result.pop(k, None)
+    return result
+
+
+# ── INDEX BUILD ──────────────────────────────────────────────────────────────
+
+def _build_index():
+    formats, devices, fallback, configs = {}, {}, {}, {}
+    for product, info in PRODUCT_RULES.items():
+        for publisher in info.get("publishers", []):
+            pub_formats = tuple(_scan_compatible_formats(product, publisher))
+            formats[(product, publisher)] = pub_formats
+            for ad_format in pub_formats:
+                line = (product, publisher, ad_format)
+                line_devices = tuple(_scan_compatible_devices(product, publisher, ad_format))
+                devices[line] = line_devices
+                # Devices outside device_config resolve to "All Devices" or the first entry
+                dev_cfg = _device_config(product, publisher, ad_format)
+                fallback[line] = "All Devices" if "All Devices" in dev_cfg or not dev_cfg else next(iter(dev_cfg))
+                for device in dict.fromkeys(line_devices + tuple(dev_cfg)):
+                    configs[line + (device,)] = MappingProxyType(
+                        _merge_product_config(product, publisher, ad_format, device)
+                    )
+    return (MappingProxyType(formats), MappingProxyType(devices),
+            MappingProxyType(fallback), MappingProxyType(configs))
+
+
+_COMPATIBLE_FORMATS, _COMPATIBLE_DEVICES, _FALLBACK_DEVICE, PRODUCT_INDEX = _build_index()
+
+
+# ── LOOKUPS ──────────────────────────────────────────────────────────────────
+
+def compatible_formats(product, publisher) -> tuple:
+    """Compatible formats for a product + publisher (O(1) for sold combinations)."""
+    found = _COMPATIBLE_FORMATS.get((product, publisher))
+    return found if found is not None else tuple(_scan_compatible_formats(product, publisher))
+
+
+def compatible_devices(product, publisher, ad_format) -> tuple:
+    """Compatible devices for a product × publisher × format (O(1) for matrix lines)."""
+    found = _COMPATIBLE_DEVICES.get((product, publisher, ad_format))
+    return found if found is not None else tuple(_scan_compatible_devices(product, publisher, ad_format))
+
+
+@lru_cache(maxsize=256)
+def _off_matrix_config(product, publisher, ad_format, device):
+    return MappingProxyType(_merge_product_config(product, publisher, ad_format, device))
+
+
+def lookup_product_config(product, publisher, ad_format, device="All Devices"):
+    """Read-only resolved config for a product × publisher × format × device.
+
+    Devices outside the line's device_config resolve exactly as
+    ``get_product_config`` does; combinations outside the matrix are merged
+    once and cached.
+    """
+    config = PRODUCT_INDEX.get((product, publisher, ad_format, device))
+    if config is not None:
+        return config
+    fallback = _FALLBACK_DEVICE.get((product, publisher, ad_format))
+    if fallback is not None:
+        return PRODUCT_INDEX[(product, publisher, ad_format, fallback)]
+    return _off_matrix_config(product, publisher, ad_format, device)
+
+
+def list_valid_combinations() -> list:
+    """Every sold (product, publisher, format, device) line, in matrix order."""
+    return list(PRODUCT_INDEX.keys())
+
+
+# ── COLUMNAR VIEW ────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def _matrix_frame():
+    import pandas as pd
+
+    rows = [dict(zip(MATRIX_KEYS, key), **config) for key, config in PRODUCT_INDEX.items()]
+    return pd.DataFrame(rows)
+
+
+def product_matrix_frame():
+    """The flattened matrix as a DataFrame: ``MATRIX_KEYS`` plus one column per config field."""
+    return _matrix_frame().copy()
+
+
+@lru_cache(maxsize=1)
+def _join_frame():
+    import pandas as pd
+
+    # One row per requestable device name, pointing at the config it resolves to
+    aliases = [
+        (*line, requested, requested if requested in devices else _FALLBACK_DEVICE[line])
+        for line, devices in _COMPATIBLE_DEVICES.items()
+        for requested in _DEVICE_ORDER
+    ]
+    alias_frame = pd.DataFrame(aliases, columns=MATRIX_KEYS + ["resolved_device"])
+    matrix = _matrix_frame().rename(columns={"device": "resolved_device"})
+    return alias_frame.merge(matrix, on=["product", "publisher", "format", "resolved_device"], how="left")
+
+
+def resolve_deals_frame(deals, product="product", publisher="publisher", ad_format="format",
+                        device="device"):
+    """Left-join resolved configs onto ``deals`` by product × publisher × format × device.
+
+    Config fields are added as columns (suffixed ``_matrix`` where they clash
+    with a deal column), plus ``resolved_device``, the device slot the config
+    came from. Rows outside the matrix get NaN.
+    """
+    tmp_keys = [f"__{k}" for k in MATRIX_KEYS]
+    left = deals.assign(**{tmp: deals[col] for tmp, col in zip(tmp_keys, (product, publisher, ad_format, device))})
+    right = _join_frame().rename(columns=dict(zip(MATRIX_KEYS, tmp_keys)))
+    return left.merge(right, how="left", on=tmp_keys, suffixes=("", "_matrix")).drop(columns=tmp_keys)
@@ -0,0 +1,146 @@
+"""Monte Carlo reach and frequency for one plan line.
+
+The closed-form §6.4 estimate grows lifetime uniques linearly with a single
+turnover rate and never saturates. Here a synthetic pool of users stands in
+for the publisher × device audience of a market:
+
+- each user visits on any day with a propensity drawn from a Beta
+  distribution whose mean is ``VISIT_RATE`` and whose spread is set so the
+  share of new visitors from one day to the next equals ``turnover``;
+  the pool is sized so daily visitors match ``DAILY_AUDIENCE_UNIQUES``,
+  which is keyed by publisher × device only: every market gets the same
+  audience unless the caller passes a market's own ``daily_uniques``
+- over the flight a user's visit days are Binomial(days, propensity)
+- on each visit day the line's exposures are Poisson, capped at the
+  product's daily frequency cap, with the Poisson mean solved so the
+  expected capped volume equals the line's daily impressions (when even
+  every visitor at the cap cannot absorb them, the line saturates)
+
+A user's total exposures are drawn in one ``multinomial`` call over the
+capped per-day distribution, so a simulation is a handful of array draws.
+The sample is split into ``runs`` replicate batches, each with its own
+audience-size draw; the spread across batches gives the confidence bands.
+One simulated user stands for many real ones, so a small line's reach is
+clipped at its impressions (nobody is reached without an impression).
+"""
+
+import numpy as np
+
+from .delivery import DEFAULT_DAILY_UNIQUES, UNCAPPED_DAILY_FREQUENCY
+from .rules import DAILY_AUDIENCE_UNIQUES
+
+# Mean daily visit propensity across the pool (daily visitors ÷ pool size)
+VISIT_RATE = 0.25
+
+DEFAULT_SAMPLE_SIZE = 100_000
+DEFAULT_RUNS = 20
+
+# Run-to-run spread of the audience size (lognormal sigma) behind the bands
+AUDIENCE_CV = 0.10
+
+# Frequency distribution buckets: 1 … FREQUENCY_BUCKETS - 1 exposures, then "N+"
+FREQUENCY_BUCKETS = 11
+
+
+def _propensity_shape(turnover):
+    """Beta (alpha, beta) with mean VISIT_RATE and day-over-day new-visitor share ``turnover``.
+
+    For Beta(mean m, concentration k) that share is k(1 − m) / (k + 1).
+    """
+    turnover = min(max(float(turnover), 0.01), (1 - VISIT_RATE) * 0.99)
+    concentration = turnover / (1 - VISIT_RATE - turnover)
+    return VISIT_RATE * concentration, (1 - VISIT_RATE) * concentration
+
+
+def _capped_poisson(lam, cap) -> np.ndarray:
+    """P(min(Poisson(lam), cap) = k) for k = 0 … cap."""
+    pmf = np.zeros(cap + 1)
+    if lam <= 0:
+        pmf[0] = 1.0
+        return pmf
+    k = np.arange(cap)
+    pmf[:cap] = np.exp(k * np.log(lam) - lam - np.cumsum(np.log(np.maximum(k, 1))))
+    pmf[cap] = max(0.0, 1.0 - pmf[:cap].sum())
+    return pmf
+
+
+def _daily_rate(per_visitor, cap) -> float:
+    """Poisson mean whose cap-truncated mean is ``per_visitor`` (bisection)."""
+    if per_visitor <= 0:
+        return 0.0
+    lo, hi = 0.0, max(1.0, per_visitor * 4)
+    while (_capped_poisson(hi, cap) * np.arange(cap + 1)).sum() < per_visitor and hi < 1e3:
+        hi *= 2
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if (_capped_poisson(mid, cap) * np.arange(cap + 1)).sum() < per_visitor:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def simulate_reach(impressions, flight_days, freq_cap, publisher="MSN", device="All Devices",
+                   turnover=0.30, sample_size=DEFAULT_SAMPLE_SIZE, runs=DEFAULT_RUNS, seed=None,
+                   daily_uniques=None, band=0.90) -> dict:
+    """Monte Carlo reach / frequency of one line over ``flight_days``.
+
+    ``freq_cap`` is the numeric daily cap (``get_freq_cap_numeric``; 0 means
+    uncapped). ``daily_uniques`` overrides the slot audience from
+    ``DAILY_AUDIENCE_UNIQUES``, which is the same for every market; pass it
+    to size a market's audience. ``sample_size`` simulated users are split
+    into ``runs`` replicate batches. Returns mean, low and high (``band``
+    central interval across batches) for reach, reach share of the pool,
+    average frequency and delivered impressions, plus the share of reached
+    users per exposure bucket (``frequency_buckets`` labels).
+    """
+    days = max(1, int(flight_days))
+    cap = int(freq_cap) if freq_cap and freq_cap > 0 else UNCAPPED_DAILY_FREQUENCY
+    audience = daily_uniques or DAILY_AUDIENCE_UNIQUES.get((publisher, device), DEFAULT_DAILY_UNIQUES)
+    rng = np.random.default_rng(seed)
+    alpha, beta = _propensity_shape(turnover)
+    daily_imps = max(0.0, float(impressions)) / days
+
+    # The sample is split into ``runs`` replicate batches, each with its own audience draw
+    batch = np.arange(sample_size) % runs
+    batch_size = np.bincount(batch, minlength=runs)
+    run_audience = audience * rng.lognormal(-AUDIENCE_CV ** 2 / 2, AUDIENCE_CV, runs)
+    pool = run_audience / VISIT_RATE
+    scale = pool / batch_size  # real users per simulated user, per batch
+    per_day = np.array([_capped_poisson(_daily_rate(daily_imps / a, cap), cap) for a in run_audience])
+
+    propensity = rng.beta(alpha, beta, sample_size)
+    visit_days = rng.binomial(days, propensity)
+    exposures = rng.multinomial(visit_days, per_day[batch]) @ np.arange(cap + 1)
+
+    reached = exposures > 0
+    # At most one user per impression: a reached simulated user stands for ``scale`` real ones
+    reach = np.minimum(np.bincount(batch, weights=reached, minlength=runs) * scale, daily_imps * days)
+    delivered = np.bincount(batch, weights=exposures, minlength=runs) * scale
+    bucket = np.minimum(exposures, FREQUENCY_BUCKETS - 1)
+    buckets = np.bincount(batch[reached] * FREQUENCY_BUCKETS + bucket[reached],
+                          minlength=runs * FREQUENCY_BUCKETS).reshape(runs, FREQUENCY_BUCKETS)[:, 1:]
+    buckets = buckets / np.maximum(buckets.sum(axis=1, keepdims=True), 1)
+
+    tail = (1 - band) / 2 * 100
+    low, high = (tail, 100 - tail)
+    frequency = np.divide(delivered, reach, out=np.zeros(runs), where=reach > 0)
+
+    def _stats(values):
+        return (float(values.mean()), float(np.percentile(values, low)), float(np.percentile(values, high)))
+
+    return {
+        "reach": _stats(reach),
+        "reach_pct": _stats(reach / pool),
+        "avg_frequency": _stats(frequency),
+        "delivered_imps": _stats(delivered),
+        "saturated": bool(daily_imps > cap * audience),
+        "frequency_buckets": [str(k) for k in range(1, FREQUENCY_BUCKETS - 1)] + [f"{FREQUENCY_BUCKETS - 1}+"],
+        "frequency_share": buckets.mean(axis=0),
+        "frequency_share_low": np.percentile(buckets, low, axis=0),
+        "frequency_share_high": np.percentile(buckets, high, axis=0),
+        "pool_size": float(pool.mean()),
+        "sample_size": sample_size,
+        "runs": runs,
+        "band": band,
+    }
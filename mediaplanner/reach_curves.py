@@ -0,0 +1,184 @@
+"""Precomputed reach curves, interpolated in constant time.
+
+The audience model of :mod:`mediaplanner.reach` has a closed-form expected
+reach: a user with daily visit propensity ``p`` is reached over ``D`` days
+with probability ``1 − (1 − p·(1 − e^−λ))^D``, where ``λ`` is the Poisson
+exposure rate that puts the line's daily impressions on the visitors under
+the frequency cap. Reach as a share of the audience pool depends only on
+
+- the frequency cap (``get_freq_cap_numeric``; uncapped lines use
+  ``UNCAPPED_DAILY_FREQUENCY``),
+- the line's daily impressions per visitor as a fraction of that cap,
+- the flight days and the daily turnover rate (Spec §6.4),
+
+so one grid per cap covers every product × publisher × device: the slot's
+``DAILY_AUDIENCE_UNIQUES`` only scales the result. The grids (float32,
+cap × load × days × turnover) are built once, vectorized over all points,
+written to ``reach_curves-<hash>.npz`` in the cache directory and loaded
+once per process. Lookups interpolate log reach trilinearly on log load,
+log days and turnover.
+"""
+
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .delivery import DEFAULT_DAILY_UNIQUES, UNCAPPED_DAILY_FREQUENCY
+from .reach import VISIT_RATE, _propensity_shape
+from .resolvers import get_freq_cap_numeric, is_cpd_product
+from .rules import DAILY_AUDIENCE_UNIQUES, PRODUCT_RULES
+
+CURVE_VERSION = 1
+
+# Grid axes: daily imps per visitor ÷ cap, flight days, daily turnover rate
+LOAD_AXIS = np.geomspace(1e-6, 1.0, 61)
+DAYS_AXIS = np.unique(np.round(np.geomspace(1, 730, 48))).astype(np.int64)
+TURNOVER_AXIS = np.round(np.linspace(0.05, 0.50, 10), 2)
+
+# Propensity nodes for the expectation over the Beta audience: equal-mass
+# quantiles of a large fixed-seed sample (the skewed low-turnover shapes
+# need stratified nodes)
+PROPENSITY_NODES = 4096
+_NODE_SAMPLE = 1_000_000
+_NODE_SEED = 20240101
+
+# Every cap a product can resolve to
+CURVE_CAPS = tuple(sorted({get_freq_cap_numeric(product) for product in PRODUCT_RULES} - {0}
+                          | {UNCAPPED_DAILY_FREQUENCY}))
+
+
+def _capped_mean(lam, cap) -> np.ndarray:
+    """E[min(Poisson(lam), cap)] for an array of rates."""
+    lam = np.asarray(lam, dtype=np.float64)[..., None]
+    k = np.arange(cap)
+    log_fact = np.cumsum(np.log(np.maximum(k, 1)))
+    with np.errstate(divide="ignore"):
+        pmf = np.exp(k * np.log(lam) - lam - log_fact)
+    return (pmf * k).sum(axis=-1) + cap * np.clip(1.0 - pmf.sum(axis=-1), 0.0, 1.0)
+
+
+def _exposure_rates(load, cap) -> np.ndarray:
+    """Poisson rate per visitor whose capped mean is ``load × cap`` (vectorized bisection)."""
+    target = np.asarray(load, dtype=np.float64) * cap
+    lo, hi = np.zeros_like(target), np.full_like(target, 1e3)
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        below = _capped_mean(mid, cap) < target
+        lo, hi = np.where(below, mid, lo), np.where(below, hi, mid)
+    return hi
+
+
+def build_reach_curves() -> dict:
+    """Expected reach share of the pool on the full cap × load × days × turnover grid."""
+    rng = np.random.default_rng(_NODE_SEED)
+    share = np.zeros((len(CURVE_CAPS), len(LOAD_AXIS), len(DAYS_AXIS), len(TURNOVER_AXIS)), dtype=np.float32)
+    days = DAYS_AXIS.astype(np.float64)
+    for t, turnover in enumerate(TURNOVER_AXIS):
+        propensity = np.quantile(rng.beta(*_propensity_shape(turnover), _NODE_SAMPLE),
+                                 (np.arange(PROPENSITY_NODES) + 0.5) / PROPENSITY_NODES)
+        for c, cap in enumerate(CURVE_CAPS):
+            exposed = 1.0 - np.exp(-_exposure_rates(LOAD_AXIS, cap))  # P(≥1 exposure | visit)
+            log_miss = np.log1p(-np.outer(exposed, propensity) * (1 - 1e-12))  # load × nodes
+            share[c, :, :, t] = 1.0 - np.exp(log_miss[:, :, None] * days).mean(axis=1)
+    return {"caps": np.array(CURVE_CAPS), "load": LOAD_AXIS, "days": DAYS_AXIS,
+            "turnover": TURNOVER_AXIS, "share": share}
+
+
+def _fingerprint() -> str:
+    parts = (CURVE_VERSION, VISIT_RATE, CURVE_CAPS, PROPENSITY_NODES, _NODE_SAMPLE, _NODE_SEED,
+             LOAD_AXIS.tobytes(), DAYS_AXIS.tobytes(), TURNOVER_AXIS.tobytes())
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
+
+
+def default_cache_dir() -> Path:
+    """``MEDIAPLANNER_CACHE_DIR``, else ``~/.cache/mediaplanner``."""
+    return Path(os.environ.get("MEDIAPLANNER_CACHE_DIR") or Path.home() / ".cache" / "mediaplanner")
+
+
+@lru_cache(maxsize=4)
+def load_reach_curves(cache_dir=None) -> dict:
+    """The reach grids, read from disk or built and saved there on first use.
+
+    The file name carries a hash of the model constants and axes, so a
+    changed model never reads a stale table.
+    """
+    path = Path(cache_dir or default_cache_dir()) / f"reach_curves-{_fingerprint()}.npz"
+    if path.exists():
+        with np.load(path) as data:
+            return _with_log_share({key: data[key] for key in data.files})
+    curves = build_reach_curves()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".npz", delete=False) as fh:
+            np.savez_compressed(fh, **curves)
+        os.replace(fh.name, path)
+    except OSError:
+        pass  # read-only cache dir: keep the in-memory tables
+    return _with_log_share(curves)
+
+
+def _with_log_share(curves) -> dict:
+    # Reach is close to a power law in load and days, so lookups interpolate log share
+    curves["log_share"] = np.log(np.maximum(curves["share"], 1e-30))
+    return curves
+
+
+def _fractional_index(axis, values) -> tuple:
+    """Lower grid index and weight of each value along ``axis`` (clamped to its ends)."""
+    position = np.interp(values, axis, np.arange(len(axis), dtype=np.float64))
+    lower = np.minimum(position.astype(np.int64), len(axis) - 2)
+    return lower, position - lower
+
+
+def curve_reach_array(impressions, flight_days, freq_cap, daily_uniques, turnover=0.30) -> np.ndarray:
+    """Interpolated lifetime reach over arrays (broadcast).
+
+    ``freq_cap`` ≤ 0 means uncapped and reads the ``UNCAPPED_DAILY_FREQUENCY``
+    curves, as in :mod:`mediaplanner.reach` and the scenario sweeps. Reach is
+    0 where there are no impressions, days or audience (CPD lines have no
+    impression goal). Daily volume above what the capped audience can take
+    is treated as saturated; volume below the grid scales reach linearly.
+    """
+    curves = load_reach_curves()
+    imps, days, cap, audience, turnover = np.broadcast_arrays(
+        np.asarray(impressions, dtype=np.float64), np.asarray(flight_days, dtype=np.float64),
+        np.asarray(freq_cap, dtype=np.float64), np.asarray(daily_uniques, dtype=np.float64),
+        np.asarray(turnover, dtype=np.float64))
+    applicable = (days > 0) & (audience > 0) & (imps > 0)
+    days = np.maximum(days, 1.0)
+    cap_row = np.searchsorted(curves["caps"], np.where(cap > 0, cap, UNCAPPED_DAILY_FREQUENCY))
+    cap_row = np.minimum(cap_row, len(curves["caps"]) - 1)
+    cap_used = curves["caps"][cap_row]
+
+    load = np.divide(imps / days, audience * cap_used, out=np.zeros_like(imps), where=applicable)
+    floor = curves["load"][0]
+    li, lw = _fractional_index(np.log(curves["load"]), np.log(np.clip(load, floor, 1.0)))
+    di, dw = _fractional_index(np.log(curves["days"]), np.log(days))
+    ti, tw = _fractional_index(curves["turnover"], turnover)
+
+    grid = curves["log_share"]
+    log_share = np.zeros(imps.shape)
+    for dl, wl in ((0, 1 - lw), (1, lw)):
+        for dd, wd in ((0, 1 - dw), (1, dw)):
+            for dt, wt in ((0, 1 - tw), (1, tw)):
+                log_share += wl * wd * wt * grid[cap_row, li + dl, di + dd, ti + dt]
+    share = np.exp(log_share)
+    share = np.where(load < floor, share * load / floor, share)
+    return np.where(applicable, share * audience / VISIT_RATE, 0.0)
+
+
+def slot_audience(publisher, device) -> float:
+    """Daily unique users of a publisher × device slot (``DAILY_AUDIENCE_UNIQUES``)."""
+    return DAILY_AUDIENCE_UNIQUES.get((publisher, device), DEFAULT_DAILY_UNIQUES)
+
+
+def curve_reach(product, publisher, device, impressions, flight_days, turnover=0.30) -> float:
+    """Interpolated lifetime reach of one line from the precomputed curves (0 for CPD products)."""
+    if is_cpd_product(product):
+        return 0.0
+    return float(curve_reach_array(impressions, flight_days, get_freq_cap_numeric(product),
+                                   slot_audience(publisher, device), turnover))
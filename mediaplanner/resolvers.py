@@ -0,0 +1,121 @@
+"""Product × publisher × format × device resolution helpers (Spec §4)."""
+
+from .rules import PRODUCT_RULES, REGION_CURRENCY, CPM_RECOMMENDATIONS
+from .product_index import compatible_devices, compatible_formats, lookup_product_config
+
+# ================================================================================
+# HELPER FUNCTIONS
+# ================================================================================
+def get_currency_symbol(market):
+    """Get currency symbol based on market code."""
+    return REGION_CURRENCY.get(market.upper(), ("USD", "$"))[1]
+
+def get_compatible_formats(product, publisher):
+    """Get compatible ad formats for a product + publisher combination, from the matrix."""
+    return list(compatible_formats(product, publisher))
+
+
+def get_compatible_devices(product, publisher, ad_format):
+    """Return valid device options constrained by the product × publisher × format device_config."""
+    return list(compatible_devices(product, publisher, ad_format))
+
+
+def get_product_config(product, publisher, ad_format, device="All Devices"):
+    """Return a flat targeting dict for the given product / publisher / format / device.
+
+    A mutable copy of the precompiled entry; use ``lookup_product_config`` for
+    the shared read-only mapping.
+    """
+    return lookup_product_config(product, publisher, ad_format, device).copy()
+
+# Device slot → taxonomy device code
+_DEVICE_CODES = {"All Devices": "AllDevices", "Desktop": "Desktop", "Mobile": "Mobile", "Tablet": "Tablet"}
+
+def generate_o_o_taxonomy(market, publisher, product, ad_format, device):
+    """Generate O&O Naming Taxonomy — uses Views suffix for video, Imps for display."""
+    device_code = _DEVICE_CODES.get(device, "AllDevices")
+    metric = "Views" if ad_format == "Video" else "Imps"
+    li_code = PRODUCT_RULES.get(product, {}).get("line_item_type", "PG").replace("Guaranteed (", "").replace(")", "")
+    return f"{market}_{publisher}_{product}_{ad_format}_{device_code}_{li_code}_{metric}"
+
+def generate_li_name(advertiser, market, publisher, product):
+    """Generate Line Item Name."""
+    return f"{advertiser}_{market}_{publisher}_{product}"
+
+def is_video_product(product_name, ad_format=None):
+    """Return True if the current format is Video."""
+    if ad_format is not None:
+        return ad_format == "Video"
+    return PRODUCT_RULES.get(product_name, {}).get("inventory_type") == "Video"
+
+def get_default_cpm(product_name, ad_format=None):
+    """Return the suggested default CPM for a product, adjusted for video."""
+    if ad_format == "Video":
+        video_key = f"{product_name} (Video)"
+        if video_key in CPM_RECOMMENDATIONS:
+            return float(CPM_RECOMMENDATIONS[video_key]["default"])
+    return float(CPM_RECOMMENDATIONS.get(product_name, {"default": 10.0})["default"])
+
+# ── DEAL-TYPE / FORMAT RESOLUTION ────────────────────────────────────────────
+
+# Spec §4.3 — allowed formats per deal type
+_FORMAT_ALLOWLIST = {
+    "GDALI - Impressions":      ["Banner", "Video", "Native"],
+    "GDALI - MSN Takeover":     ["Banner"],
+    "GDALI - Outlook Takeover": ["Banner", "Native"],
+    "PG - Standard":            ["Banner", "Video", "Native"],
+    "PG - First Impression":    ["Banner"],
+    "High Impact":              ["Banner"],
+}
+
+def is_cpd_product(product: str) -> bool:
+    """True for Fixed Fee (Cost Per Day) products — Takeovers."""
+    return PRODUCT_RULES.get(product, {}).get("revenue_type", "") == "Fixed Fee (Cost Per Day)"
+
+def resolve_inventory_type(ad_format: str) -> str:
+    """Spec §4.1: Video/Native must be App & Web; Banner is Web Only."""
+    return "App & Web" if ad_format in ("Video", "Native") else "Web Only"
+
+def resolve_inventory_targeting_mode(publisher: str, ad_format: str) -> str:
+    """Spec §4.2: KV targeting for MSN/MCG; Publisher ID for Outlook Native."""
+    if publisher == "Outlook" and ad_format == "Native":
+        return "Publisher ID — Outlook Native (1000230)"
+    mapping = {
+        "MSN":     "Key/Value — pub = msn",
+        "Outlook": "Key/Value — pub = outlook",
+        "MCG":     "Key/Value — pub = microsoftcasualgames",
+    }
+    return mapping.get(publisher, f"Key/Value — pub = {publisher.lower()}")
+
+def validate_deal_format(product: str, ad_format: str) -> tuple[bool, str]:
+    """Spec §4.3: Return (valid, reason). One format per line item; format must be allowed."""
+    allowed = _FORMAT_ALLOWLIST.get(product, ["Banner", "Video", "Native"])
+    if ad_format not in allowed:
+        return False, f"{ad_format} is not allowed for {product} (allowed: {', '.join(allowed)})"
+    return True, ""
+
+# Spec §4.4 — canonical banner sizes per publisher × device
+_BANNER_SIZES = {
+    ("MSN",     "All Devices"): ["300x250", "300x600", "728x90", "970x250", "320x50"],
+    ("MSN",     "Desktop"):     ["970x250", "728x90", "300x250", "300x600"],
+    ("MSN",     "Mobile"):      ["320x50"],
+    ("Outlook", "Desktop"):     ["160x600", "728x90", "300x250", "300x600"],
+    ("MCG",     "All Devices"): ["300x250", "300x600", "728x90", "320x50"],
+    ("MCG",     "Desktop"):     ["300x250", "300x600", "728x90"],
+    ("MCG",     "Mobile"):      ["320x50"],
+}
+
+def get_allowed_banner_sizes(publisher: str, device: str) -> list:
+    """Spec §4.4: Canonical sizes for publisher × device. Returns list of size strings."""
+    return _BANNER_SIZES.get((publisher, device), _BANNER_SIZES.get((publisher, "All Devices"), []))
+
+def get_freq_cap_numeric(product: str) -> int:
+    """Extract numeric frequency cap from product rules. Returns 0 if uncapped/CPD."""
+    cap_text = PRODUCT_RULES.get(product, {}).get("frequency_cap", "")
+    if cap_text in ("Off", "N/A", "") or is_cpd_product(product):
+        return 0
+    if "1 imp" in cap_text:
+        return 1
+    if "6 imp" in cap_text:
+        return 6
+    return 6  # safe default
@@ -0,0 +1,332 @@
+"""Product rules, market currencies, CPM reference ranges and audience sizes (Seat 280)."""
+
+# ================================================================================
+# PRODUCT RULES - MONETIZE GUARANTEED ONLY (SEAT 280)
+# Full matrix: publisher × format × device — no PMPs
+# ================================================================================
+PRODUCT_RULES = {
+    # ── PG FIRST IMPRESSION ──────────────────────────────────────────────────
+    "PG - First Impression": {
+        "seat": "280 - Monetize",
+        "line_item_type": "PG",
+        "revenue_type": "CPM",
+        "delivery_type": "N/A",
+        "allow_rtb": False,
+        "underspend_catchup": "N/A",
+        "impression_pacing": "100%",
+        "creative_rotation": "N/A",
+        "landing_page": "None",
+        "publishers": ["MSN"],
+        "formats": ["Banner"],
+        "priority": 7,
+        "frequency_cap": "1 imp/day",
+        "pacing": "ASAP",
+        "inventory_type": "Banner",
+        "geo_targeting": "Country Targeting",
+        "publisher_targeting": "KV pub = msn",
+        "supply_targeting": "App & Web",
+        "device_config": {
+            "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet",
+                            "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50",
+                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
+            "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",
+                            "ad_sizes": "728x90, 970x250, 300x250, 300x600",
+                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
+            "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",
+                            "ad_sizes": "320x50",
+                            "inventory_targeting": "KV pub = msn", "min_creatives": 1},
+        },
+    },
+    # ── PG STANDARD ──────────────────────────────────────────────────────────
+    "PG - Standard": {
+        "seat": "280 - Monetize",
+        "line_item_type": "PG",
+        "revenue_type": "CPM",
+        "delivery_type": "N/A",
+        "allow_rtb": False,
+        "underspend_catchup": "N/A",
+        "impression_pacing": "100%",
+        "creative_rotation": "N/A",
+        "landing_page": "None",
+        "publishers": ["MSN", "Outlook", "MCG"],
+        "formats": ["Banner", "Native", "Video"],
+        "priority": 5,
+        "frequency_cap": "6 imps/day",
+        "pacing": "Even",
+        "inventory_type": "Banner",
+        "geo_targeting": "Country Targeting",
+        "publisher_targeting": "KV pub = msn / outlook / microsoftcasualgames",
+        "supply_targeting": "App & Web",
+        "publisher_format_config": {
+            ("MSN", "Banner"): {
+                "inventory_targeting": "KV pub = msn",
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "728x90, 970x250, 300x250, 300x600"},
+                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
+                },
+            },
+            ("MSN", "Video"): {
+                "inventory_targeting": "KV pub = msn",
+                "creative_specs": "15 seconds OR 30 seconds",
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A"},
+                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A"},
+                },
+            },
+            ("Outlook", "Banner"): {
+                "inventory_targeting": "KV pub = outlook",
+                "device_config": {
+                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "160x600, 728x90, 300x250, 300x600"},
+                },
+            },
+            ("Outlook", "Native"): {
+                "inventory_targeting": "Publisher = Outlook Native (1000230)",
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A", "min_creatives": 2},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A", "min_creatives": 2},
+                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A", "min_creatives": 1},
+                },
+            },
+            ("MCG", "Banner"): {
+                "inventory_targeting": "KV pub = microsoftcasualgames",
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 320x50"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "300x250, 300x600, 728x90"},
+                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
+                },
+            },
+            ("MCG", "Video"): {
+                "inventory_targeting": "KV pub = microsoftcasualgames",
+                "device_config": {
+                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "N/A"},
+                },
+            },
+        },
+    },
+    # ── GDALI IMPRESSIONS ────────────────────────────────────────────────────
+    "GDALI - Impressions": {
+        "seat": "280 - Monetize",
+        "line_item_type": "Guaranteed (GDALI)",
+        "revenue_type": "CPM",
+        "delivery_type": "Impressions",
+        "allow_rtb": True,
+        "underspend_catchup": "Evenly",
+        "impression_pacing": "100%",
+        "creative_rotation": "Evenly",
+        "landing_page": "None",
+        "publishers": ["MSN", "Outlook", "MCG"],
+        "formats": ["Banner", "Native", "Video"],
+        "priority": 5,
+        "frequency_cap": "6 imps/day",
+        "pacing": "Even",
+        "inventory_type": "Banner",
+        "geo_targeting": "Country Targeting",
+        "publisher_targeting": "KV pub = msn (MSN) | KV pub = outlook (Outlook) | KV pub = microsoftcasualgames (MCG)",
+        "supply_targeting": "App & Web",
+        "publisher_format_config": {
+            ("MSN", "Banner"): {
+                "inventory_targeting": "KV pub = msn",
+                "creative_specs": "300x250 OR 300x600 OR 728x90 OR 970x250 OR 320x50",
+                "min_creatives": 1,
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 970x250, 320x50"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "728x90, 970x250, 300x250, 300x600"},
+                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
+                },
+            },
+            ("MSN", "Video"): {
+                "inventory_targeting": "KV pub = msn",
+                "creative_specs": "15 seconds OR 30 seconds",
+                "min_creatives": 1,
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A"},
+                    "Mobile":      {"supply": "Web Only",  "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A"},
+                },
+            },
+            ("Outlook", "Banner"): {
+                "inventory_targeting": "KV pub = outlook",
+                "creative_specs": "160x600, 728x90, 300x250 OR 300x600",
+                "min_creatives": 3,
+                "device_config": {
+                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "728x90, 300x250, 300x600"},
+                },
+            },
+            ("Outlook", "Native"): {
+                "inventory_targeting": "Publisher = Outlook Native (1000230)",
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A", "min_creatives": 2},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "N/A", "min_creatives": 2},
+                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "N/A", "min_creatives": 1},
+                },
+            },
+            ("MCG", "Banner"): {
+                "inventory_targeting": "KV pub = microsoftcasualgames",
+                "creative_specs": "300x250, 300x600, 728x90, 320x50",
+                "min_creatives": 1,
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "300x250, 300x600, 728x90, 320x50"},
+                    "Desktop":     {"supply": "Web Only",  "device_targeting": "Desktop, Tablet",          "ad_sizes": "300x250, 300x600, 728x90"},
+                    "Mobile":      {"supply": "App & Web", "device_targeting": "Mobile, Tablet",           "ad_sizes": "320x50"},
+                },
+            },
+            ("MCG", "Video"): {
+                "inventory_targeting": "KV pub = microsoftcasualgames",
+                "creative_specs": "15 seconds OR 30 seconds",
+                "min_creatives": 1,
+                "device_config": {
+                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "N/A"},
+                },
+            },
+        },
+    },
+    # ── GDALI MSN TAKEOVER ───────────────────────────────────────────────────
+    "GDALI - MSN Takeover": {
+        "seat": "280 - Monetize",
+        "line_item_type": "Guaranteed (GDALI)",
+        "revenue_type": "Fixed Fee (Cost Per Day)",
+        "delivery_type": "Exclusive",
+        "allow_rtb": True,
+        "underspend_catchup": "Evenly",
+        "impression_pacing": "100%",
+        "creative_rotation": "Evenly",
+        "landing_page": "None",
+        "publishers": ["MSN"],
+        "formats": ["Banner"],
+        "priority": 15,
+        "frequency_cap": "Off",
+        "pacing": "Even",
+        "inventory_type": "Banner",
+        "geo_targeting": "Placement Targeting",
+        "publisher_targeting": "Placement Targeting",
+        "supply_targeting": "Web Only",
+        "device_config": {
+            "Desktop": {
+                "supply": "Web Only", "device_targeting": "Desktop, Tablet",
+                "ad_sizes": "728x90, 970x250, 300x250",
+                "creative_specs": "728x90 OR 970x250 | 300x250 | 728x90",
+                "min_creatives": 1, "inventory_targeting": "Placement Targeting",
+            },
+        },
+    },
+    # ── GDALI OUTLOOK TAKEOVER ───────────────────────────────────────────────
+    "GDALI - Outlook Takeover": {
+        "seat": "280 - Monetize",
+        "line_item_type": "Guaranteed (GDALI)",
+        "revenue_type": "Fixed Fee (Cost Per Day)",
+        "delivery_type": "Exclusive",
+        "allow_rtb": True,
+        "underspend_catchup": "Evenly",
+        "impression_pacing": "100%",
+        "creative_rotation": "Evenly",
+        "landing_page": "None",
+        "publishers": ["Outlook"],
+        "formats": ["Banner", "Native"],
+        "priority": 15,
+        "frequency_cap": "Off",
+        "pacing": "Even",
+        "inventory_type": "Native",
+        "geo_targeting": "Country Targeting",
+        "publisher_targeting": "Publisher Targeting",
+        "supply_targeting": "Web Only",
+        "publisher_format_config": {
+            ("Outlook", "Banner"): {
+                "inventory_targeting": "Publisher Targeting (Country Specific)",
+                "creative_specs": "160x600, 728x90, 300x250 OR 300x600",
+                "min_creatives": 3,
+                "device_config": {
+                    "Desktop": {"supply": "Web Only", "device_targeting": "Desktop, Tablet", "ad_sizes": "160x600, 728x90, 300x250, 300x600"},
+                },
+            },
+            ("Outlook", "Native"): {
+                "inventory_targeting": "Publisher = Outlook Native (1000230)",
+                "min_creatives": 2,
+                "device_config": {
+                    "All Devices": {"supply": "App & Web", "device_targeting": "Desktop, Mobile, Tablet", "ad_sizes": "N/A"},
+                },
+            },
+        },
+    },
+    # ── HIGH IMPACT PG ───────────────────────────────────────────────────────
+    "High Impact": {
+        "seat": "280 - Monetize",
+        "line_item_type": "PG",
+        "revenue_type": "CPM",
+        "delivery_type": "N/A",
+        "allow_rtb": False,
+        "underspend_catchup": "N/A",
+        "impression_pacing": "100%",
+        "creative_rotation": "N/A",
+        "landing_page": "None",
+        "publishers": ["MSN"],
+        "formats": ["Banner"],
+        "priority": 15,
+        "frequency_cap": "Off",
+        "pacing": "Even",
+        "inventory_type": "Banner",
+        "geo_targeting": "Placement Targeting",
+        "publisher_targeting": "Placement Targeting",
+        "supply_targeting": "App & Web",
+        "device_config": {
+            "Desktop": {
+                "supply": "App & Web", "device_targeting": "Desktop, Tablet",
+                "ad_sizes": "ATF: 970x250, 728x90, 300x250 | BTF: 300x250, 300x600",
+                "creative_specs": "ATF: 970x250 OR 728x90 OR 300x250 | BTF: 300x250 OR 300x600",
+                "min_creatives": 1, "inventory_targeting": "Placement Targeting",
+            },
+        },
+    },
+}
+
+REGION_CURRENCY = {
+    "US": ("USD", "$"),
+    "CA": ("CAD", "$"),
+    "UK": ("GBP", "£"),
+    "DE": ("EUR", "€"),
+    "FR": ("EUR", "€"),
+    "NL": ("EUR", "€"),
+    "ES": ("EUR", "€"),
+    "IT": ("EUR", "€"),
+    "BE": ("EUR", "€"),
+    "AT": ("EUR", "€"),
+    "SE": ("EUR", "€"),
+    "AU": ("AUD", "$"),
+    "NZ": ("AUD", "$"),
+    "SG": ("SGD", "$"),
+    "IN": ("INR", "₹"),
+    "JP": ("JPY", "¥"),
+    "BR": ("BRL", "R$"),
+    "MX": ("MXN", "$"),
+}
+
+# CPM reference ranges by product + format (align with DNV Rate Card)
+CPM_RECOMMENDATIONS = {
+    "PG - First Impression":        {"min": 15,   "default": 20,    "max": 40,    "note": "Premium first-in-page · MSN Banner"},
+    "PG - Standard":                {"min": 8,    "default": 12,    "max": 25,    "note": "Banner/Native · MSN, Outlook, MCG"},
+    "PG - Standard (Video)":        {"min": 25,   "default": 35,    "max": 65,    "note": "Video · MSN, MCG"},
+    "GDALI - Impressions":          {"min": 8,    "default": 12,    "max": 25,    "note": "GDALI Guaranteed · Banner/Native"},
+    "GDALI - Impressions (Video)":  {"min": 25,   "default": 35,    "max": 65,    "note": "GDALI Guaranteed · Video · MSN"},
+    "GDALI - MSN Takeover":         {"min": 5000, "default": 15000, "max": 50000, "note": "Fixed Fee per day (not a CPM product)"},
+    "GDALI - Outlook Takeover":     {"min": 3000, "default": 10000, "max": 30000, "note": "Fixed Fee per day (not a CPM product)"},
+    "High Impact":                  {"min": 20,   "default": 30,    "max": 60,    "note": "High-impact placement · MSN Banner"},
+}
+
+# Daily unique users per publisher × device slot (per market) used to turn
+# frequency caps into delivery capacity. Planning assumptions — replace with
+# ad-server avails when available.
+DAILY_AUDIENCE_UNIQUES = {
+    ("MSN", "All Devices"):     30_000_000,
+    ("MSN", "Desktop"):         18_000_000,
+    ("MSN", "Mobile"):          12_000_000,
+    ("MSN", "Tablet"):           3_000_000,
+    ("Outlook", "All Devices"): 20_000_000,
+    ("Outlook", "Desktop"):     14_000_000,
+    ("Outlook", "Mobile"):       6_000_000,
+    ("Outlook", "Tablet"):       1_500_000,
+    ("MCG", "All Devices"):      4_000_000,
+    ("MCG", "Desktop"):          3_000_000,
+    ("MCG", "Mobile"):           1_000_000,
+    ("MCG", "Tablet"):             500_000,
+}
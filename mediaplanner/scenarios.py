@@ -0,0 +1,133 @@
+"""Scenario sweeps: one product line over a budget × CPM × flight days × turnover grid.
+
+Each axis is a 1-D array placed on its own dimension, so the §6 kernels
+(``forecast_audience_array``) and the reach curves broadcast over the whole
+grid in one pass — no Python loop per scenario. :func:`heatmap_frame` cuts a
+2-D slice out of the result for display, and :func:`scenario_frame` flattens
+it to one row per scenario.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .delivery import UNCAPPED_DAILY_FREQUENCY
+from .forecasting import forecast_audience_array
+from .reach_curves import curve_reach_array, slot_audience
+from .resolvers import get_freq_cap_numeric, is_cpd_product
+
+AXES = ("budget", "cpm", "flight_days", "turnover")
+
+# Metric key → label, in display order
+SWEEP_METRICS = {
+    "impressions": "Impressions",
+    "avg_daily_uniques": "Avg Daily Uniques",
+    "avg_frequency_daily": "Avg Daily Frequency",
+    "lifetime_uniques": "Lifetime Uniques (§6.4)",
+    "curve_reach": "Reach (curve)",
+    "cost_per_reach": "Cost per Reached User",
+}
+
+
+def sweep_axes(budget, cpm, flight_days, cpm_range=None, steps=(25, 20, 30, 10)) -> dict:
+    """Default axes around the current inputs.
+
+    Budget ×0.25 … ×4 (log spaced), CPM over ``cpm_range`` (default ±50 %),
+    flight days 1 … max(90, 2 × current) and turnover 5–50 %. The current
+    budget, CPM and flight days are always grid points.
+    """
+    budget_steps, cpm_steps, day_steps, turnover_steps = steps
+    budget = max(float(budget), 1.0)
+    low, high = cpm_range or (cpm * 0.5, cpm * 1.5)
+    max_days = max(90, 2 * int(flight_days))
+    return {
+        "budget": np.union1d(np.geomspace(budget / 4, budget * 4, budget_steps), [budget]),
+        "cpm": np.union1d(np.linspace(max(low, 0.01), max(high, low, 0.01), cpm_steps), [max(cpm, 0.01)]),
+        "flight_days": np.union1d(np.round(np.linspace(1, max_days, day_steps)), [flight_days]).astype(np.int64),
+        "turnover": np.round(np.linspace(0.05, 0.50, turnover_steps), 4),
+    }
+
+
+def sweep_scenarios(budgets, cpms, flight_days, turnovers, freq_cap, daily_uniques) -> dict:
+    """Evaluate every budget × CPM × flight days × turnover combination at once.
+
+    ``freq_cap`` is the numeric daily cap (0 = uncapped: the §6 uniques are
+    then 0 and the reach curve uses ``UNCAPPED_DAILY_FREQUENCY``).
+    ``daily_uniques`` is the slot audience behind the reach curve. Returns
+    the axes plus one array per ``SWEEP_METRICS`` key, shaped
+    (budget, cpm, flight_days, turnover).
+    """
+    axes = {
+        "budget": np.asarray(budgets, dtype=np.float64),
+        "cpm": np.asarray(cpms, dtype=np.float64),
+        "flight_days": np.asarray(flight_days, dtype=np.int64),
+        "turnover": np.asarray(turnovers, dtype=np.float64),
+    }
+    budget = axes["budget"][:, None, None, None]
+    cpm = axes["cpm"][None, :, None, None]
+    days = axes["flight_days"][None, None, :, None]
+    turnover = axes["turnover"][None, None, None, :]
+    shape = tuple(len(axis) for axis in axes.values())
+
+    impressions = np.divide(budget, cpm, out=np.zeros(np.broadcast_shapes(budget.shape, cpm.shape)),
+                            where=cpm > 0) * 1000
+    uniques, frequency, lifetime = forecast_audience_array(impressions, days, freq_cap, turnover)
+    reach = curve_reach_array(impressions, days, freq_cap or UNCAPPED_DAILY_FREQUENCY, daily_uniques, turnover)
+    spend = np.broadcast_to(budget, shape)
+    return {
+        **axes,
+        "freq_cap": freq_cap,
+        "impressions": np.broadcast_to(impressions, shape),
+        "avg_daily_uniques": np.broadcast_to(uniques, shape),
+        "avg_frequency_daily": np.broadcast_to(frequency, shape),
+        "lifetime_uniques": np.broadcast_to(lifetime, shape),
+        "curve_reach": reach,
+        "cost_per_reach": np.divide(spend, reach, out=np.zeros(shape), where=reach > 0),
+    }
+
+
+def product_scenarios(product, publisher, device, budgets, cpms, flight_days, turnovers) -> dict:
+    """:func:`sweep_scenarios` for one product line (cap and slot audience resolved from the rules).
+
+    Raises ``ValueError`` for CPD products: a takeover's cost is its daily
+    rate × days and it has no impression goal to sweep.
+    """
+    if is_cpd_product(product):
+        raise ValueError(f"{product} is priced per day; there is no budget × CPM grid to sweep")
+    return sweep_scenarios(budgets, cpms, flight_days, turnovers, get_freq_cap_numeric(product),
+                           slot_audience(publisher, device))
+
+
+def _nearest(axis, value) -> int:
+    return int(np.argmin(np.abs(np.asarray(axis, dtype=np.float64) - value)))
+
+
+def heatmap_frame(sweep, metric, rows="budget", columns="cpm", fixed=None) -> pd.DataFrame:
+    """2-D slice of ``metric``: ``rows`` × ``columns``, the other axes at ``fixed``.
+
+    ``fixed`` maps the remaining axis names to values; each is snapped to the
+    nearest grid point (default: the middle of the axis).
+    """
+    if rows == columns or {rows, columns} - set(AXES):
+        raise ValueError(f"rows and columns must be two different axes of {AXES}")
+    fixed = fixed or {}
+    index = []
+    for axis in AXES:
+        if axis in (rows, columns):
+            index.append(slice(None))
+        elif axis in fixed:
+            index.append(_nearest(sweep[axis], fixed[axis]))
+        else:
+            index.append(len(sweep[axis]) // 2)
+    values = sweep[metric][tuple(index)]
+    if AXES.index(rows) > AXES.index(columns):
+        values = values.T
+    return pd.DataFrame(values, index=pd.Index(sweep[rows], name=rows),
+                        columns=pd.Index(sweep[columns], name=columns))
+
+
+def scenario_frame(sweep) -> pd.DataFrame:
+    """One row per scenario: the four axis values and every metric."""
+    grids = np.meshgrid(*(sweep[axis] for axis in AXES), indexing="ij")
+    frame = {axis: grid.ravel() for axis, grid in zip(AXES, grids)}
+    frame.update({metric: np.ravel(sweep[metric]) for metric in SWEEP_METRICS})
+    return pd.DataFrame(frame)
@@ -0,0 +1,220 @@
+"""Exclusive takeover conflicts: an interval index of booked takeovers.
+
+Products with ``delivery_type: "Exclusive"`` (the GDALI takeovers) own a
+publisher in a market for their dates, so two of them may not overlap on the
+same publisher × market. :class:`TakeoverIndex` keeps the booked takeovers
+per publisher × market as a static interval tree — intervals sorted by start
+day with a max-end segment tree over them — so "does this takeover
+conflict?" is a binary search plus a prefix-max lookup (O(log n)), and
+listing the conflicts costs O(log n) per hit. Bookings added one at a time
+are folded in on the next query.
+
+:func:`scan_conflicts` checks a whole deal file at once with a vectorized
+sweep (sort by start, ``searchsorted`` each end) and returns every
+overlapping pair.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from .capacity import booking_intervals
+from .rules import PRODUCT_RULES
+
+EXCLUSIVE_PRODUCTS = tuple(product for product, info in PRODUCT_RULES.items()
+                           if info.get("delivery_type") == "Exclusive")
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _day(value) -> int:
+    """date / datetime / ISO string / datetime64 → days since 1970-01-01."""
+    return int((np.datetime64(pd.Timestamp(value), "D") - _EPOCH).astype(np.int64))
+
+
+def _key(publisher, market) -> tuple:
+    return (str(publisher), str(market or "").strip().upper())
+
+
+class _IntervalTree:
+    """Static intervals sorted by start, with prefix-max and segment-tree max of ends."""
+
+    def __init__(self, starts, ends, ids):
+        order = np.argsort(starts, kind="stable")
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+        self.ids = [ids[i] for i in order]
+        self._starts_list = self.starts.tolist()
+        self.prefix_max = np.maximum.accumulate(self.ends)
+
+        size = 1
+        while size < len(self.ends):
+            size *= 2
+        tree = np.full(2 * size, np.iinfo(np.int64).min, dtype=np.int64)
+        tree[size:size + len(self.ends)] = self.ends
+        node = size
+        while node > 1:
+            half = node // 2
+            tree[half:node] = np.maximum(tree[node:2 * node:2], tree[node + 1:2 * node:2])
+            node = half
+        self._size, self._tree = size, tree
+
+    def _candidates(self, end) -> int:
+        """Number of intervals starting on or before ``end``."""
+        return bisect_right(self._starts_list, end)
+
+    def overlaps_any(self, start, end) -> bool:
+        count = self._candidates(end)
+        return bool(count) and int(self.prefix_max[count - 1]) >= start
+
+    def overlapping(self, start, end) -> list:
+        """Positions of intervals overlapping [start, end], in start order."""
+        count = self._candidates(end)
+        if not count or int(self.prefix_max[count - 1]) < start:
+            return []
+        found, stack = [], [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= count or self._tree[node] < start:
+                continue
+            if hi - lo == 1:
+                found.append(lo)
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+
+
+class TakeoverIndex:
+    """Booked exclusive takeovers per publisher × market.
+
+    ``add`` records one booking; ``conflicts`` / ``has_conflict`` check a
+    candidate takeover's dates (inclusive) against the bookings on the same
+    publisher and market.
+    """
+
+    def __init__(self):
+        self._bookings = {}  # key -> ([start days], [end days], [deal ids])
+        self._trees = {}
+
+    def __len__(self):
+        return sum(len(starts) for starts, _, _ in self._bookings.values())
+
+    def add(self, publisher, market, start, end, deal_id=None):
+        """Book a takeover on ``publisher`` × ``market`` from ``start`` to ``end`` inclusive."""
+        key = _key(publisher, market)
+        starts, ends, ids = self._bookings.setdefault(key, ([], [], []))
+        starts.append(_day(start))
+        ends.append(_day(end))
+        ids.append(deal_id)
+        self._trees.pop(key, None)
+
+    @classmethod
+    def from_deals(cls, deals: pd.DataFrame) -> "TakeoverIndex":
+        """Index every takeover row of a deal frame shaped like ``sample_deals.csv``.
+
+        Every tree is built here rather than on first query, so until ``add``
+        is called the index is read-only and safe to share across threads.
+        """
+        index = cls()
+        intervals = _takeover_intervals(deals)
+        for key, group in intervals.groupby(["publisher", "market"], sort=False):
+            bookings = index._bookings[_key(*key)] = (
+                group["start_day"].tolist(), group["end_day"].tolist(), group["deal_id"].tolist())
+            index._trees[_key(*key)] = _IntervalTree(*bookings)
+        return index
+
+    @classmethod
+    def from_flights(cls, flights, market=None) -> "TakeoverIndex":
+        """Index the takeover flights of a plan, each on its own market.
+
+        ``market`` stands in for flights saved before flights carried one.
+        """
+        index = cls()
+        for flight in flights:
+            if flight.get("product", "") in EXCLUSIVE_PRODUCTS:
+                index.add(flight.get("publisher", ""), flight.get("market") or market, flight["start_date"],
+                          flight["end_date"], f"Flight {flight.get('flight_num', len(index) + 1)}")
+        return index
+
+    def _tree(self, key):
+        tree = self._trees.get(key)
+        if tree is None and key in self._bookings:
+            tree = self._trees[key] = _IntervalTree(*self._bookings[key])
+        return tree
+
+    def has_conflict(self, publisher, market, start, end) -> bool:
+        """True when any booked takeover on the same publisher × market overlaps the dates."""
+        tree = self._tree(_key(publisher, market))
+        return tree is not None and tree.overlaps_any(_day(start), _day(end))
+
+    def conflicts(self, publisher, market, start, end) -> list:
+        """Booked takeovers overlapping the dates, with the overlapping window, in start order."""
+        tree = self._tree(_key(publisher, market))
+        if tree is None:
+            return []
+        first, last = _day(start), _day(end)
+        found = []
+        for pos in tree.overlapping(first, last):
+            booked_start, booked_end = int(tree.starts[pos]), int(tree.ends[pos])
+            overlap_start, overlap_end = max(first, booked_start), min(last, booked_end)
+            found.append({
+                "deal_id": tree.ids[pos],
+                "start": (_EPOCH + booked_start).item(),
+                "end": (_EPOCH + booked_end).item(),
+                "overlap_start": (_EPOCH + overlap_start).item(),
+                "overlap_end": (_EPOCH + overlap_end).item(),
+                "overlap_days": overlap_end - overlap_start + 1,
+            })
+        return found
+
+
+def _takeover_intervals(deals: pd.DataFrame) -> pd.DataFrame:
+    """Takeover rows of a deal frame as deal × market intervals in epoch days."""
+    intervals = booking_intervals(deals)
+    intervals = intervals[intervals["exclusive"]].reset_index(drop=True)
+    intervals["start_day"] = (intervals["start"].to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int64)
+    intervals["end_day"] = (intervals["end"].to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int64)
+    return intervals
+
+
+def scan_conflicts(deals: pd.DataFrame) -> pd.DataFrame:
+    """Every pair of takeovers in a deal frame that overlap on the same publisher × market.
+
+    All slots are swept together: rows are sorted by (slot, start) on one
+    composite key, and each row's end is ``searchsorted`` into it to find
+    the later-starting rows it overlaps.
+    """
+    columns = ["publisher", "market", "deal_a", "deal_b", "overlap_start", "overlap_end", "overlap_days"]
+    intervals = _takeover_intervals(deals)
+    if len(intervals) < 2:
+        return pd.DataFrame(columns=columns)
+
+    slot = intervals.groupby(["publisher", "market"], sort=False).ngroup().to_numpy(dtype=np.int64)
+    starts, ends = intervals["start_day"].to_numpy(), intervals["end_day"].to_numpy()
+    origin = starts.min()
+    span = int(max(ends.max(), starts.max()) - origin) + 2
+    order = np.lexsort((starts, slot))
+    slot, starts, ends = slot[order], starts[order], ends[order]
+    sort_key = slot * span + (starts - origin)
+
+    # Row i overlaps rows i+1 .. reach[i]-1: same slot, starting on or before its end
+    reach = np.searchsorted(sort_key, slot * span + (ends - origin), side="right")
+    counts = np.maximum(reach - np.arange(len(reach)) - 1, 0)
+    first = np.repeat(np.arange(len(reach)), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    overlap_start = np.maximum(starts[first], starts[second])
+    overlap_end = np.minimum(ends[first], ends[second])
+    rows = intervals.iloc[order[first]]
+    return pd.DataFrame({
+        "publisher": rows["publisher"].to_numpy(),
+        "market": rows["market"].to_numpy(),
+        "deal_a": rows["deal_id"].to_numpy(),
+        "deal_b": intervals["deal_id"].to_numpy()[order[second]],
+        "overlap_start": pd.to_datetime(_EPOCH + overlap_start),
+        "overlap_end": pd.to_datetime(_EPOCH + overlap_end),
+        "overlap_days": overlap_end - overlap_start + 1,
+    }, columns=columns)
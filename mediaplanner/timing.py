@@ -0,0 +1,160 @@
+"""Opt-in rerun instrumentation: named page sections and helper-call timings.
+
+A :class:`RerunTimer` is created at the top of each rerun. ``mark(name)``
+closes the running section and opens the next, so the app only needs one
+line per section banner; ``wrap(fn)`` counts and times every call to a
+helper; ``section(name)`` times a block (used for the export builders).
+``finish()`` returns the rerun record, which :func:`append_jsonl` writes as
+one JSON line and :func:`summarize_log` rolls up into p50 / p95 per section.
+A disabled timer does nothing and returns helpers unwrapped.
+
+A fragment that reruns on its own runs after the page's timer finished;
+``fragment(name)`` gives it a timer of its own (``scope="fragment"``) that
+the page timer's marks, sections and wrapped helpers record into until it
+finishes. Outside one, a finished timer records nothing.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+DEFAULT_LOG_PATH = "planner_timings.jsonl"
+
+
+class RerunTimer:
+    """Wall-clock timings for one rerun of the planner page."""
+
+    def __init__(self, enabled=True, session_id=None, rerun=None, scope="app", fragment=None):
+        self.enabled = enabled
+        self.session_id = session_id
+        self.rerun = rerun
+        self.scope = scope
+        self.fragment_name = fragment
+        self.finished = False
+        self.sections = {}
+        self.helpers = {}
+        self._started = time.perf_counter()
+        self._current = None
+        self._current_started = None
+        self._active = self
+
+    def _recorder(self):
+        """The timer taking measurements now: this one, its running fragment, or None once finished."""
+        target = self._active
+        return target if target.enabled and not target.finished else None
+
+    def fragment(self, name) -> "RerunTimer":
+        """Timer for a fragment rerunning on its own; this timer records into it until it finishes."""
+        self._active = RerunTimer(enabled=self.enabled, session_id=self.session_id, rerun=self.rerun,
+                                  scope="fragment", fragment=name)
+        return self._active
+
+    def mark(self, name):
+        """End the running section (if any) and start ``name``."""
+        target = self._recorder()
+        if target is None:
+            return
+        now = time.perf_counter()
+        target._close(now)
+        target._current, target._current_started = name, now
+
+    def _close(self, now):
+        if self._current is not None:
+            self.sections[self._current] = self.sections.get(self._current, 0.0) + now - self._current_started
+            self._current = None
+
+    @contextmanager
+    def section(self, name):
+        """Time a block as its own section, independent of ``mark``."""
+        target = self._recorder()
+        if target is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            target.sections[name] = target.sections.get(name, 0.0) + time.perf_counter() - started
+
+    def wrap(self, fn, name=None):
+        """``fn`` with every call counted and timed under ``name`` (default: its __name__)."""
+        if not self.enabled:
+            return fn
+        name = name or fn.__name__
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            target = self._recorder()
+            if target is None:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats = target.helpers.setdefault(name, {"calls": 0, "seconds": 0.0})
+                stats["calls"] += 1
+                stats["seconds"] += time.perf_counter() - started
+        return timed
+
+    def finish(self) -> dict:
+        """Close the running section, stop recording and return the rerun record."""
+        now = time.perf_counter()
+        self._close(now)
+        self.finished = True
+        return {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "session": self.session_id,
+            "rerun": self.rerun,
+            "scope": self.scope,
+            "fragment": self.fragment_name,
+            "total_s": now - self._started,
+            "sections": dict(self.sections),
+            "helpers": {name: dict(stats) for name, stats in self.helpers.items() if stats["calls"]},
+        }
+
+
+def append_jsonl(record, path=DEFAULT_LOG_PATH):
+    """Append one rerun record as a JSON line."""
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_log(path=DEFAULT_LOG_PATH) -> list:
+    """Per-section and per-helper count / p50 / p95 / max seconds across a timing log.
+
+    Returns one dict per name, sections first (page rerun total as
+    ``"(total)"``, fragment reruns as ``"(fragment <name>)"``), each group
+    sorted by p95 descending.
+    """
+    sections, helpers = {"(total)": []}, {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            total = f"(fragment {record['fragment']})" if record.get("scope") == "fragment" else "(total)"
+            sections.setdefault(total, []).append(record["total_s"])
+            for name, seconds in record.get("sections", {}).items():
+                sections.setdefault(name, []).append(seconds)
+            for name, stats in record.get("helpers", {}).items():
+                helpers.setdefault(name, []).append(stats["seconds"])
+
+    rows = []
+    for kind, groups in (("section", sections), ("helper", helpers)):
+        group_rows = [
+            {"kind": kind, "name": name, "count": len(values),
+             "p50_s": _percentile(values, 50), "p95_s": _percentile(values, 95), "max_s": max(values)}
+            for name, values in groups.items() if values
+        ]
+        rows += sorted(group_rows, key=lambda row: row["p95_s"], reverse=True)
+    return rows
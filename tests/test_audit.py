@@ -0,0 +1,147 @@
+import json
+import random
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from mediaplanner.audit import AUDIT_CHECKS, audit_deal, audit_deals, audit_summary
+
+MAIN_JS = Path(__file__).resolve().parents[1] / "src" / "main.js"
+
+PASSING = {"status": "Active", "buyer_seat_id": "BS-1",
+           "kvps": "msft_refresh=on;brand_safety=on;inventory_type=display", "geo": "US;CA",
+           "devices": "mobile;desktop", "segments": "a,b", "deal_list_id": "DL-1", "floor_price": "5.50",
+           "creative_approved": "true", "inventory_strength": "Strong", "historical_performance": "Good"}
+
+
+def _audit(**fields):
+    return audit_deal({**PASSING, **fields})
+
+
+def test_passing_deal_is_high():
+    result = _audit()
+    assert all(result[check]["passed"] for check in AUDIT_CHECKS)
+    assert result["overall_outcome"] == {"outcome": "HIGH ✅", "percentage": "100.0",
+                                         "recommendation": "Deal ready for launch"}
+
+
+# (fields, check, passed, status, issue) as DealAuditor in src/main.js scores them
+CASES = [
+    ({"status": "Active"}, "deal_status", True, "Active", None),
+    ({"status": "Inactive"}, "deal_status", False, "Inactive/Archived", "Deal is not active"),
+    ({"status": "active"}, "deal_status", False, "Inactive/Archived", "Deal is not active"),
+    ({"buyer_seat_id": ""}, "buyer_seat", False, "Missing", "Buyer seat ID missing"),
+    ({"kvps": "msft_refresh=on"}, "kvps", False, "Invalid", "Missing: brand_safety, inventory_type"),
+    ({"kvps": "MSFT_REFRESH=on;brand_safety=on;inventory_type=x"}, "kvps", False, "Invalid",
+     "Missing: msft_refresh"),
+    ({"kvps": ""}, "kvps", False, "Invalid", "Missing: msft_refresh, brand_safety, inventory_type"),
+    ({"geo": "us"}, "targeting", False, "Minor Issue", "Invalid countries: us"),
+    ({"geo": "UK;US", "devices": "tv"}, "targeting", False, "Multiple Issues",
+     "Invalid countries: UK; Invalid devices: tv"),
+    ({"segments": "a,b,c,d,e,f"}, "targeting", False, "Minor Issue", "Too many segments (restrictive)"),
+    ({"geo": "", "devices": "", "segments": ""}, "targeting", True, "All Pass", None),
+    ({"deal_list_id": ""}, "deal_list", False, "Unapproved", "Deal List ID missing"),
+    ({"floor_price": ""}, "floor_price", False, "Not Set", "Floor price not specified"),
+    ({"floor_price": "1.99"}, "floor_price", False, "Too Low", "Below market minimum ($2)"),
+    ({"floor_price": "15.01"}, "floor_price", False, "Too High", "Above market maximum ($15)"),
+    ({"floor_price": "15"}, "floor_price", True, "Competitive", None),
+    ({"floor_price": "7.5 USD"}, "floor_price", True, "Competitive", None),  # parseFloat prefix
+    ({"floor_price": "1e1"}, "floor_price", True, "Competitive", None),
+    ({"floor_price": ".5"}, "floor_price", False, "Too Low", "Below market minimum ($2)"),
+    ({"floor_price": "Infinity"}, "floor_price", False, "Too High", "Above market maximum ($15)"),
+    ({"creative_approved": "false"}, "creative_audit", False, "Rejected/Pending", "Creative not approved"),
+    ({"inventory_strength": "Weak"}, "inventory", False, "Weak", "Insufficient inventory"),
+    ({"inventory_strength": ""}, "inventory", False, "Insufficient", "Insufficient inventory"),
+    ({"historical_performance": "Mixed"}, "historical", True, "Mixed", None),
+    ({"historical_performance": ""}, "historical", False, "Unknown", "Poor historical performance"),
+]
+
+
+@pytest.mark.parametrize("fields,check,passed,status,issue", CASES)
+def test_check_matches_main_js(fields, check, passed, status, issue):
+    assert _audit(**fields)[check] == {"passed": passed, "status": status, "issue": issue}
+
+
+def test_documented_deviations_for_file_values():
+    # Deal exports write title-case devices; the form only sends lower-case ones
+    assert _audit(devices="Desktop;Tablet")["targeting"]["passed"]
+    # No leading number: "Not Set" (parseFloat → NaN, which the JS would pass)
+    assert _audit(floor_price="n/a")["floor_price"]["status"] == "Not Set"
+    assert _audit(creative_approved="Approved")["creative_audit"]["passed"]
+    assert _audit(kvps="", kvps_msft_refresh="yes", kvps_brand_safety="1",
+                  kvps_inventory_type="true")["kvps"]["passed"]
+
+
+def test_outcome_bands_and_summary():
+    deals = pd.DataFrame([PASSING, {**PASSING, "status": "Archived", "floor_price": "1"},
+                          {**PASSING, "status": "", "buyer_seat_id": "", "deal_list_id": "", "kvps": ""}])
+    results = audit_deals(deals)
+    assert results["audit_checks_passed"].tolist() == [9, 7, 5]
+    assert results["audit_outcome"].tolist() == ["HIGH ✅", "MEDIUM ⚠️", "LOW ❌"]
+    summary = audit_summary(results)
+    assert summary["outcomes"] == {"HIGH ✅": 1, "MEDIUM ⚠️": 1, "LOW ❌": 1}
+    assert summary["pass_rate"]["floor_price"] == pytest.approx(2 / 3)
+
+
+# ── Randomized parity against the JavaScript itself (needs node) ────────────
+
+_HARNESS = """
+const auditor = new DealAuditor();
+const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(cases.map(deal => auditor.validateDeal(deal))));
+"""
+
+
+def _form_cases(count, seed=11):
+    """Random deals within what the form can submit, as (audit row, DealAuditor dealData)."""
+    rng = random.Random(seed)
+    rows, deals = [], []
+    for _ in range(count):
+        kvps = [k for k in ("msft_refresh", "brand_safety", "inventory_type") if rng.random() < 0.8]
+        geo = rng.sample(["US", "CA", "GB", "AU", "us", "UK", "MX"], rng.randint(0, 3))
+        devices = rng.sample(["mobile", "desktop", "tablet", "tv"], rng.randint(0, 3))
+        segments = [f"seg{i}" for i in range(rng.choice([0, 2, 5, 6, 8]))]
+        deal = {
+            "status": rng.choice(["", "Active", "Inactive", "Archived"]),
+            "buyerSeatId": rng.choice(["", "BS-1"]),
+            "kvps": {key: True for key in kvps},
+            "targeting": {"geo": geo, "devices": devices, "segments": segments},
+            "dealListId": rng.choice(["", "DL-9"]),
+            "floorPrice": rng.choice(["", "0", "1.5", "2", "8.25", "15", "15.5", "40", "3 USD", "2e1"]),
+            "creativeApproved": rng.random() < 0.7,
+            "inventoryStrength": rng.choice(["", "Strong", "Moderate", "Weak"]),
+            "historicalPerformance": rng.choice(["", "Good", "Mixed", "Poor"]),
+        }
+        deals.append(deal)
+        rows.append({
+            "status": deal["status"], "buyer_seat_id": deal["buyerSeatId"],
+            "kvps": ";".join(f"{key}=1" for key in kvps), "geo": ";".join(geo), "devices": ";".join(devices),
+            "segments": ",".join(segments), "deal_list_id": deal["dealListId"],
+            "floor_price": deal["floorPrice"], "creative_approved": str(deal["creativeApproved"]).lower(),
+            "inventory_strength": deal["inventoryStrength"],
+            "historical_performance": deal["historicalPerformance"],
+        })
+    return rows, deals
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_randomized_parity_with_main_js():
+    source = MAIN_JS.read_text(encoding="utf-8")
+    auditor = re.search(r"^class DealAuditor \{.*?^\}", source, re.S | re.M).group()
+    rows, deals = _form_cases(400)
+    completed = subprocess.run(["node", "-e", auditor + _HARNESS], input=json.dumps(deals),
+                               capture_output=True, text=True, check=True)
+    expected = json.loads(completed.stdout)
+    results = audit_deals(pd.DataFrame(rows, dtype=object))
+    for (_, row), js in zip(results.iterrows(), expected):
+        for check in AUDIT_CHECKS:
+            issue = row[f"audit_{check}_issue"]
+            assert (bool(row[f"audit_{check}"]), row[f"audit_{check}_status"],
+                    None if pd.isna(issue) else issue) == \
+                (bool(js[check]["passed"]), js[check]["status"], js[check]["issue"]), (check, js)
+        assert row["audit_outcome"] == js["overall_outcome"]["outcome"]
+        assert f"{row['audit_percentage']:.1f}" == js["overall_outcome"]["percentage"]
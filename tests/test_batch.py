@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from mediaplanner.batch import PLAN_COLUMNS, plan_deal_file, plan_deals
+from mediaplanner.cli import main
+from mediaplanner.naming import li_names, parse_taxonomy, taxonomy_names
+
+SAMPLE = "sample_deals.csv"
+
+
+def _read(path):
+    return pd.read_csv(path, dtype=str, index_col=False, keep_default_na=False, na_values=[""])
+
+
+@pytest.fixture
+def deals():
+    return _read(SAMPLE)
+
+
+def test_chunked_file_matches_one_chunk(tmp_path, deals):
+    whole, chunked = tmp_path / "whole.csv", tmp_path / "chunked.csv"
+    plan_deal_file(SAMPLE, whole, chunksize=len(deals) + 1)
+    stats = plan_deal_file(SAMPLE, chunked, chunksize=2)
+    assert stats["rows"] == len(deals)
+    pd.testing.assert_frame_equal(_read(chunked), _read(whole))
+    assert list(_read(chunked).columns) == list(deals.columns) + PLAN_COLUMNS
+
+
+def test_cli_plan_streams_chunks(tmp_path, deals, capsys):
+    output = tmp_path / "planned.csv"
+    assert main(["plan", SAMPLE, "-o", str(output), "--chunksize", "3"]) in (0, None)
+    planned = _read(output)
+    assert len(planned) == len(deals)
+    assert planned["deal_id"].tolist() == deals["deal_id"].tolist()
+    assert f"Planned {len(deals):,} deals" in capsys.readouterr().err
+
+
+def test_multi_market_deal_gets_one_taxonomy_per_market(deals):
+    planned = plan_deals(deals)
+    row = planned.loc[planned["market_country"] == "US;CA"].iloc[0]
+    names = row["plan_taxonomy"].split(";")
+    parsed = parse_taxonomy(pd.Series(names))
+    assert parsed["parsed"].all()
+    assert parsed["market"].tolist() == ["US", "CA"]
+    assert parsed["publisher"].nunique() == 1
+
+
+def test_single_market_names_unchanged():
+    plans = pd.DataFrame({"advertiser": ["Acme", "Acme"], "market": ["US", "UK ; DE"],
+                          "publisher": ["MSN", "MSN"], "product": ["PG First Impact"] * 2,
+                          "format": ["Display"] * 2, "device": ["Desktop"] * 2})
+    taxonomy = taxonomy_names(plans)
+    assert taxonomy[0].startswith("US_MSN_")
+    assert [name.split("_")[0] for name in taxonomy[1].split(";")] == ["UK", "DE"]
+    assert li_names(plans)[1] == "Acme_UK_MSN_PG First Impact;Acme_DE_MSN_PG First Impact"
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mediaplanner.capacity import (
+    booking_intervals, capacity_grid, check_capacity, overbooked_windows, read_capacity_table, read_deals,
+)
+
+
+def _intervals(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D")
+    return pd.DataFrame({
+        "deal_id": [f"D{i}" for i in range(n)],
+        "publisher": rng.choice(["MSN", "Outlook"], n),
+        "device": rng.choice(["Desktop", "Mobile"], n),
+        "market": rng.choice(["US", "CA", "UK"], n),
+        "start": start,
+        "end": start + pd.to_timedelta(rng.integers(0, 45, n), unit="D"),
+        "daily_imps": rng.uniform(1e4, 2e5, n),
+        "exclusive": rng.random(n) < 0.05,
+        "capacity": np.where(rng.random(n) < 0.1, 3e6, np.nan),
+    })
+
+
+def _naive_grid(intervals, default):
+    """Slot-day loop over every interval day, the reference for the sweep."""
+    grid = capacity_grid(intervals, default_capacity=default)
+    slots = {tuple(row): i for i, row in enumerate(grid["slots"][["publisher", "device", "market"]].to_numpy())}
+    first, n_days = grid["dates"][0], grid["dates"].size
+    booked, deals = np.zeros((len(slots), n_days)), np.zeros((len(slots), n_days), dtype=np.int64)
+    capacity = np.full((len(slots), n_days), -np.inf)
+    rows = list(intervals.itertuples(index=False))
+    for row in rows:
+        s = slots[(row.publisher, row.device, row.market)]
+        for day in range((np.datetime64(row.start, "D") - first).astype(int),
+                         (np.datetime64(row.end, "D") - first).astype(int) + 1):
+            deals[s, day] += 1
+            if row.capacity > 0:
+                capacity[s, day] = max(capacity[s, day], row.capacity)
+    for (pub, dev, _), s in slots.items():
+        capacity[s, np.isneginf(capacity[s])] = default.get((pub, dev), np.nan)
+    for row in rows:
+        s = slots[(row.publisher, row.device, row.market)]
+        for day in range((np.datetime64(row.start, "D") - first).astype(int),
+                         (np.datetime64(row.end, "D") - first).astype(int) + 1):
+            booked[s, day] += np.nan_to_num(capacity[s, day]) if row.exclusive else row.daily_imps
+    return grid, booked, capacity, deals
+
+
+def test_sweep_matches_day_by_day_loop():
+    default = {("MSN", "Desktop"): 2e6, ("MSN", "Mobile"): 1.5e6}
+    grid, booked, capacity, deals = _naive_grid(_intervals(), default)
+    np.testing.assert_allclose(grid["booked"], booked, rtol=1e-9, atol=1e-3)
+    np.testing.assert_array_equal(grid["capacity"], capacity)
+    np.testing.assert_array_equal(grid["deals"], deals)
+
+
+def test_overbooked_windows_are_the_runs_above_capacity():
+    grid = capacity_grid(_intervals(), default_capacity={("MSN", "Desktop"): 1e6, ("Outlook", "Mobile"): 8e5})
+    windows = overbooked_windows(grid)
+    assert len(windows)
+    over = grid["booked"] > grid["capacity"] * (1 + 1e-9)
+    assert windows["days"].sum() == over.sum()
+    slot_of = {tuple(row): i for i, row in enumerate(grid["slots"][["publisher", "device", "market"]].to_numpy())}
+    for window in windows.itertuples(index=False):
+        s = slot_of[(window.publisher, window.device, window.market)]
+        first = int((np.datetime64(window.start, "D") - grid["dates"][0]).astype(int))
+        run = slice(first, first + window.days)
+        # A maximal run: over capacity throughout, not on the days either side
+        padded = np.pad(over[s], 1)
+        assert padded[first + 1:first + 1 + window.days].all()
+        assert not padded[first] and not padded[first + 1 + window.days]
+        assert window.overbooked_imps == pytest.approx((grid["booked"] - grid["capacity"])[s, run].sum())
+        assert window.capacity == grid["capacity"][s, run].min()
+        assert window.max_concurrent_deals == grid["deals"][s, run].max()
+    assert windows["overbooked_imps"].is_monotonic_decreasing
+
+
+def test_unknown_capacity_is_never_overbooked():
+    grid = capacity_grid(_intervals())
+    assert np.isnan(grid["capacity"]).any()
+    assert not overbooked_windows(grid)["capacity"].isna().any()
+
+
+def test_sample_deals_split_markets_and_takeovers(tmp_path):
+    deals = read_deals("sample_deals.csv")
+    intervals = booking_intervals(deals)
+    split = intervals[intervals["deal_id"] == "D-2024-002"]
+    assert sorted(split["market"]) == ["CA", "US"]
+    assert split["daily_imps"].iloc[0] == pytest.approx(16_666_667 / 92 / 2)
+    assert intervals["exclusive"].any()
+
+    table = tmp_path / "capacity.csv"
+    table.write_text("publisher,device,daily_capacity_imps\nMSN, All Devices,1000\n")
+    assert read_capacity_table(table) == {("MSN", "All Devices"): 1000.0}
+    grid, windows = check_capacity(deals, default_capacity=read_capacity_table(table))
+    assert sorted(zip(windows["device"], windows["market"])) == [("All Devices", "CA"), ("All Devices", "US")]
+    assert grid["booked"].shape == grid["capacity"].shape
+
+
+def test_empty_deal_frame():
+    grid, windows = check_capacity(read_deals("sample_deals.csv").iloc[:0])
+    assert grid["booked"].size == 0 and windows.empty
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from mediaplanner.creative_sizes import (
+    CREATIVE_COLUMNS, LINE_KEYS, SIZE_BITS, _popcount, check_creative_sizes, creatives_fit, eligible_lines,
+    line_sizes, mask_sizes, parse_sizes, size_mask, size_masks)
+
+OUTLOOK_GDALI = ("GDALI - Impressions", "Outlook", "Banner", "Desktop")  # min_creatives 3
+
+
+def test_parse_sizes_canonical_and_deduplicated():
+    assert parse_sizes("970x250;728x90;300x250") == ("970x250", "728x90", "300x250")
+    assert parse_sizes("ATF: 970 x 250 OR 728X90 | BTF: 0300×0250, 970x250") == ("970x250", "728x90", "300x250")
+    assert parse_sizes(None) == parse_sizes(float("nan")) == parse_sizes("") == ()
+
+
+def test_masks_round_trip_and_drop_unknown_sizes():
+    mask = size_mask("300x250;728x90;123x45")
+    assert mask == SIZE_BITS["300x250"] | SIZE_BITS["728x90"]
+    assert mask_sizes(mask) == ["300x250", "728x90"]
+    assert size_masks(pd.Series(["728x90;300x250", None, "728x90;300x250"])).tolist() == [mask, 0, mask]
+
+
+def test_popcount_without_numpy_2():
+    masks = np.array([[0, 1, 0b101], [0b111111, 0b101, 1]], dtype=np.int64)
+    assert _popcount(masks).tolist() == [[0, 1, 2], [6, 2, 1]]
+    assert _popcount(np.array([], dtype=np.int64)).shape == (0,)
+
+
+def test_creatives_fit_min_creatives_and_unsized_lines():
+    assert line_sizes(*OUTLOOK_GDALI) == (("300x250", "300x600", "728x90"), 3)
+    assert not creatives_fit("300x250;728x90;970x250", *OUTLOOK_GDALI)
+    assert creatives_fit("300x250;728x90;300x600", *OUTLOOK_GDALI)
+    assert creatives_fit("", "PG - Standard", "MSN", "Video", "Desktop")  # not size-checked
+    assert not creatives_fit("300x250", "No Such Product", "MSN", "Banner", "Desktop")
+
+
+def test_eligible_lines_match_line_by_line_fit():
+    sizes = "970x250;728x90;300x250"
+    expected = [key for key in LINE_KEYS if line_sizes(*key)[0] and creatives_fit(sizes, *key)]
+    assert eligible_lines(sizes) == expected
+    assert ("High Impact", "MSN", "Banner", "Desktop") in expected
+    assert OUTLOOK_GDALI not in expected
+    assert ("PG - Standard", "MSN", "Banner", "Mobile") not in expected
+    assert eligible_lines("123x45") == eligible_lines("") == []
+
+
+def test_check_creative_sizes_rows():
+    deals = pd.DataFrame({
+        "ad_sizes": ["970x250;728x90;300x250", "300x250;970x250;123x45", "320x50", "300x250", ""],
+        "product": ["High Impact", "GDALI - Impressions", "PG - Standard", "No Such Product", "PG - Standard"],
+        "publisher": ["MSN", "Outlook", "MSN", "MSN", "MSN"],
+        "format": ["Banner", "Banner", "Banner", "Banner", "Video"],
+        "device": ["Desktop", "Desktop", "Desktop", "Desktop", "Desktop"],
+    }, index=[10, 11, 12, 13, 14])
+    result = check_creative_sizes(deals)
+    assert list(result.columns) == CREATIVE_COLUMNS
+    assert result.index.tolist() == [10, 11, 12, 13, 14]
+    assert result["creative_fit"].tolist() == [True, False, False, False, True]
+    assert result["creative_matched"].tolist() == [3, 1, 0, 0, 0]
+    assert result["creative_required"].tolist() == [1, 3, 1, 0, 0]
+    assert result["creative_rejected_sizes"].tolist() == ["", "970x250, 123x45", "320x50", "", ""]
+    assert result.loc[10, "creative_eligible_lines"] == len(eligible_lines("970x250;728x90;300x250"))
+    assert result.loc[14, "creative_eligible_lines"] == 0
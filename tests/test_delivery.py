@@ -0,0 +1,67 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from mediaplanner import delivery
+from mediaplanner.delivery import _step_days, calculate_delivery_pressure, simulate_delivery
+
+EVEN = ("High Impact", "MSN", "Banner", "All Devices")
+
+
+def _flight(line, start, end, volume):
+    product, publisher, ad_format, device = line
+    return {"product": product, "publisher": publisher, "format": ad_format, "device": device,
+            "start_date": start, "end_date": end, "volume": volume}
+
+
+def _stepped(flights, sim, pacing=1.0, asap=False, cap=6):
+    """Run the day-by-day path on the same flights as ``sim``."""
+    horizon = sim["dates"][0].astype(date)
+    start = np.array([(f["start_date"] - horizon).days for f in flights])
+    days = np.array([(f["end_date"] - f["start_date"]).days + 1 for f in flights])
+    volume = np.array([float(f["volume"]) for f in flights])
+    n = len(flights)
+    return _step_days(start, days, volume, pacing * volume / days, np.full(n, asap), np.full(n, cap),
+                      np.zeros(n, dtype=np.int64), np.array([1e12]), sim["dates"].size)
+
+
+def test_closed_form_matches_stepped_path():
+    flights = [_flight(EVEN, date(2026, 3, 1), date(2026, 3, 31), 3_100_000),
+               _flight(EVEN, date(2026, 3, 10), date(2026, 4, 9), 1_000_000)]
+    sim = simulate_delivery(flights, daily_uniques=1e12)
+    cap = delivery._line_rules(*EVEN)[2]
+    _, _, required, deliverable, shortfall, remaining = _stepped(flights, sim, cap=cap)
+    np.testing.assert_allclose(sim["required"], required)
+    np.testing.assert_allclose(sim["deliverable"], deliverable)
+    assert not shortfall.any() and np.allclose(remaining, 0.0)
+    assert sim["required"].sum() == pytest.approx(4_100_000)
+
+
+def test_under_paced_line_catches_up(monkeypatch):
+    monkeypatch.setattr(delivery, "_line_rules", lambda *line: (False, 0.8, 6, False))
+    flights = [_flight(EVEN, date(2026, 3, 1), date(2026, 3, 10), 1_000_000)]
+    sim = simulate_delivery(flights, daily_uniques=1e12)
+    # The full goal is delivered by the flight end, exactly as the day-by-day path has it
+    assert sim["required"].sum() == pytest.approx(1_000_000)
+    assert sim["total_shortfall"] == pytest.approx(0.0)
+    np.testing.assert_allclose(sim["required"], _stepped(flights, sim, pacing=0.8)[2])
+
+
+def test_asap_fill_does_not_exceed_required():
+    asap = ("PG - First Impression", "MSN", "Banner", "All Devices")
+    flights = [_flight(asap, date(2026, 3, 1), date(2026, 3, 20), 2_000_000),
+               _flight(EVEN, date(2026, 3, 1), date(2026, 3, 20), 2_000_000)]
+    sim = simulate_delivery(flights, daily_uniques=300_000)
+    assert (sim["deliverable"] <= sim["required"] + 1e-6).all()
+    np.testing.assert_allclose(sim["shortfall"], sim["required"] - sim["deliverable"], atol=1e-6)
+
+
+def test_over_capacity_slot_reports_shortfall():
+    flights = [_flight(EVEN, date(2026, 3, 1), date(2026, 3, 5), 50_000_000)]
+    sim = simulate_delivery(flights, daily_uniques=1_000_000)
+    assert sim["peak_pressure"] > 1.0 and sim["total_shortfall"] > 0
+    label, explanation = calculate_delivery_pressure(flights, simulation=sim)
+    assert label == "High" and "at risk" in explanation
+    assert calculate_delivery_pressure(flights, daily_uniques=1e12)[0] == "Low"
+    assert calculate_delivery_pressure([])[0] == "Low"
@@ -0,0 +1,74 @@
+from datetime import date
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from mediaplanner.exporters import (
+    _pdf_plan_elements, build_export_files, create_excel_export, create_internal_excel_export,
+    create_pdf_export, stream_excel_export,
+)
+from mediaplanner.flights import FlightStore
+
+CAMPAIGN = {"advertiser": "Acme", "campaign": "Spring", "market": "US", "publisher": "MSN",
+            "product": "High Impact"}
+
+
+def _flights():
+    return [
+        {"flight_num": 1, "product": "High Impact", "publisher": "MSN", "format": "Banner",
+         "start_date": date(2026, 1, 5), "end_date": date(2026, 1, 18), "budget": 5000.0, "cpm": 12.0},
+        {"flight_num": 2, "product": "PG - Standard", "publisher": "MSN", "format": "Native",
+         "start_date": date(2026, 1, 19), "end_date": date(2026, 2, 1), "budget": 3000.0, "cpm": 8.0},
+        {"flight_num": 3, "product": "High Impact", "publisher": "MSN", "format": "Banner",
+         "start_date": date(2026, 2, 2), "end_date": date(2026, 2, 15), "budget": 2000.0, "cpm": 10.0},
+    ]
+
+
+def _values(source):
+    if not isinstance(source, (str, BytesIO)):
+        buffer = BytesIO()
+        source.save(buffer)
+        source = BytesIO(buffer.getvalue())
+    ws = load_workbook(source).worksheets[0]
+    return [[cell.value for cell in row] for row in ws.iter_rows()], sorted(map(str, ws.merged_cells.ranges))
+
+
+def test_classic_and_streamed_io_share_one_layout(tmp_path):
+    flights = _flights()
+    classic = _values(create_excel_export(flights, CAMPAIGN, "Low", {}, 12.0, "$",
+                                          vcr_target=70, completed_views=1000))
+    streamed = _values(stream_excel_export(FlightStore(flights), CAMPAIGN, "Low", {}, 12.0, "$",
+                                           vcr_target=70, completed_views=1000,
+                                           path=str(tmp_path / "io.xlsx")))
+    assert classic == streamed
+    rows, merged = classic
+    assert merged == ["A1:F1"]
+    assert rows[0][0] == "MEDIA PLAN - MONETIZE GUARANTEED"
+    assert [row[0] for row in rows[8:11]] == [1, 2, 3]
+    assert rows[13][0] == "FORECASTING BY PRODUCT"
+    assert rows[-3][0] == "TOTAL" and rows[-1][:2] == ["Est. Completed Views", "1,000"]
+
+
+def test_pdf_forecast_matches_excel():
+    flights = _flights()
+    rows, _ = _values(create_excel_export(flights, CAMPAIGN, "Low", {}, 12.0, "$"))
+    forecast = _pdf_plan_elements(flights, CAMPAIGN, 12.0, "$")[-1]._cellvalues
+    assert forecast == [["" if value is None else value for value in row[:7]] for row in rows[14:]]
+    assert create_pdf_export(flights, CAMPAIGN, "Low", {}, 12.0, "$").getvalue().startswith(b"%PDF")
+
+
+def test_internal_setup_layout():
+    config = {"line_item_type": "Standard", "priority": 12}
+    rows, merged = _values(create_internal_excel_export(_flights(), CAMPAIGN, "Low", config,
+                                                        [("Budget", "OK")]))
+    assert merged == ["A1:B1"]
+    assert rows[2] == ["Campaign Name:", "Spring"]
+    assert rows[10] == ["Field", "Value"]
+    assert ["Priority", "12"] in rows and ["Seat ID", "280 - Monetize"] in rows
+    assert rows[-2:] == [["Checklist Item", "Status / Value"], ["Budget", "OK"]]
+
+
+def test_export_bundle_builds_every_file():
+    files = build_export_files(_flights(), CAMPAIGN, "Low", {}, 12.0, "$", [("Budget", "OK")])
+    assert set(files) == {"io_excel", "io_pdf", "internal_excel"}
+    assert _values(BytesIO(files["io_excel"]))[0][0][0] == "MEDIA PLAN - MONETIZE GUARANTEED"
@@ -0,0 +1,69 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from mediaplanner.flights import Flight, FlightStore, group_flights
+
+PRODUCTS = [("High Impact", "MSN", "Banner"), ("PG - Standard", "MSN", "Native"),
+            ("GDALI - Outlook Takeover", "Outlook", "Banner")]
+
+
+def _flight(i, product, cpm):
+    start = date(2026, 1, 1) + timedelta(days=7 * i)
+    budget = round(1000 + 0.1 * i + 1 / 3, 6)
+    return {"flight_num": i + 1, "product": product[0], "publisher": product[1], "format": product[2],
+            "start_date": start, "end_date": start + timedelta(days=6), "budget": budget, "cpm": cpm,
+            "volume": budget / cpm * 1000, "total_cost": budget}
+
+
+def _flights(count=30):
+    return [_flight(i, PRODUCTS[i % 3], 5.0 + i) for i in range(count)]
+
+
+def _snapshot(store):
+    return ({key: dict(group) for key, group in store.groups.items()},
+            store.total_budget, store.total_volume, store.total_cost)
+
+
+def test_append_matches_group_flights():
+    flights = _flights()
+    store = FlightStore(flights)
+    assert len(store) == len(flights)
+    assert all(isinstance(f, Flight) for f in store)
+    assert group_flights(store) == group_flights(flights)
+    assert store.total_budget == sum(f["budget"] for f in flights)
+    assert store.first["flight_num"] == 1
+
+
+def test_pop_leaves_exactly_a_fresh_store():
+    rng = random.Random(7)
+    store, remaining = FlightStore(_flights()), _flights()
+    while len(store) > 1:
+        index = rng.randrange(len(store))
+        assert store.pop(index)["flight_num"] == remaining.pop(index)["flight_num"]
+        assert _snapshot(store) == _snapshot(FlightStore(remaining))
+    store.pop()
+    assert _snapshot(store) == ({}, 0.0, 0.0, 0.0) and store.first is None
+
+
+def test_group_cpm_follows_first_flight():
+    flights = _flights(7)
+    store = FlightStore(flights)
+    key = PRODUCTS[0]
+    assert store.groups[key]["cpm"] == flights[0]["cpm"]
+    store.pop(0)
+    assert store.groups[key]["cpm"] == flights[3]["cpm"]
+    store.pop(store.to_records().index(next(r for r in store.to_records() if r["flight_num"] == 4)))
+    assert store.groups[key]["cpm"] == flights[6]["cpm"]
+    assert store.groups[key]["flights"] == 1
+
+
+def test_groups_are_read_only_copies():
+    store = FlightStore(_flights(3))
+    groups = store.groups
+    with pytest.raises(TypeError):
+        groups[PRODUCTS[0]]["budget"] = 0
+    store.append(_flight(3, PRODUCTS[0], 9.0))
+    assert groups[PRODUCTS[0]]["flights"] == 1
+    assert store.groups[PRODUCTS[0]]["flights"] == 2
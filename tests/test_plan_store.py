@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from mediaplanner.flights import FlightStore
+from mediaplanner.plan_store import FORECAST_FIELDS, PLAN_FIELDS, PlanStore, plan_forecasts
+
+
+def _flight(product, publisher, start, end, budget, volume, market="US"):
+    return {"product": product, "publisher": publisher, "format": "Banner", "device": "Desktop",
+            "start_date": start, "end_date": end, "budget": budget, "cpm": 20.0, "volume": volume,
+            "currency": "$", "total_cost": budget, "currency_code": "USD", "market": market}
+
+
+def _plan(advertiser, market, *flights):
+    return {"campaign_info": {"advertiser": advertiser, "campaign": f"{advertiser} Q", "market": market,
+                              "start_date": date(2025, 1, 1), "end_date": date(2025, 12, 31)},
+            "flights": list(flights)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with PlanStore(tmp_path / "plans.db") as store:
+        yield store
+
+
+def test_save_and_load_round_trip_dates(store):
+    flights = [_flight("High Impact", "MSN", date(2025, 3, 1), date(2025, 3, 31), 1000.0, 50000.0),
+               _flight("PG - Standard", "Outlook", date(2025, 2, 15), date(2025, 4, 10), 500.0, 40000.0, "CA")]
+    plan_id = store.save_plan(_plan("Contoso", "US")["campaign_info"], flights)
+    loaded = store.load_plan(plan_id)
+
+    assert isinstance(loaded["flights"], FlightStore)
+    assert [dict(f) for f in loaded["flights"]] == flights
+    assert type(loaded["flights"][0]["start_date"]) is date
+    assert loaded["campaign_info"]["start_date"] == date(2025, 1, 1)
+    assert loaded["campaign_info"]["advertiser"] == "Contoso"
+    assert [(row["product"], row["publisher"]) for row in loaded["forecasts"]] == \
+        [(row["product"], row["publisher"]) for row in plan_forecasts(flights)]
+    assert set(loaded["forecasts"][0]) == set(FORECAST_FIELDS)
+
+    listed = store.find_plans()
+    assert list(listed.columns) == ["plan_id", *PLAN_FIELDS]
+    # The plan's range spans its flights, not the campaign dates
+    assert listed.loc[0, ["start_date", "end_date"]].tolist() == ["2025-02-15", "2025-04-10"]
+    assert listed.loc[0, "total_budget"] == 1500.0 and listed.loc[0, "flight_count"] == 2
+
+
+def test_save_plans_and_load_plans_keep_order(store):
+    ids = store.save_plans([_plan("A", "US", _flight("High Impact", "MSN", date(2025, 1, 1), date(2025, 1, 31), 1, 1)),
+                            _plan("B", "CA"),
+                            _plan("C", "US", _flight("High Impact", "MSN", date(2025, 6, 1), date(2025, 6, 5), 2, 2))])
+    assert len(ids) == len(store) == 3
+    loaded = store.load_plans([ids[2], 999, ids[0]])
+    assert [plan["campaign_info"]["advertiser"] for plan in loaded] == ["C", "A"]
+    assert store.load_plan(999) is None
+    # A plan without flights keeps its campaign dates as its range
+    assert store.find_plans(advertiser="B").loc[0, "start_date"] == "2025-01-01"
+    assert store.delete_plans([ids[1]]) == 1 and len(store) == 2
+
+
+def test_find_plans_filters_and_date_overlap(store):
+    jan = _plan("Contoso", "US", _flight("High Impact", "MSN", date(2025, 1, 1), date(2025, 1, 31), 1, 1))
+    spring = _plan("Contoso", "CA", _flight("PG - Standard", "Outlook", date(2025, 3, 1), date(2025, 5, 31), 1, 1))
+    june = _plan("Fabrikam", "US", _flight("High Impact", "MCG", date(2025, 6, 10), date(2025, 6, 20), 1, 1))
+    jan_id, spring_id, june_id = store.save_plans([jan, spring, june])
+
+    def found(**filters):
+        return store.find_plans(**filters)["plan_id"].tolist()
+
+    assert found() == [june_id, spring_id, jan_id]  # newest first
+    assert found(advertiser="Contoso") == [spring_id, jan_id]
+    assert found(market="US", product="High Impact") == [june_id, jan_id]
+    assert found(publisher="Outlook") == [spring_id]
+    # Overlap, inclusive at both ends
+    assert found(start=date(2025, 1, 31), end=date(2025, 3, 1)) == [spring_id, jan_id]
+    assert found(start=date(2025, 2, 1), end=date(2025, 2, 28)) == []
+    assert found(start="2025-05-31") == [june_id, spring_id]
+    assert found(end=date(2025, 6, 9)) == [spring_id, jan_id]
+    assert found(limit=1) == [june_id]
+
+
+def test_reopening_a_file_keeps_plans(tmp_path):
+    path = tmp_path / "plans.db"
+    with PlanStore(path) as store:
+        plan_id = store.save_plan({"advertiser": "Contoso"}, [])
+    with PlanStore(path) as store:
+        assert store.find_plans()["plan_id"].tolist() == [plan_id]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from mediaplanner.reach import _capped_poisson, _daily_rate, simulate_reach
+from mediaplanner.rules import DAILY_AUDIENCE_UNIQUES
+
+
+@pytest.mark.parametrize("impressions", [1, 50, 2_000, 40_000])
+def test_small_line_reach_is_clipped_at_impressions(impressions):
+    result = simulate_reach(impressions, 10, 3, sample_size=20_000, seed=1)
+    assert all(value <= impressions for value in result["reach"])
+    assert result["reach"][1] <= result["reach"][0] <= result["reach"][2]
+    if result["reach"][1] > 0:  # every run reached someone
+        assert result["avg_frequency"][1] >= 1.0
+
+
+def test_reach_is_reproducible_and_banded():
+    first = simulate_reach(20_000_000, 31, 6, seed=7, sample_size=50_000)
+    assert first["reach"] == simulate_reach(20_000_000, 31, 6, seed=7, sample_size=50_000)["reach"]
+    low, mean, high = first["reach"][1], first["reach"][0], first["reach"][2]
+    assert 0 < low <= mean <= high <= first["pool_size"] * 1.5
+    assert first["delivered_imps"][0] == pytest.approx(20_000_000, rel=0.1)
+    assert first["frequency_share"].sum() == pytest.approx(1.0)
+    assert not first["saturated"]
+
+
+def test_audience_is_per_slot_with_a_market_override():
+    slot = simulate_reach(5_000_000, 14, 2, "MCG", "Mobile", seed=3, sample_size=20_000)
+    assert slot["pool_size"] == pytest.approx(DAILY_AUDIENCE_UNIQUES[("MCG", "Mobile")] / 0.25, rel=0.1)
+    smaller = simulate_reach(5_000_000, 14, 2, "MCG", "Mobile", seed=3, sample_size=20_000,
+                             daily_uniques=DAILY_AUDIENCE_UNIQUES[("MCG", "Mobile")] / 10)
+    assert smaller["pool_size"] == pytest.approx(slot["pool_size"] / 10)
+    assert smaller["saturated"] and smaller["reach"][0] < slot["reach"][0]
+
+
+def test_capped_poisson_rate_hits_the_target_mean():
+    for cap in (1, 3, 6):
+        for target in (0.05, 0.5, cap * 0.9):
+            pmf = _capped_poisson(_daily_rate(target, cap), cap)
+            assert pmf.sum() == pytest.approx(1.0)
+            assert (pmf * np.arange(cap + 1)).sum() == pytest.approx(target, rel=1e-6)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from mediaplanner.delivery import UNCAPPED_DAILY_FREQUENCY
+from mediaplanner.forecasting import forecast_audience_array
+from mediaplanner.reach import simulate_reach
+from mediaplanner.reach_curves import curve_reach, curve_reach_array, slot_audience
+from mediaplanner.resolvers import get_freq_cap_numeric
+
+UNCAPPED = "High Impact"  # frequency cap "Off" → get_freq_cap_numeric == 0
+
+LINES = [(1e6, 30), (5e6, 14), (2e7, 31), (3e7, 7)]
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path_factory, monkeypatch):
+    monkeypatch.setenv("MEDIAPLANNER_CACHE_DIR", str(tmp_path_factory.getbasetemp() / "curves"))
+
+
+@pytest.mark.parametrize("impressions,days", LINES)
+def test_uncapped_product_reads_the_uncapped_curves(impressions, days):
+    assert get_freq_cap_numeric(UNCAPPED) == 0
+    reach = curve_reach(UNCAPPED, "MSN", "All Devices", impressions, days)
+    assert reach > 0
+    assert reach == pytest.approx(float(curve_reach_array(impressions, days, UNCAPPED_DAILY_FREQUENCY,
+                                                          slot_audience("MSN", "All Devices"))))
+    # Between the §6 forecast at the uncapped frequency (everyone at the cap) and one user per impression
+    _, _, lifetime = forecast_audience_array([impressions], [days], [UNCAPPED_DAILY_FREQUENCY], 0.30)
+    assert lifetime[0] <= reach <= impressions
+
+
+@pytest.mark.parametrize("impressions,days", LINES[1:])
+def test_uncapped_curve_matches_monte_carlo(impressions, days):
+    reach = curve_reach(UNCAPPED, "MSN", "All Devices", impressions, days)
+    simulated = simulate_reach(impressions, days, 0, "MSN", "All Devices", 0.30, sample_size=100_000, seed=1)
+    assert reach == pytest.approx(simulated["reach"][0], rel=0.05)
+
+
+def test_no_reach_without_impressions_days_or_audience():
+    reach = curve_reach_array([0, 1e6, 1e6, 1e6], [10, 0, 10, 10], [3, 3, 3, 0], [1e6, 1e6, 0, 1e6])
+    assert reach[:3].tolist() == [0.0, 0.0, 0.0] and reach[3] > 0
+    assert curve_reach("GDALI - MSN Takeover", "MSN", "All Devices", 1e6, 10) == 0.0
+    more = curve_reach_array(np.array([1e6, 2e6, 4e6]), 14, 3, 5e6)
+    assert (np.diff(more) > 0).all()
@@ -0,0 +1,76 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mediaplanner.capacity import read_deals
+from mediaplanner.takeovers import TakeoverIndex, _IntervalTree, scan_conflicts
+
+TAKEOVER = "GDALI - MSN Takeover"
+
+
+def _flight(num, market, start, end, product=TAKEOVER, **extra):
+    return {"flight_num": num, "product": product, "publisher": "MSN", "format": "Banner",
+            "start_date": start, "end_date": end, "market": market, **extra}
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 64, 300])
+def test_interval_tree_matches_brute_force(n):
+    rng = np.random.default_rng(n)
+    starts = rng.integers(0, 400, n)
+    ends = starts + rng.integers(0, 30, n)
+    tree = _IntervalTree(starts.tolist(), ends.tolist(), list(range(n)))
+    for start in range(-5, 440, 7):
+        for length in (0, 3, 40):
+            end = start + length
+            expected = sorted(i for i in range(n) if starts[i] <= end and ends[i] >= start)
+            found = [tree.ids[pos] for pos in tree.overlapping(start, end)]
+            assert sorted(found) == expected
+            assert tree.overlaps_any(start, end) == bool(expected)
+            assert list(tree.starts[tree.overlapping(start, end)]) == sorted(starts[expected])
+
+
+def test_index_reports_overlap_window_and_folds_in_new_bookings():
+    index = TakeoverIndex()
+    index.add("MSN", "us", date(2026, 3, 1), date(2026, 3, 10), "D-1")
+    conflicts = index.conflicts("MSN", "US ", "2026-03-08", "2026-03-20")
+    assert [(c["deal_id"], c["overlap_start"], c["overlap_days"]) for c in conflicts] == \
+        [("D-1", date(2026, 3, 8), 3)]
+    assert not index.has_conflict("MSN", "US", date(2026, 3, 11), date(2026, 3, 20))
+    assert not index.has_conflict("Outlook", "US", date(2026, 3, 1), date(2026, 3, 2))
+    index.add("MSN", "US", date(2026, 3, 15), date(2026, 3, 16), "D-2")
+    assert index.has_conflict("MSN", "US", date(2026, 3, 11), date(2026, 3, 20))
+    assert len(index) == 2
+
+
+def test_plan_flights_are_indexed_on_their_own_market():
+    flights = [_flight(1, "UK", date(2026, 5, 1), date(2026, 5, 7)),
+               _flight(2, "US", date(2026, 6, 1), date(2026, 6, 7)),
+               _flight(3, "US", date(2026, 5, 1), date(2026, 5, 7), product="High Impact")]
+    index = TakeoverIndex.from_flights(flights, market="US")
+    # The UK takeover does not block the same dates in the US, and vice versa
+    assert not index.has_conflict("MSN", "US", date(2026, 5, 3), date(2026, 5, 4))
+    assert [c["deal_id"] for c in index.conflicts("MSN", "UK", date(2026, 5, 3), date(2026, 5, 4))] == ["Flight 1"]
+    assert index.has_conflict("MSN", "US", date(2026, 6, 7), date(2026, 6, 9))
+    assert len(index) == 2
+
+
+def test_flights_without_a_market_use_the_selected_one():
+    flight = _flight(1, None, date(2026, 5, 1), date(2026, 5, 7))
+    del flight["market"]
+    assert TakeoverIndex.from_flights([flight], market="CA").has_conflict("MSN", "CA", "2026-05-07", "2026-05-07")
+
+
+def test_deal_file_index_and_scan_agree():
+    deals = read_deals("sample_deals.csv")
+    assert scan_conflicts(deals).empty
+    # A second UK takeover overlapping the multi-market (US;UK) one
+    clash = deals[deals["deal_id"] == "D-2024-006"].assign(deal_id="D-X", market_country="UK")
+    deals = pd.concat([deals, clash], ignore_index=True)
+    index = TakeoverIndex.from_deals(deals)
+    pairs = scan_conflicts(deals)
+    assert [(p.market, {p.deal_a, p.deal_b}) for p in pairs.itertuples()] == [("UK", {"D-2024-006", "D-X"})]
+    for pair in pairs.itertuples(index=False):
+        found = index.conflicts(pair.publisher, pair.market, pair.overlap_start, pair.overlap_end)
+        assert {pair.deal_a, pair.deal_b} <= {c["deal_id"] for c in found}